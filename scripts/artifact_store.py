@@ -0,0 +1,262 @@
+"""
+Local content-addressed store for downloaded artifact zips.
+
+Zips live once under ``<root>/objects/<sha256>.zip``; ``index.json`` maps
+"owner/repo/artifact_id" to the digest and records each object's size and
+last access. Asking for an artifact that is already stored costs no network
+bytes: the object is hard-linked (or reflinked, or as a last resort copied)
+into the requested output directory. The store is kept under a size budget
+by evicting the least recently used objects.
+
+Location: $ARTIFACT_STORE (default ~/.cache/more-mojo/artifacts).
+Budget:   $ARTIFACT_STORE_MAX_GB (default 10).
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import time
+import zipfile
+from concurrent.futures import wait
+from pathlib import Path
+
+from github_client import fetch_to_file
+from globs import glob_rx
+
+FICLONE = 0x40049409    # Linux ioctl: share extents with another file (btrfs/xfs)
+LARGE_MEMBER = 16 << 20  # members at least this big are inflated in a worker process
+
+
+class ArtifactStore:
+    def __init__(self, root=None, max_bytes=None):
+        self.root = Path(root or os.environ.get("ARTIFACT_STORE") or Path.home() / ".cache" / "more-mojo" / "artifacts")
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.environ.get("ARTIFACT_STORE_MAX_GB", "10")) * (1 << 30))
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        (self.root / "incoming").mkdir(parents=True, exist_ok=True)
+
+    # ---- index (shared between processes; always read-modify-write under the lock) ----
+
+    @contextlib.contextmanager
+    def _index(self):
+        with open(self.root / "index.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index = json.loads((self.root / "index.json").read_text())
+            except (OSError, ValueError):
+                index = {"ids": {}, "objects": {}}
+            yield index
+            tmp = self.root / f"index.json.{os.getpid()}"
+            tmp.write_text(json.dumps(index, indent=1, sort_keys=True))
+            os.replace(tmp, self.root / "index.json")
+
+    def object_path(self, digest):
+        return self.root / "objects" / f"{digest}.zip"
+
+    def incoming_path(self, key):
+        """Where to download ``key`` before it is added (a .part there is resumed)."""
+        return self.root / "incoming" / (key.replace("/", "_") + ".zip")
+
+    @contextlib.contextmanager
+    def fetching(self, key):
+        """Exclusive hold on downloading ``key``: other threads and processes wait for it."""
+        with open(self.incoming_path(key).with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def lookup(self, key, digest=None):
+        """Digest of the stored object for ``key`` (and ``digest``, if given), or None."""
+        digest = digest.split(":")[-1] if digest else None
+        with self._index() as index:
+            found = index["ids"].get(key) or (digest if digest in index["objects"] else None)
+            if not found or (digest and found != digest) or not self.object_path(found).exists():
+                return None
+            index["ids"][key] = found
+            index["objects"][found]["last_access"] = time.time()
+            return found
+
+    def add(self, key, path, digest):
+        """Move a completed download into the store under ``digest``."""
+        obj = self.object_path(digest)
+        os.replace(path, obj)
+        with self._index() as index:
+            index["ids"][key] = digest
+            index["objects"][digest] = {"size": obj.stat().st_size, "last_access": time.time()}
+            self._evict(index, keep=digest)
+        return digest
+
+    def _evict(self, index, keep):
+        total = sum(o["size"] for o in index["objects"].values())
+        for digest, o in sorted(index["objects"].items(), key=lambda kv: kv[1]["last_access"]):
+            if total <= self.max_bytes: break
+            if digest == keep: continue
+            with contextlib.suppress(OSError):
+                self.object_path(digest).unlink()
+            total -= o["size"]
+            del index["objects"][digest]
+            index["ids"] = {k: v for k, v in index["ids"].items() if v != digest}
+
+    # ---- materialization ----
+
+    def materialize(self, digest, dest):
+        """Make ``dest`` a link to (or clone/copy of) the stored object; returns how."""
+        src, dest = self.object_path(digest), Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        with contextlib.suppress(OSError):
+            # already linked: rename() onto the same inode would be a no-op and leave tmp behind
+            if os.path.samefile(src, dest): return "hardlink"
+        tmp = dest.with_name(dest.name + ".link")
+        with contextlib.suppress(FileNotFoundError):
+            tmp.unlink()
+        how = "hardlink"
+        try:
+            os.link(src, tmp)
+        except OSError:
+            how = "reflink" if _reflink(src, tmp) else "copy"
+            if how == "copy": shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+        return how
+
+
+def _reflink(src, dest):
+    """Copy-on-write clone where the filesystem supports it (APFS, btrfs, xfs)."""
+    if sys.platform == "darwin":
+        return subprocess.run(["cp", "-c", str(src), str(dest)], capture_output=True).returncode == 0
+    try:
+        with open(src, "rb") as s, open(dest, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.unlink(dest)
+        return False
+
+
+def fetch_artifact(client, url, key, dest, transfer=None, digest=None, store=None):
+    """Put artifact ``key`` at ``dest``, downloading it only if the store lacks it.
+
+    Returns (sha256, cached). ``digest`` is the API's "sha256:..." value when
+    known; it both verifies the download and finds the object under another key.
+    """
+    store = store or ArtifactStore()
+    found, cached = store.lookup(key, digest), True
+    if found is None:
+        # one download per key; whoever waited for it finds it stored once the lock is theirs
+        with store.fetching(key):
+            found = store.lookup(key, digest)
+            if found is None:
+                tmp, cached = store.incoming_path(key), False
+                found = store.add(key, tmp, fetch_to_file(client, url, tmp, transfer, expected_sha256=digest))
+    if cached and transfer:
+        transfer.done()
+    store.materialize(found, dest)
+    return found, cached
+
+
+def _marker(extract_dir):
+    return Path(extract_dir) / ".artifact-sha256"
+
+
+def _selection(include=(), exclude=()):
+    if not include and not exclude:
+        return ""
+    return " " + hashlib.sha256(json.dumps([sorted(include), sorted(exclude)]).encode()).hexdigest()[:12]
+
+
+def already_extracted(extract_dir, digest, include=(), exclude=()):
+    """True when ``extract_dir`` holds this object, extracted with the same member selection."""
+    try:
+        return _marker(extract_dir).read_text().strip() == digest + _selection(include, exclude)
+    except OSError:
+        return False
+
+
+def mark_extracted(extract_dir, digest, include=(), exclude=()):
+    _marker(extract_dir).write_text(digest + _selection(include, exclude) + "\n")
+
+
+# ---- selective extraction ----
+
+def member_matches(name, patterns):
+    """True if ``name`` or one of its parent directories matches a glob in ``patterns``.
+
+    ``**`` spans directories, so "*.app" selects a whole bundle and
+    "**/*.log" every log.
+    """
+    parts = name.rstrip("/").split("/")
+    candidates = ["/".join(parts[:n]) for n in range(1, len(parts) + 1)]
+    return any(glob_rx(p).match(c) for p in patterns for c in candidates)
+
+
+def select_members(infos, include=(), exclude=()):
+    return [i for i in infos
+            if (not include or member_matches(i.filename, include)) and not member_matches(i.filename, exclude)]
+
+
+def _extract_info(zf, info, dest):
+    """Extract one member, keeping unix modes and symlinks (needed for .app bundles)."""
+    mode = info.external_attr >> 16
+    if stat.S_ISLNK(mode):
+        return _extract_link(zf, info, dest)
+    path = zf.extract(info, dest)
+    if mode and not info.is_dir():
+        os.chmod(path, stat.S_IMODE(mode))
+    return info.file_size
+
+
+def _extract_link(zf, info, dest):
+    """Recreate a symlink member; the link and the path it points to must both stay inside ``dest``.
+
+    extract() creates links after every other member, so nothing is ever
+    written through one.
+    """
+    target, path = zf.read(info).decode(), os.path.join(dest, info.filename)
+    root = os.path.realpath(dest)
+    for p in (os.path.dirname(path), os.path.join(os.path.dirname(path), target)):
+        if os.path.commonpath([root, os.path.realpath(p)]) != root:
+            raise ValueError(f"{info.filename}: symlink to {target} leaves {dest}")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.islink(path) or os.path.isfile(path):
+        os.unlink(path)
+    os.symlink(target, path)
+    return info.file_size
+
+
+def _target(dest, name):
+    """Where zipfile puts member ``name`` under ``dest`` (empty, "." and ".." parts dropped)."""
+    return os.path.join(dest, *(p for p in name.split("/") if p not in ("", ".", "..")))
+
+
+def _extract_member(zip_path, name, dest):
+    """Worker-process entry point: inflate a single large member."""
+    with zipfile.ZipFile(zip_path) as zf:
+        return _extract_info(zf, zf.getinfo(name), dest)
+
+
+def extract(zip_path, dest, include=(), exclude=(), pool=None):
+    """Extract the selected members of ``zip_path`` into ``dest``; returns (members, bytes).
+
+    With a ProcessPoolExecutor as ``pool``, members of LARGE_MEMBER bytes or
+    more are inflated in parallel worker processes while the rest are
+    extracted here. Every directory is created up front, so workers and
+    this thread never race to create the same one.
+    """
+    os.makedirs(dest, exist_ok=True)
+    with zipfile.ZipFile(zip_path) as zf:
+        members = select_members(zf.infolist(), include, exclude)
+        links = [i for i in members if stat.S_ISLNK(i.external_attr >> 16)]
+        files = [i for i in members if not i.is_dir() and i not in links]
+        dirs = {_target(dest, i.filename) for i in members if i.is_dir() and i not in links}
+        for d in sorted(dirs | {os.path.dirname(_target(dest, i.filename)) for i in files}):
+            os.makedirs(d, exist_ok=True)
+        big = [i for i in files if pool and i.file_size >= LARGE_MEMBER]
+        futures = [pool.submit(_extract_member, str(zip_path), i.filename, str(dest)) for i in big]
+        size = sum(_extract_info(zf, i, dest) for i in files if i not in big)
+        wait(futures)
+        size += sum(f.result() for f in futures) + sum(_extract_info(zf, i, dest) for i in links)
+    return len(members), size
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Benchmarks for agent_hub triage, SwiftAgent's rewrite and the artifact downloaders.
+
+Every scenario runs in a fresh child process on a deterministic synthetic
+corpus (see corpus.py), so wall time and peak RSS are its own. Results can
+be saved and compared with a saved baseline; a scenario that got slower or
+bigger than the tolerance fails the run.
+
+    python3 scripts/bench/bench.py                        # quick: 10M logs, 200 Swift files, 4x8M artifacts
+    python3 scripts/bench/bench.py --sizes 100M,1G,5G --positions head,middle,tail
+    python3 scripts/bench/bench.py --save bench.json
+    python3 scripts/bench/bench.py --baseline bench.json --tolerance 0.2
+
+Scenarios:
+  triage/<size>/<position>[/zip]  run_logs + triage (tail-first scan, excerpts) over one run
+  scan-full/<size>/<position>     the same logs with every byte scanned (no early stop)
+  match/<n>/{direct,prefilter}    logscan.Matcher with n synthetic patterns over the tail run's logs, one
+                                  pass per pattern vs. the token prefilter; sets logscan.PREFILTER_MIN
+  swift/<files>/{cold,warm}       SwiftAgent.RULES.apply on a copy of a generated tree, then again
+  download/<n>x<size>/{cold,warm} download_artifacts against a local fake GitHub (empty store, then store hit)
+"""
+import argparse, contextlib, json, os, pathlib, resource, shutil, subprocess, sys, tempfile, time
+
+HERE = pathlib.Path(__file__).resolve().parent
+SCRIPTS = HERE.parent
+sys.path[:0] = [str(HERE), str(SCRIPTS / "swarm"), str(SCRIPTS)]
+import corpus
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024    # bytes on macOS, KiB on Linux
+
+# ------------------------ scenarios (run in the child) ------------------------
+
+def bench_triage(run, settle=True):
+    import agent_hub
+    agent_hub.load_agents()
+    t = time.perf_counter()
+    logs = agent_hub.run_logs(run)
+    result = agent_hub.triage(logs, settle=settle)
+    return {"seconds": time.perf_counter() - t, "bytes": sum(map(len, logs.values())),
+            "read": sum(s.read for s in logs.values()), "fired": [k for k, v in result["decisions"].items() if v]}
+
+def bench_match(run, patterns, prefilter):
+    import logscan
+    logscan.PREFILTER_MIN = 0 if prefilter else patterns + 1
+    m = logscan.Matcher(corpus.make_patterns(patterns))
+    logs = logscan.LogStream(sorted(pathlib.Path(run).rglob("*.log")))
+    t = time.perf_counter()
+    hits = m.scan(logs)
+    return {"seconds": time.perf_counter() - t, "bytes": len(logs), "read": logs.read,
+            "hits": sum(map(len, hits.values()))}
+
+def bench_swift(tree):
+    import agent_hub
+    with tempfile.TemporaryDirectory() as tmp:
+        work = pathlib.Path(shutil.copytree(tree, pathlib.Path(tmp) / "src"))
+        paths, manifest = sorted(work.glob("*.swift")), pathlib.Path(tmp) / "manifest.json"
+        size = sum(p.stat().st_size for p in paths)
+        t = time.perf_counter(); changed = agent_hub.SwiftAgent.RULES.apply(paths, manifest); cold = time.perf_counter() - t
+        t = time.perf_counter(); agent_hub.SwiftAgent.RULES.apply(paths, manifest); warm = time.perf_counter() - t
+    return {"seconds": cold, "warm_seconds": warm, "bytes": size, "changed": len(changed)}
+
+def bench_download(concurrency):
+    import download_artifacts as d
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["ARTIFACT_STORE"], os.environ["GITHUB_API_CACHE"] = f"{tmp}/store", f"{tmp}/api"
+        os.chdir(tmp)
+        out = {}
+        for phase in ("cold", "warm"):
+            t = time.perf_counter()
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                arts = d.get_workflow_artifacts("DrGoo1", "more-mojo", 1000, "bench-token")
+                results = d.download_artifacts("DrGoo1", "more-mojo", arts, "bench-token", concurrency)
+            out[phase] = time.perf_counter() - t
+            if not all(path for _, path, _ in results): raise SystemExit("download failed")
+        size = sum(a["size_in_bytes"] for a in arts)
+    return {"seconds": out["cold"], "warm_seconds": out["warm"], "bytes": size}
+
+def child(spec):
+    kind = spec["kind"]
+    if kind == "triage": r = bench_triage(spec["run"], settle=spec.get("settle", True))
+    elif kind == "match": r = bench_match(spec["run"], spec["patterns"], spec["prefilter"])
+    elif kind == "swift": r = bench_swift(spec["tree"])
+    elif kind == "download": r = bench_download(spec["concurrency"])
+    else: raise SystemExit(f"unknown scenario {kind}")
+    r["rss_mb"] = peak_rss_mb()
+    print(json.dumps(r))
+
+# ------------------------ driver ------------------------
+
+def run_child(spec, env=None):
+    p = subprocess.run([sys.executable, __file__, "--child", json.dumps(spec)], capture_output=True, text=True,
+                       env=dict(os.environ, **(env or {})))
+    if p.returncode != 0:
+        raise SystemExit(f"scenario {spec} failed:\n{p.stderr}")
+    return json.loads(p.stdout.strip().splitlines()[-1])
+
+def best_of(n, spec, env=None):
+    """Fastest of ``n`` runs (the least disturbed by the machine), with the peak RSS of all of them."""
+    runs = [run_child(spec, env) for _ in range(n)]
+    best = min(runs, key=lambda r: r["seconds"])
+    return dict(best, rss_mb=max(r["rss_mb"] for r in runs))
+
+def scenarios(args, work):
+    for size in map(corpus.parse_size, filter(None, args.sizes.split(","))):
+        for pos in args.positions.split(","):
+            run = corpus.make_run(work, size, pos, args.seed)
+            yield f"triage/{size >> 20}M/{pos}", {"kind": "triage", "run": str(run)}, None
+            if args.zip:
+                zrun = corpus.make_run(work, size, pos, args.seed, zipped=True)
+                yield f"triage/{size >> 20}M/{pos}/zip", {"kind": "triage", "run": str(zrun)}, None
+        yield f"scan-full/{size >> 20}M/tail", {"kind": "triage", "run": str(corpus.make_run(work, size, "tail", args.seed)),
+                                              "settle": False}, None
+        for n in map(int, filter(None, args.patterns.split(","))):
+            for mode in ("direct", "prefilter"):
+                yield f"match/{n}/{mode}", {"kind": "match", "run": str(corpus.make_run(work, size, "tail", args.seed)),
+                                            "patterns": n, "prefilter": mode == "prefilter"}, None
+    if args.swift_files:
+        tree = corpus.make_swift_tree(work, args.swift_files, args.seed)
+        yield f"swift/{args.swift_files}", {"kind": "swift", "tree": str(tree)}, None
+    if args.artifacts:
+        n, _, size = args.artifacts.partition("x")
+        zips = corpus.make_artifact_zips(work, int(n), corpus.parse_size(size), args.seed)
+        import fake_github
+        server, url = fake_github.serve(zips)
+        env = {"GITHUB_API_URL": url, "GITHUB_API_RATE": "0"}
+        yield f"download/{args.artifacts}", {"kind": "download", "concurrency": args.jobs}, env
+
+def crossover(results):
+    """Report lines: per pattern count, whether the Matcher prefilter beat a pass per pattern."""
+    out, first = [], None
+    for name in results:
+        kind, n, mode = (name.split("/") + ["", ""])[:3]
+        if kind != "match" or mode != "prefilter": continue
+        direct, pre = results[f"match/{n}/direct"], results[name]
+        if direct["hits"] != pre["hits"]: out.append(f"MISMATCH match/{n}: {direct['hits']} vs {pre['hits']} hits")
+        if pre["seconds"] <= direct["seconds"]: first = int(n) if first is None else min(first, int(n))
+    if any(k.startswith("match/") for k in results):
+        out.append(f"matcher: the prefilter wins from {first} patterns on (logscan.PREFILTER_MIN)" if first else
+                   "matcher: one pass per pattern won at every count measured")
+    return out
+
+def compare(results, baseline, tolerance):
+    """Regression lines: slower or bigger than ``baseline`` by more than ``tolerance``."""
+    bad = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b: continue
+        for metric, slack in (("seconds", 0.05), ("warm_seconds", 0.05), ("rss_mb", 8.0)):
+            if metric in r and metric in b and r[metric] > b[metric] * (1 + tolerance) + slack:
+                bad.append(f"{name}: {metric} {b[metric]:.2f} -> {r[metric]:.2f}")
+    return bad
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--sizes", default="10M", help="log sizes per run, e.g. 10M,1G,5G ('' to skip triage)")
+    ap.add_argument("--positions", default="tail", help="where the errors sit: head,middle,tail")
+    ap.add_argument("--zip", action="store_true", help="also triage the runs as artifact zips")
+    ap.add_argument("--patterns", default="16,64,256", help="Matcher pattern counts to compare ('' to skip)")
+    ap.add_argument("--swift-files", type=int, default=200, help="Swift files to rewrite (0: skip)")
+    ap.add_argument("--artifacts", default="4x8M", help="COUNTxSIZE artifacts to download ('' to skip)")
+    ap.add_argument("-j", "--jobs", type=int, default=4, help="download concurrency")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per scenario; the fastest counts")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--work", default=os.path.join(tempfile.gettempdir(), "more-mojo-bench"),
+                    help="where the generated corpus is kept (reused across runs)")
+    ap.add_argument("--save", metavar="FILE", help="write the results as JSON")
+    ap.add_argument("--baseline", metavar="FILE", help="fail if slower/bigger than these saved results")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed regression vs --baseline (0.25 = 25%%)")
+    args = ap.parse_args(argv)
+    if args.child: return child(json.loads(args.child))
+
+    work = pathlib.Path(args.work); work.mkdir(parents=True, exist_ok=True)
+    results = {}
+    print(f"{'scenario':34} {'wall s':>8} {'warm s':>8} {'MB/s':>8} {'read MB':>8} {'peak RSS MB':>12}")
+    for name, spec, env in scenarios(args, work):
+        r = results[name] = best_of(args.repeat, spec, env)
+        mbs = r["bytes"] / 1e6 / r["seconds"] if r["seconds"] else 0.0
+        warm = f"{r['warm_seconds']:8.3f}" if "warm_seconds" in r else f"{'':8}"
+        read = f"{r['read'] / 1e6:8.1f}" if "read" in r else f"{'':8}"
+        print(f"{name:34} {r['seconds']:8.3f} {warm} {mbs:8.1f} {read} {r['rss_mb']:12.1f}", flush=True)
+    for line in crossover(results): print(line)
+    if args.save:
+        pathlib.Path(args.save).write_text(json.dumps(results, indent=1, sort_keys=True))
+    if args.baseline:
+        bad = compare(results, json.loads(pathlib.Path(args.baseline).read_text()), args.tolerance)
+        for line in bad: print(f"REGRESSION {line}")
+        if bad: sys.exit(1)
+        print(f"no regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Deterministic synthetic CI corpus for the benchmarks.
+
+Generates xcodebuild/CMake-shaped logs of any size with the decisive error
+placed at the head, middle or tail, laid out like a downloaded run
+(app-build-logs/, plugin-build-logs/), plus Swift source trees of the shape
+SwiftAgent rewrites. The same (size, position, seed) always gives the same
+bytes, so timings are comparable across machines and commits; generated
+files are reused when they already exist.
+"""
+import os, pathlib, random, re, zipfile
+
+UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+POSITIONS = ("head", "middle", "tail")
+BLOCK = 4 << 20
+
+APP_ERRORS = ["xcodebuild: error: Scheme MoreMojoStudio is not currently configured for the build action.",
+              "/Users/runner/work/more-mojo/app/Sources/StealMojoPanel.swift:88:17: error: cannot find type 'ProcessorParams' in scope"]
+PLUGIN_ERRORS = ["CMake Error at CMakeLists.txt:24 (add_custom_command):",
+                 "  Error evaluating generator expression: $<TARGET_BUNDLE_DIR:MoreMojoPlugin>",
+                 "  TARGET_BUNDLE_DIR is allowed only for Bundle targets."]
+
+def parse_size(s):
+    """'10M', '5G', '512K' or a plain byte count."""
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([KMG]?)B?", str(s).strip().upper())
+    if not m: raise ValueError(f"bad size: {s}")
+    return int(float(m.group(1)) * UNITS[m.group(2)])
+
+def _xcode_lines(rng, n):
+    out = []
+    for i in range(n):
+        mod, f = rng.choice(["App", "DSP", "UI", "Presets"]), f"File{rng.randrange(5000)}"
+        out.append(rng.choice([
+            f"CompileSwift normal arm64 /Users/runner/work/more-mojo/app/Sources/{mod}/{f}.swift (in target 'MoreMojoStudio' from project 'MoreMojoStudio')",
+            f"    cd /Users/runner/work/more-mojo/app",
+            f"    /Applications/Xcode_16.4.app/Contents/Developer/Toolchains/XcodeDefault.xctoolchain/usr/bin/swift-frontend -c -primary-file {f}.swift -target arm64-apple-macos11.0 -module-name MoreMojoStudio -o /Users/runner/work/more-mojo/app/build/{f}.o",
+            f"Ld /Users/runner/work/more-mojo/app/build/Build/Products/Release/MoreMojoStudio.app/Contents/MacOS/MoreMojoStudio normal (in target 'MoreMojoStudio')",
+            f"/Users/runner/work/more-mojo/app/Sources/{mod}/{f}.swift:{rng.randrange(1, 900)}:{rng.randrange(1, 80)}: warning: variable 'x{i}' was never mutated; consider changing to 'let' constant",
+            f"SwiftDriverJobDiscovery normal arm64 Compiling {f}.swift (in target 'MoreMojoStudio' from project 'MoreMojoStudio')",
+            f"ProcessInfoPlistFile /Users/runner/work/more-mojo/app/build/Build/Products/Release/MoreMojoStudio.app/Contents/Info.plist",
+        ]))
+    return out
+
+def _cmake_lines(rng, n):
+    out = []
+    for i in range(n):
+        mod = rng.choice(["juce_core", "juce_audio_basics", "juce_dsp", "juce_gui_basics", "juce_audio_processors"])
+        out.append(rng.choice([
+            f"[{rng.randrange(1, 100):3d}%] Building CXX object CMakeFiles/MoreMojoPlugin.dir/JUCE/modules/{mod}/{mod}.mm.o",
+            f"-- Checking for module '{mod}' - found",
+            f"[{rng.randrange(1, 100):3d}%] Linking CXX static library libMoreMojoPlugin_SharedCode.a",
+            f"/Users/runner/work/more-mojo/JUCE/modules/{mod}/{mod}.cpp:{rng.randrange(1, 4000)}:5: warning: 'x' is deprecated [-Wdeprecated-declarations]",
+            f"-- Configuring juceaide {i}",
+        ]))
+    return out
+
+def write_log(path, size, position, errors, lines):
+    """Write ``size`` bytes of ``lines`` to ``path`` with ``errors`` at ``position``; returns the path."""
+    path = pathlib.Path(path)
+    if path.exists() and path.stat().st_size >= size: return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    err = ("\n".join(errors) + "\n").encode()
+    at = {"head": 0, "middle": size // 2, "tail": max(0, size - len(err) - 200)}[position]
+    pool = ("\n".join(lines) + "\n").encode()
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        written, placed = 0, False
+        while written < size:
+            chunk = pool[:min(len(pool), size - written)]
+            if not placed and written + len(chunk) > at:
+                cut = pool.rfind(b"\n", 0, max(1, at - written)) + 1
+                chunk = pool[:cut] + err
+                placed = True
+            f.write(chunk); written += len(chunk)
+        if not placed: f.write(err)
+    os.replace(tmp, path)
+    return path
+
+def make_run(root, size, position="tail", seed=0, zipped=False):
+    """A downloaded-run directory with app and plugin logs totalling about ``size`` bytes."""
+    root = pathlib.Path(root) / f"run-{size}-{position}-{seed}{'-zip' if zipped else ''}"
+    rng = random.Random(seed)
+    app = write_log(root/"app-build-logs"/"ci_logs"/"xcodebuild_app_stdout.log", size * 3 // 4, position,
+                    APP_ERRORS, _xcode_lines(rng, 2000))
+    plugin = write_log(root/"plugin-build-logs"/"ci_logs"/"cmake_build.log", size // 4, position,
+                       PLUGIN_ERRORS, _cmake_lines(rng, 2000))
+    if zipped:
+        for log, name in ((app, "app-build-logs"), (plugin, "plugin-build-logs")):
+            z = root/f"{name}.zip"
+            if not z.exists():
+                with zipfile.ZipFile(z.with_suffix(".tmp"), "w", zipfile.ZIP_DEFLATED) as zf:
+                    zf.write(log, f"ci_logs/{log.name}")
+                os.replace(z.with_suffix(".tmp"), z)
+            log.unlink()
+    return root
+
+def make_patterns(n, seed=0):
+    """``n`` agent pattern specs (agent, pattern, is_regex, flags) in the style of the built-in agents.
+
+    Half are plain literals, a quarter case-insensitive literals and a
+    quarter regexes. Most name a symbol or file, like compiler diagnostics
+    do; every eighth is made only of words the logs are full of, the worst
+    case for a word prefilter. The first two match errors make_run places.
+    """
+    rng = random.Random(seed)
+    words = sorted({w for line in _xcode_lines(rng, 200) + _cmake_lines(rng, 200)
+                    for w in re.findall(r"[A-Za-z_]{3,}", line)})
+    syllables = ["Mojo", "Proc", "Param", "Steal", "Wheel", "Band", "Macro", "Preset", "Meter", "Knob", "Bus", "Gain"]
+    out = [("Errors", e, False, 0) for e in (APP_ERRORS[1][-40:], PLUGIN_ERRORS[2].strip())]
+    while len(out) < n:
+        k = len(out)
+        name = "".join(rng.choice(syllables) for _ in range(3)) + str(k)
+        if k % 8 == 7:
+            out.append((f"Agent{k % 16}", "warning: " + " ".join(rng.choice(words) for _ in range(3)), False, 0))
+            continue
+        out.append([(f"Agent{k % 16}", f"error: cannot find '{name}' in scope", False, 0),
+                    (f"Agent{k % 16}", f"Undefined symbol: _{name}", False, re.IGNORECASE),
+                    (f"Agent{k % 16}", rf"{name}\.swift:\d+:\d+: error", True, 0),
+                    (f"Agent{k % 16}", f"ld: framework '{name}' not found", False, 0)][k % 4])
+    return out[:n]
+
+def make_swift_tree(root, files, seed=0):
+    """``files`` Swift sources; about a third use the nested/legacy names SwiftAgent.RULES rewrites."""
+    root = pathlib.Path(root) / f"swift-{files}-{seed}"
+    if root.exists() and len(list(root.glob("*.swift"))) == files: return root
+    root.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    for i in range(files):
+        body = [f"import SwiftUI\n\nstruct View{i}: View {{"]
+        for j in range(rng.randrange(20, 200)):
+            body.append(rng.choice([
+                f"    @State private var value{j}: Float = {rng.random():.3f}",
+                f"    var mode{j}: ProcessorParams.InterpMode = .liveHB4x" if i % 3 == 0 else f"    var mode{j}: InterpMode = .hqSinc8x",
+                f"    let macro{j} = MojoMacroMode.app" if i % 3 == 1 else f"    let macro{j} = MojoMacroMode.appDecides",
+                f"    func update{j}() {{ value{j} = min(1, value{j} + 0.01) }}",
+            ]))
+        body.append("    var body: some View { Text(\"x\") }\n}\n")
+        (root/f"View{i}.swift").write_text("\n".join(body))
+    return root
+
+def make_artifact_zips(root, count, size, seed=0):
+    """``count`` artifact zips of about ``size`` bytes of logs each (stored, so the size is the transfer)."""
+    root = pathlib.Path(root) / f"artifacts-{count}-{size}-{seed}"
+    root.mkdir(parents=True, exist_ok=True)
+    rng, out = random.Random(seed), []
+    for i in range(count):
+        z = root/f"artifact{i}.zip"
+        if not z.exists():
+            log = write_log(root/f"artifact{i}.log", size, "tail", APP_ERRORS, _xcode_lines(rng, 500))
+            with zipfile.ZipFile(z.with_suffix(".tmp"), "w", zipfile.ZIP_STORED) as zf:
+                zf.write(log, "ci_logs/xcodebuild_app_stdout.log")
+                zf.writestr("app/MoreMojoStudio.app/Contents/Info.plist", "<plist/>")
+            os.replace(z.with_suffix(".tmp"), z); log.unlink()
+        out.append(z)
+    return out
@@ -0,0 +1,78 @@
+"""Local stand-in for the GitHub Actions REST endpoints the downloaders use.
+
+Serves workflows, runs (status/branch filters, ETag + 304), paginated run
+artifacts and artifact zips. A zip request redirects to a separate blob path
+the way GitHub redirects to blob storage, and blobs honour Range/If-Range, so
+resume, keep-alive, redirect and conditional-request paths are all
+exercised. Zips are streamed from disk; ``delay`` adds per-request latency.
+"""
+import http.server, json, os, re, threading, time, zlib
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    zips, delay, requests = [], 0.0, []
+
+    def log_message(self, *args): pass
+
+    def _send(self, code, body=b"", headers=None, ctype="application/json"):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype); self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.end_headers(); self.wfile.write(body)
+
+    def _json(self, value):
+        body = json.dumps(value).encode()
+        etag = f'"{zlib.crc32(body):08x}"'
+        if self.headers.get("If-None-Match") == etag: return self._send(304, headers={"ETag": etag})
+        self._send(200, body, {"ETag": etag, "X-RateLimit-Remaining": "4999"})
+
+    def do_GET(self):
+        Handler.requests.append(self.path)
+        if self.delay: time.sleep(self.delay)
+        path, _, query = self.path.partition("?")
+        if path.endswith("/actions/workflows"):
+            return self._json({"workflows": [{"id": 1, "name": "Build App & Plugins (macOS) with Logs", "path": ".github/workflows/build_with_logs.yml"}]})
+        if re.search(r"/actions/workflows/[^/]+/runs$", path):
+            return self._json({"workflow_runs": [{"id": 1000, "status": "completed", "conclusion": "success",
+                                                  "created_at": "2025-01-01T00:00:00Z", "head_branch": "main"}]})
+        if re.search(r"/actions/runs/\d+/artifacts$", path):
+            params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+            per_page, page = int(params.get("per_page", 30)), int(params.get("page", 1))
+            arts = [{"id": i, "name": os.path.splitext(os.path.basename(z))[0], "size_in_bytes": os.path.getsize(z)}
+                    for i, z in enumerate(self.zips)]
+            body = {"total_count": len(arts), "artifacts": arts[(page - 1) * per_page: page * per_page]}
+            link = {}
+            if page * per_page < len(arts):
+                link = {"Link": f'<{self._base()}{path}?per_page={per_page}&page={page + 1}>; rel="next"'}
+            return self._send(200, json.dumps(body).encode(), link)
+        m = re.search(r"/actions/artifacts/(\d+)/zip$", path)
+        if m: return self._send(302, headers={"Location": f"{self._base()}/blob/{m.group(1)}"})
+        m = re.fullmatch(r"/blob/(\d+)", path)
+        if m and int(m.group(1)) < len(self.zips): return self._blob(self.zips[int(m.group(1))])
+        self._send(404, b'{"message": "Not Found"}')
+
+    def _base(self): return f"http://{self.headers.get('Host')}"
+
+    def _blob(self, zpath):
+        size, etag = os.path.getsize(zpath), f'"{os.stat(zpath).st_mtime_ns:x}"'
+        start, code, extra = 0, 200, {"ETag": etag, "Accept-Ranges": "bytes"}
+        rng = self.headers.get("Range")
+        if rng and self.headers.get("If-Range") in (None, etag):
+            start = int(re.match(r"bytes=(\d+)-", rng).group(1))
+            if start >= size: return self._send(416)
+            code, extra["Content-Range"] = 206, f"bytes {start}-{size - 1}/{size}"
+        self.send_response(code)
+        self.send_header("Content-Type", "application/zip"); self.send_header("Content-Length", str(size - start))
+        for k, v in extra.items(): self.send_header(k, v)
+        self.end_headers()
+        with open(zpath, "rb") as f:
+            f.seek(start)
+            for chunk in iter(lambda: f.read(1 << 20), b""): self.wfile.write(chunk)
+
+def serve(zips, delay=0.0):
+    """Start the server on a free port in a daemon thread; returns (server, base URL)."""
+    Handler.zips, Handler.delay, Handler.requests = [str(z) for z in zips], delay, []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
@@ -7,34 +7,38 @@ Usage: python download_artifacts.py <access_token> [workflow_name] [branch_name]
 
 If workflow_name is not provided, it defaults to "Build macOS App"
 If branch_name is not provided, it defaults to "main"
+
+All artifacts of the run are fetched in parallel over shared keep-alive
+connections; set DOWNLOAD_CONCURRENCY or -j to change the limit (default 4).
+Each artifact is extracted as soon as it arrives; --include/--exclude globs
+(repeatable, ** spans directories) limit which members are extracted, e.g.
+--include "*.app" or --include "**/*.log".
+
+--trace FILE (or $DOWNLOAD_TRACE) writes a Chrome trace with the latency of
+every request and the throughput of every download and extraction.
 """
 
 import os
 import sys
-import json
 import time
-import urllib.request
 import zipfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from urllib.error import HTTPError
 
-def get_workflow_runs(owner, repo, workflow_name, access_token, branch="main"):
-    """Get all workflow runs for a specific workflow"""
-    url = f"https://api.github.com/repos/{owner}/{repo}/actions/workflows/{workflow_name}/runs?branch={branch}"
-    
-    # Handle different token formats (classic or fine-grained PAT)
-    auth_header = f"Bearer {access_token}" if access_token.startswith("github_pat_") else f"token {access_token}"
-    
-    headers = {
-        "Authorization": auth_header,
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "MoreMojoArtifactDownloader"
-    }
-    
-    req = urllib.request.Request(url, headers=headers)
+from artifact_store import already_extracted, extract, fetch_artifact, mark_extracted
+from github_client import API, Transfer, api_url, client_for
+from spans import publish, span
+
+CONCURRENCY = int(os.environ.get("DOWNLOAD_CONCURRENCY", "4"))
+TRACE = os.environ.get("DOWNLOAD_TRACE")
+
+def get_workflow_runs(owner, repo, workflow_name, access_token, branch="main", status=None, limit=None):
+    """Get workflow runs for a specific workflow (filtered by GitHub, newest first)"""
     try:
-        with urllib.request.urlopen(req) as response:
-            data = json.loads(response.read().decode())
-            return data.get("workflow_runs", [])
+        per_page = min(limit, 100) if limit else 100
+        return client_for(access_token).runs(owner, repo, workflow_name, branch=branch, status=status,
+                                             per_page=per_page, limit=limit)
     except HTTPError as e:
         print(f"Error fetching workflow runs: {e}")
         if e.code == 404:
@@ -44,110 +48,140 @@ def get_workflow_runs(owner, repo, workflow_name, access_token, branch="main"):
 
 def list_workflows(owner, repo, access_token):
     """List available workflows in the repository"""
-    url = f"https://api.github.com/repos/{owner}/{repo}/actions/workflows"
-    
-    # Handle different token formats (classic or fine-grained PAT)
-    auth_header = f"Bearer {access_token}" if access_token.startswith("github_pat_") else f"token {access_token}"
-    
-    headers = {
-        "Authorization": auth_header,
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "MoreMojoArtifactDownloader"
-    }
-    
-    req = urllib.request.Request(url, headers=headers)
     try:
-        with urllib.request.urlopen(req) as response:
-            data = json.loads(response.read().decode())
-            workflows = data.get("workflows", [])
-            for workflow in workflows:
-                print(f"- {workflow['name']} (path: {workflow['path']})")
+        for workflow in client_for(access_token).workflows(owner, repo):
+            print(f"- {workflow['name']} (path: {workflow['path']})")
     except HTTPError as e:
         print(f"Error listing workflows: {e}")
 
 def get_workflow_artifacts(owner, repo, run_id, access_token):
     """Get artifacts for a specific workflow run"""
-    url = f"https://api.github.com/repos/{owner}/{repo}/actions/runs/{run_id}/artifacts"
-    
-    # Handle different token formats (classic or fine-grained PAT)
-    auth_header = f"Bearer {access_token}" if access_token.startswith("github_pat_") else f"token {access_token}"
-    
-    headers = {
-        "Authorization": auth_header,
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "MoreMojoArtifactDownloader"
-    }
-    
-    req = urllib.request.Request(url, headers=headers)
+    url = api_url(f"/repos/{owner}/{repo}/actions/runs/{run_id}/artifacts", per_page=100)
     try:
-        with urllib.request.urlopen(req) as response:
-            data = json.loads(response.read().decode())
-            return data.get("artifacts", [])
+        return list(client_for(access_token).paginate(url, "artifacts"))
     except HTTPError as e:
         print(f"Error fetching artifacts: {e}")
         return []
 
-def download_artifact(owner, repo, artifact_id, artifact_name, access_token):
-    """Download a specific artifact by ID"""
-    url = f"https://api.github.com/repos/{owner}/{repo}/actions/artifacts/{artifact_id}/zip"
-    
-    # Handle different token formats (classic or fine-grained PAT)
-    auth_header = f"Bearer {access_token}" if access_token.startswith("github_pat_") else f"token {access_token}"
-    
-    headers = {
-        "Authorization": auth_header,
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "MoreMojoArtifactDownloader"
-    }
+def fetch_artifact_zip(owner, repo, artifact_id, artifact_name, access_token, transfer=None, digest=None):
+    """Fetch one artifact zip into ./artifacts; returns (zip path, sha256) or None"""
+    url = f"{API}/repos/{owner}/{repo}/actions/artifacts/{artifact_id}/zip"
     
     output_dir = os.path.join(os.getcwd(), "artifacts")
     os.makedirs(output_dir, exist_ok=True)
     output_zip = os.path.join(output_dir, f"{artifact_name}.zip")
+    transfer = transfer or Transfer(artifact_name)
     
     print(f"Downloading {artifact_name} to {output_zip}...")
     
-    req = urllib.request.Request(url, headers=headers)
     try:
-        with urllib.request.urlopen(req) as response:
-            with open(output_zip, 'wb') as f:
-                f.write(response.read())
-        
-        print(f"Download complete! Extracting to {output_dir}/{artifact_name}...")
-        extract_dir = os.path.join(output_dir, artifact_name)
-        os.makedirs(extract_dir, exist_ok=True)
-        
-        with zipfile.ZipFile(output_zip, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
-        
-        print(f"Artifact extracted to {extract_dir}")
-        return extract_dir
+        key = f"{owner}/{repo}/{artifact_id}"
+        digest, cached = fetch_artifact(client_for(access_token), url, key, output_zip, transfer, digest)
     except HTTPError as e:
         print(f"Error downloading artifact: {e}")
         return None
+    except (OSError, ValueError) as e:
+        print(f"Error downloading artifact: {e} (re-run to resume)")
+        return None
+    
+    print(f"{'Found in artifact store' if cached else f'Download complete ({transfer})'}: {artifact_name}, sha256 {digest[:12]}")
+    return output_zip, digest
+
+def extract_artifact(output_zip, digest, include=(), exclude=(), pool=None):
+    """Extract the selected members of a fetched artifact next to its zip"""
+    extract_dir = os.path.splitext(output_zip)[0]
+    if already_extracted(extract_dir, digest, include, exclude):
+        print(f"Already extracted at {extract_dir}")
+        return extract_dir
+    
+    print(f"Extracting to {extract_dir}...")
+    with span(f"extract {os.path.basename(output_zip)}", cat="extract") as s:
+        count, size = extract(output_zip, extract_dir, include, exclude, pool)
+        s.update(members=count, bytes=size)
+    mark_extracted(extract_dir, digest, include, exclude)
+    
+    print(f"Artifact extracted to {extract_dir} ({count} members, {size / 1e6:.1f} MB)")
+    return extract_dir
+
+def download_artifact(owner, repo, artifact_id, artifact_name, access_token, transfer=None, digest=None,
+                      include=(), exclude=()):
+    """Download a specific artifact by ID (``digest``: the API's "sha256:..." value, if any)"""
+    fetched = fetch_artifact_zip(owner, repo, artifact_id, artifact_name, access_token, transfer, digest)
+    return extract_artifact(*fetched, include, exclude) if fetched else None
+
+def download_artifacts(owner, repo, artifacts, access_token, concurrency=CONCURRENCY, include=(), exclude=()):
+    """Download all ``artifacts`` of a run in parallel, at most ``concurrency`` at a time.
+
+    Pipelined: each artifact is extracted as soon as its own download
+    finishes, on a separate pool, while the others are still transferring;
+    large members are inflated in worker processes. ``include``/``exclude``
+    globs pick which members get extracted at all.
+
+    Returns [(artifact, extract_dir or None, Transfer)] and prints per-artifact
+    and aggregate throughput.
+    """
+    def fetch(artifact):
+        transfer = Transfer(artifact['name'])
+        return artifact, transfer, fetch_artifact_zip(owner, repo, artifact['id'], artifact['name'], access_token,
+                                                      transfer, artifact.get('digest'))
+
+    start = time.perf_counter()
+    ready, extracting = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as net, \
+         ThreadPoolExecutor(max_workers=2) as disk, ProcessPoolExecutor() as cpu:
+        for f in as_completed([net.submit(fetch, a) for a in artifacts]):
+            artifact, transfer, fetched = f.result()
+            ready[artifact['id']] = (artifact, None, transfer)
+            if fetched:
+                extracting[artifact['id']] = disk.submit(extract_artifact, *fetched, include, exclude, cpu)
+        for artifact_id, f in extracting.items():
+            artifact, _, transfer = ready[artifact_id]
+            try:
+                ready[artifact_id] = (artifact, f.result(), transfer)
+            except (OSError, ValueError, zipfile.BadZipFile) as e:    # ValueError: a symlink leaving the artifact
+                print(f"Error extracting {artifact['name']}: {e}")
+    wall = time.perf_counter() - start
+    results = [ready[a['id']] for a in artifacts]
+
+    total = sum(t.bytes for _, _, t in results)
+    print("\nTransfer summary:")
+    for _, _, t in results:
+        print(f"  {t}")
+    print(f"  total: {total / 1e6:.1f} MB in {wall:.1f}s to usable on disk ({total / 1e6 / wall if wall else 0:.1f} MB/s, "
+          f"{sum(t.seconds for _, _, t in results):.1f}s if fetched one by one)")
+    return results
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python download_artifacts.py <access_token> [workflow_name] [branch_name]")
+        print("Usage: python download_artifacts.py <access_token> [workflow_name] [branch_name] "
+              "[--include GLOB]... [--exclude GLOB]... [-j N] [--trace FILE]")
         return 1
     
-    access_token = sys.argv[1]
-    workflow_name = sys.argv[2] if len(sys.argv) > 2 else "build_app.yml"
-    branch = sys.argv[3] if len(sys.argv) > 3 else "main"
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("access_token")
+    parser.add_argument("workflow_name", nargs="?", default="build_app.yml")
+    parser.add_argument("branch", nargs="?", default="main")
+    parser.add_argument("--include", action="append", default=[])
+    parser.add_argument("--exclude", action="append", default=[])
+    parser.add_argument("-j", "--jobs", type=int, default=CONCURRENCY)
+    parser.add_argument("--trace", default=TRACE)
+    args = parser.parse_args()
+    try:
+        return fetch_latest(args)
+    finally:
+        if args.trace: publish(args.trace, title="Download timing")
+
+def fetch_latest(args):
+    access_token, workflow_name, branch = args.access_token, args.workflow_name, args.branch
     
     owner = "DrGoo1"
     repo = "more-mojo"
     
-    print(f"Fetching workflow runs for {workflow_name} on branch {branch}...")
-    runs = get_workflow_runs(owner, repo, workflow_name, access_token, branch)
-    
-    if not runs:
-        print(f"No workflow runs found for {workflow_name}")
-        return 1
-    
-    # Find the latest successful run
-    successful_runs = [run for run in runs if run['conclusion'] == 'success']
+    print(f"Fetching latest successful run of {workflow_name} on branch {branch}...")
+    # GitHub filters and returns just the newest match; an unchanged answer is a free 304
+    successful_runs = get_workflow_runs(owner, repo, workflow_name, access_token, branch, status="success", limit=1)
     if not successful_runs:
-        print("No successful workflow runs found")
+        print(f"No successful workflow runs found for {workflow_name}")
         return 1
     
     latest_run = successful_runs[0]
@@ -160,12 +194,12 @@ def main():
         return 1
     
     for artifact in artifacts:
-        artifact_id = artifact['id']
-        artifact_name = artifact['name']
-        print(f"Found artifact: {artifact_name} (id: {artifact_id}, size: {artifact['size_in_bytes']} bytes)")
-        download_path = download_artifact(owner, repo, artifact_id, artifact_name, access_token)
+        print(f"Found artifact: {artifact['name']} (id: {artifact['id']}, size: {artifact['size_in_bytes']} bytes)")
+    
+    for artifact, download_path, _ in download_artifacts(owner, repo, artifacts, access_token, args.jobs,
+                                                         args.include, args.exclude):
         if download_path:
-            print(f"You can find the artifact at: {download_path}")
+            print(f"You can find {artifact['name']} at: {download_path}")
     
     return 0
 
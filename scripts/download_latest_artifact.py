@@ -2,15 +2,21 @@
 """
 Direct GitHub artifact downloader using token authentication
 For use when GitHub CLI (gh) is not available
+
+Set DOWNLOAD_TRACE to a file name to get a Chrome trace of the requests made.
 """
 
 import os
 import sys
 import json
-import requests
 import time
 from pathlib import Path
 import zipfile
+from urllib.error import HTTPError
+
+from artifact_store import already_extracted, extract, fetch_artifact, mark_extracted
+from github_client import API, Transfer, api_url, client_for
+from spans import publish
 
 # Configuration
 OWNER = "DrGoo1"
@@ -18,6 +24,7 @@ REPO = "more-mojo"
 WORKFLOW_NAME = "Build macOS App"
 ARTIFACT_NAME = "MoreMojo-App"
 OUTPUT_DIR = Path("./downloads")
+TRACE = os.environ.get("DOWNLOAD_TRACE")
 
 
 def get_token():
@@ -29,23 +36,16 @@ def get_token():
 
 
 def get_latest_run_id(token, workflow_name):
-    """Get the latest successful run ID for a workflow"""
-    url = f"https://api.github.com/repos/{OWNER}/{REPO}/actions/workflows/{workflow_name}/runs"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        print(f"Error fetching workflow runs: {response.status_code}")
-        print(response.text)
+    """Get the latest successful run ID for a workflow (name, file name or id)"""
+    try:
+        run = client_for(token).latest_successful_run(OWNER, REPO, workflow_name)
+    except HTTPError as e:
+        print(f"Error fetching workflow runs: {e.code}")
+        print(e.read().decode(errors="replace"))
         return None
     
-    data = response.json()
-    for run in data.get("workflow_runs", []):
-        if run["status"] == "completed" and run["conclusion"] == "success":
-            return run["id"]
+    if run:
+        return run["id"]
     
     print("No successful workflow runs found")
     return None
@@ -53,55 +53,56 @@ def get_latest_run_id(token, workflow_name):
 
 def list_artifacts(token, run_id):
     """List artifacts for a specific run"""
-    url = f"https://api.github.com/repos/{OWNER}/{REPO}/actions/runs/{run_id}/artifacts"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        print(f"Error fetching artifacts: {response.status_code}")
-        print(response.text)
+    url = api_url(f"/repos/{OWNER}/{REPO}/actions/runs/{run_id}/artifacts", per_page=100)
+    try:
+        return list(client_for(token).paginate(url, "artifacts"))
+    except HTTPError as e:
+        print(f"Error fetching artifacts: {e.code}")
+        print(e.read().decode(errors="replace"))
         return []
-    
-    return response.json().get("artifacts", [])
 
 
 def download_artifact(token, artifact_id, artifact_name, output_dir):
     """Download a specific artifact by ID"""
-    url = f"https://api.github.com/repos/{OWNER}/{REPO}/actions/artifacts/{artifact_id}/zip"
-    headers = {"Authorization": f"token {token}"}
+    url = f"{API}/repos/{OWNER}/{REPO}/actions/artifacts/{artifact_id}/zip"
     
     output_dir.mkdir(parents=True, exist_ok=True)
     output_zip = output_dir / f"{artifact_name}.zip"
     
     print(f"Downloading {artifact_name} to {output_zip}...")
     
-    response = requests.get(url, headers=headers, stream=True)
-    if response.status_code != 200:
-        print(f"Error downloading artifact: {response.status_code}")
-        print(response.text)
+    # served from the local artifact store when already fetched; otherwise streamed,
+    # resumable (re-run to continue an interrupted download) and renamed into place when complete
+    transfer = Transfer(artifact_name)
+    try:
+        digest, cached = fetch_artifact(client_for(token), url, f"{OWNER}/{REPO}/{artifact_id}", output_zip, transfer)
+    except HTTPError as e:
+        print(f"Error downloading artifact: {e.code}")
+        print(e.read().decode(errors="replace"))
         return None
     
-    with open(output_zip, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            if chunk:
-                f.write(chunk)
-    
-    print(f"Download complete! Extracting to {output_dir}/{artifact_name}/...")
     extract_dir = output_dir / artifact_name
+    if already_extracted(extract_dir, digest):
+        print(f"{artifact_name} is already in the artifact store and extracted at {extract_dir}")
+        return extract_dir
+    
+    print(f"{'Found in artifact store' if cached else f'Download complete ({transfer})'}, sha256 {digest[:12]}. "
+          f"Extracting to {output_dir}/{artifact_name}/...")
     extract_dir.mkdir(parents=True, exist_ok=True)
     
     try:
-        with zipfile.ZipFile(output_zip, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
+        extract(output_zip, extract_dir)    # keeps the .app's executable bits and symlinks
+        mark_extracted(extract_dir, digest)
         print(f"Artifact extracted to {extract_dir}")
         return extract_dir
     except zipfile.BadZipFile:
         print("Warning: Downloaded file is not a valid zip file. It may be empty or corrupted.")
         print(f"Raw file saved at {output_zip}")
         return output_zip
+    except ValueError as e:    # a symlink member pointing outside the artifact
+        print(f"Warning: not extracting an unsafe artifact: {e}")
+        print(f"Raw file saved at {output_zip}")
+        return output_zip
 
 
 def main():
@@ -143,4 +144,7 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    try:
+        sys.exit(main())
+    finally:
+        if TRACE: publish(TRACE, title="Download timing")
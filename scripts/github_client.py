@@ -0,0 +1,411 @@
+"""
+Shared GitHub REST client for the artifact downloaders.
+
+One GitHubClient per token keeps a keep-alive HTTPS connection per
+(thread, host), so consecutive API calls and downloads skip the TCP/TLS
+handshake, and builds its request headers once. Errors are raised as
+urllib.error.HTTPError so callers keep their existing ``except HTTPError``
+handling.
+
+JSON GETs are cached on disk ($GITHUB_API_CACHE, default
+~/.cache/more-mojo/api) together with their ETag/Last-Modified, and
+revalidated with If-None-Match/If-Modified-Since: an unchanged listing comes
+back as a bodiless 304, which GitHub does not count against the rate limit.
+
+Requests to the API host are paced by a per-token token bucket
+($GITHUB_API_RATE requests/s, default 10). Rate-limit responses (403/429 with
+Retry-After or an exhausted X-RateLimit-Remaining) and transient 5xx or
+network errors are retried with jittered exponential backoff
+($GITHUB_API_RETRIES, default 5), pausing every thread that shares the token,
+so a burst of runners polling at once queues instead of failing. Identical
+GETs in flight on several threads are sent once.
+
+Every request attempt is recorded as a span (see spans.py) whose duration is
+the time to response headers; every download as one with its bytes and MB/s.
+"""
+
+import hashlib
+import http.client
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urlsplit
+
+from spans import span
+
+API = os.environ.get("GITHUB_API_URL", "https://api.github.com")   # set by Actions; lets tests point elsewhere
+USER_AGENT = "MoreMojoArtifactDownloader"
+REDIRECTS = (301, 302, 303, 307, 308)
+CHUNK_SIZE = 1 << 20
+CACHE_DIR = Path(os.environ.get("GITHUB_API_CACHE") or Path.home() / ".cache" / "more-mojo" / "api")
+RATE = float(os.environ.get("GITHUB_API_RATE", "10"))           # requests/s per token; 0 disables pacing
+RETRIES = int(os.environ.get("GITHUB_API_RETRIES", "5"))
+MAX_WAIT = float(os.environ.get("GITHUB_API_MAX_WAIT", "900"))  # give up rather than sleep longer than this
+BACKOFF_BASE, BACKOFF_CAP = 1.0, 60.0
+SECONDARY_WAIT = 60.0    # GitHub: wait at least a minute after a secondary limit without Retry-After
+
+
+def auth_header(token):
+    """Handle different token formats (classic or fine-grained PAT)"""
+    return f"Bearer {token}" if token.startswith("github_pat_") else f"token {token}"
+
+
+def api_url(path, **params):
+    """``API + path`` with the non-None ``params`` as a query string."""
+    query = urlencode({k: v for k, v in params.items() if v is not None})
+    return f"{API}{path}" + (f"?{query}" if query else "")
+
+
+def _next_link(link):
+    """The rel="next" URL of a Link header, if any."""
+    for part in (link or "").split(","):
+        url, _, rel = part.partition(";")
+        if 'rel="next"' in rel:
+            return url.strip().strip("<>")
+    return None
+
+
+def _load_json(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _store_json(path, value):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}")
+    tmp.write_text(json.dumps(value))
+    os.replace(tmp, path)
+
+
+class TokenBucket:
+    """Lets callers through at ``rate`` per second, in bursts of up to ``burst``; thread-safe."""
+    def __init__(self, rate, burst=None):
+        self.rate, self.burst = rate, burst or max(1.0, rate)
+        self.tokens, self.stamp, self.paused_until = self.burst, time.monotonic(), 0.0
+        self.lock = threading.Lock()
+
+    def pause(self, seconds):
+        """Hold everyone back for ``seconds`` (the server told us to)."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def take(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.rate <= 0:
+                    return
+                else:
+                    self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                    self.stamp = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def _backoff(attempt):
+    """Exponential backoff with jitter, so throttled runners do not retry in lockstep."""
+    d = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+    return d / 2 + random.uniform(0, d / 2)
+
+
+def _retry_delay(status, headers, body, attempt):
+    """Seconds to wait before retrying a failed request, or None if retrying cannot help."""
+    if status in (403, 429):
+        if headers.get("Retry-After", "").isdigit():
+            return float(headers["Retry-After"])
+        if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+            return max(1.0, float(headers["X-RateLimit-Reset"]) - time.time())
+        if status == 429 or b"rate limit" in body.lower():
+            return max(SECONDARY_WAIT, _backoff(attempt))
+        return None    # a real permission error
+    if status in (500, 502, 503, 504):
+        return _backoff(attempt)
+    return None
+
+
+class GitHubClient:
+    def __init__(self, token, timeout=60, cache_dir=CACHE_DIR, rate=RATE):
+        self.timeout = timeout
+        self.headers = {
+            "Authorization": auth_header(token),
+            "Accept": "application/vnd.github.v3+json",
+            "User-Agent": USER_AGENT,
+        }
+        self._local = threading.local()
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        # responses differ per identity, so cache entries are keyed by token as well as URL
+        self._identity = hashlib.sha256(token.encode()).hexdigest()[:16]
+        # GitHub's limits are per token, and so is this client: one bucket paces all its threads
+        self.bucket = TokenBucket(rate)
+        self._api_host = urlsplit(API).netloc
+        self._inflight, self._inflight_lock = {}, threading.Lock()
+
+    def _conn(self, scheme, host):
+        conns = self._local.__dict__.setdefault("conns", {})
+        conn = conns.get((scheme, host))
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conns[(scheme, host)] = cls(host, timeout=self.timeout)
+        return conn
+
+    def _drop(self, scheme, host):
+        conn = self._local.__dict__.get("conns", {}).pop((scheme, host), None)
+        if conn: conn.close()
+
+    def open(self, url, headers=None, method="GET"):
+        """Send a request on a pooled connection and return the open response.
+
+        Redirects are followed; the Authorization header is only sent to the
+        host it was meant for (artifact zips redirect to blob storage). The
+        caller must read the response to the end (or close it) before the
+        thread's connection to that host can be reused.
+        """
+        hdrs = dict(self.headers, **(headers or {}))
+        for _ in range(5):
+            u = urlsplit(url)
+            resp = self._send(url, method, hdrs)
+            if resp.status in REDIRECTS and resp.getheader("Location"):
+                resp.read()
+                nxt = urlsplit(resp.getheader("Location"))
+                if nxt.netloc and nxt.netloc != u.netloc: hdrs.pop("Authorization", None)
+                url = resp.getheader("Location") if nxt.netloc else f"{u.scheme}://{u.netloc}{resp.getheader('Location')}"
+                continue
+            return resp
+        raise HTTPError(url, 310, "Too many redirects", None, None)
+
+    def _request(self, u, method, hdrs):
+        path = u.path + (f"?{u.query}" if u.query else "")
+        for attempt in (0, 1):
+            conn = self._conn(u.scheme, u.netloc)
+            try:
+                conn.request(method, path, headers=hdrs)
+                return conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionError, http.client.CannotSendRequest):
+                # the server closed an idle keep-alive connection; reconnect once
+                self._drop(u.scheme, u.netloc)
+                if attempt: raise
+
+    def _send(self, url, method, hdrs):
+        """One request: paced on the API host, retried while throttled or failing transiently."""
+        u = urlsplit(url)
+        paced = u.netloc == self._api_host
+        for attempt in range(RETRIES + 1):
+            if paced: self.bucket.take()
+            try:
+                with span(f"{method} {u.netloc}{u.path}", cat="http", attempt=attempt) as s:
+                    resp = self._request(u, method, hdrs)
+                    s["status"] = resp.status
+            except (OSError, http.client.HTTPException) as e:
+                self._drop(u.scheme, u.netloc)
+                if attempt == RETRIES: raise
+                delay, reason = _backoff(attempt), type(e).__name__
+            else:
+                if paced and resp.getheader("X-RateLimit-Remaining") == "0" and resp.getheader("X-RateLimit-Reset"):
+                    # last call of this window: hold the next ones until it resets
+                    self.bucket.pause(min(MAX_WAIT, float(resp.getheader("X-RateLimit-Reset")) - time.time()))
+                if resp.status < 400:
+                    return resp
+                body = resp.read()
+                delay, reason = _retry_delay(resp.status, resp.headers, body, attempt), f"HTTP {resp.status}"
+                if delay is None or delay > MAX_WAIT or attempt == RETRIES:
+                    raise HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(body))
+            print(f"GitHub: {reason} on {u.path}, retry {attempt + 1}/{RETRIES} in {delay:.1f}s", file=sys.stderr)
+            if paced and reason in ("HTTP 403", "HTTP 429"):
+                self.bucket.pause(delay)    # throttled: every thread on this token waits
+            else:
+                time.sleep(delay)
+
+    def _cache_file(self, url):
+        return self.cache_dir / (hashlib.sha256(f"{self._identity} {url}".encode()).hexdigest() + ".json")
+
+    def get(self, url):
+        """GET a JSON resource, revalidating any cached copy; returns (data, headers).
+
+        Threads asking for a URL that is already being fetched wait for that
+        response instead of sending their own; they all get the same objects,
+        which callers treat as read-only.
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(url)
+            owner = future is None
+            if owner: future = self._inflight[url] = Future()
+        if owner:
+            try:
+                future.set_result(self._get(url))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._inflight_lock: del self._inflight[url]
+        return future.result()
+
+    def _get(self, url):
+        entry = _load_json(self._cache_file(url)) if self.cache_dir else None
+        cond = {}
+        if entry and entry["headers"].get("ETag"):
+            cond["If-None-Match"] = entry["headers"]["ETag"]
+        elif entry and entry["headers"].get("Last-Modified"):
+            cond["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        with self.open(url, headers=cond) as resp:
+            body = resp.read()
+            if resp.status == 304 and entry:
+                return json.loads(entry["body"]), entry["headers"]
+            headers = {k: resp.getheader(k) for k in ("ETag", "Last-Modified", "Link") if resp.getheader(k)}
+        if self.cache_dir and ("ETag" in headers or "Last-Modified" in headers):
+            _store_json(self._cache_file(url), {"url": url, "headers": headers, "body": body.decode()})
+        return json.loads(body.decode()), headers
+
+    def get_json(self, url):
+        return self.get(url)[0]
+
+    def paginate(self, url, key, limit=None):
+        """Yield ``data[key]`` items across pages (following Link: rel="next"), up to ``limit``."""
+        count = 0
+        while url:
+            data, headers = self.get(url)
+            for item in data.get(key, []):
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+            url = _next_link(headers.get("Link"))
+
+    def workflow_id(self, owner, repo, workflow):
+        """Resolve a workflow display name to its id; ids and file names pass through.
+
+        The name->id map is kept in the cache directory and only re-listed
+        when a name is missing from it.
+        """
+        if str(workflow).isdigit() or str(workflow).endswith((".yml", ".yaml")) or not self.cache_dir:
+            return workflow
+        map_file = self.cache_dir / f"workflows-{self._identity}-{owner}-{repo}.json"
+        names = _load_json(map_file) or {}
+        if workflow not in names:
+            names = {w["name"]: w["id"] for w in self.workflows(owner, repo)}
+            _store_json(map_file, names)
+        return names.get(workflow, workflow)
+
+    def workflows(self, owner, repo):
+        return list(self.paginate(api_url(f"/repos/{owner}/{repo}/actions/workflows", per_page=100), "workflows"))
+
+    def runs(self, owner, repo, workflow, branch=None, status=None, per_page=100, limit=None):
+        """Runs of ``workflow``, filtered server-side (``status="success"``, branch)."""
+        wf = self.workflow_id(owner, repo, workflow)
+        url = api_url(f"/repos/{owner}/{repo}/actions/workflows/{wf}/runs",
+                      branch=branch, status=status, per_page=per_page)
+        return list(self.paginate(url, "workflow_runs", limit))
+
+    def latest_successful_run(self, owner, repo, workflow, branch=None):
+        """One conditional request: newest successful run, or None."""
+        runs = self.runs(owner, repo, workflow, branch=branch, status="success", per_page=1, limit=1)
+        return runs[0] if runs else None
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def client_for(token):
+    """The shared client for ``token``, created on first use."""
+    with _clients_lock:
+        if token not in _clients: _clients[token] = GitHubClient(token)
+        return _clients[token]
+
+
+class Transfer:
+    """Bytes moved and time taken by one download, for throughput reporting."""
+    def __init__(self, name):
+        self.name, self.bytes, self.start, self.end = name, 0, time.perf_counter(), None
+
+    def done(self):
+        self.end = time.perf_counter()
+        return self
+
+    @property
+    def seconds(self): return (self.end or time.perf_counter()) - self.start
+
+    @property
+    def mb_per_s(self): return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return f"{self.name}: {self.bytes / 1e6:.1f} MB in {self.seconds:.1f}s ({self.mb_per_s:.1f} MB/s)"
+
+
+def _sha256_of(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h
+
+
+def fetch_to_file(client, url, dest, transfer=None, expected_sha256=None):
+    """Stream ``url`` to ``dest`` and return its SHA-256 hex digest.
+
+    Bytes go to ``dest + '.part'`` in CHUNK_SIZE writes and are hashed as they
+    arrive. If a ``.part`` file survives from an interrupted run, only the
+    missing tail is requested (HTTP Range, guarded by If-Range on the
+    validator saved next to it). ``dest`` only ever appears complete: the part
+    file is fsynced and renamed into place atomically. A digest that does not
+    match ``expected_sha256`` discards the download and raises ValueError.
+    """
+    part, meta = f"{dest}.part", f"{dest}.part.json"
+    headers, h, have = {}, hashlib.sha256(), 0
+    if os.path.exists(part):
+        have = os.path.getsize(part)
+        try:
+            with open(meta) as f: validator = json.load(f).get("validator")
+        except (OSError, ValueError):
+            validator = None
+        if have and validator:
+            h = _sha256_of(part)
+            headers = {"Range": f"bytes={have}-", "If-Range": validator}
+        else:
+            have = 0
+    with span(f"fetch {os.path.basename(dest)}", cat="transfer", resumed_at=have) as s:
+        t0, got = time.perf_counter(), 0
+        try:
+            resp = client.open(url, headers=headers)
+        except HTTPError as e:
+            if e.code != 416: raise
+            resp = None    # the part file already holds every byte
+        s["ttfb_ms"] = round((time.perf_counter() - t0) * 1e3, 1)
+        if resp is not None:
+            with resp:
+                if resp.status != 206:
+                    have, h = 0, hashlib.sha256()    # server ignored or refused the range: start over
+                validator = resp.getheader("ETag") or resp.getheader("Last-Modified")
+                with open(meta, "w") as f: json.dump({"url": url, "validator": validator}, f)
+                with open(part, "ab" if have else "wb") as f:
+                    for chunk in iter(lambda: resp.read(CHUNK_SIZE), b""):
+                        f.write(chunk)
+                        h.update(chunk)
+                        got += len(chunk)
+                        if transfer: transfer.bytes += len(chunk)
+                    f.flush()
+                    os.fsync(f.fileno())
+        seconds = time.perf_counter() - t0
+        s.update(bytes=got, mb_per_s=round(got / 1e6 / seconds, 1) if seconds else 0.0)
+    digest = h.hexdigest()
+    if expected_sha256 and digest != expected_sha256.split(":")[-1]:
+        for p in (part, meta):
+            if os.path.exists(p): os.remove(p)
+        raise ValueError(f"{dest}: sha256 {digest} does not match expected {expected_sha256}")
+    os.replace(part, dest)
+    if os.path.exists(meta): os.remove(meta)
+    if transfer: transfer.done()
+    return digest
@@ -0,0 +1,19 @@
+"""
+Glob patterns over slash-separated member paths (zip archives, artifact trees).
+
+    **/   zero or more whole directories
+    **    anything, slashes included
+    *     anything within one path component
+    ?     one character other than a slash
+"""
+
+import re
+from functools import lru_cache
+
+_PARTS = {"**/": "(?:.*/)?", "**": ".*", "*": "[^/]*", "?": "[^/]"}
+
+
+@lru_cache(maxsize=None)
+def glob_rx(pattern):
+    """Compiled regex matching a whole path against ``pattern``."""
+    return re.compile("".join(_PARTS.get(p) or re.escape(p) for p in re.split(r"(\*\*/|\*\*|\*|\?)", pattern)) + r"\Z")
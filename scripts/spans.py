@@ -0,0 +1,112 @@
+"""
+Span timing for the CI scripts, saved as a Chrome trace.
+
+    with span("triage", bytes=n) as s:
+        ...
+        s["bytes_read"] = logs.read
+
+Every span records its wall time, the CPU time of this process and of the
+child processes reaped meanwhile, its I/O and the peak RSS so far. I/O is
+bytes read/written through system calls on Linux (/proc/self/io); elsewhere
+(macOS) it is the block input/output operations getrusage() counts, which
+leave out reads served from the page cache. Keys set on
+the yielded dict land in the span's args. Spans from all threads are kept;
+write_trace() saves them in Chrome trace format (chrome://tracing,
+ui.perfetto.dev) and table() renders them as a Markdown table.
+
+With $TRACE_STEP_SUMMARY set, publish() also appends that table to
+$GITHUB_STEP_SUMMARY.
+"""
+
+import contextlib
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+_events, _lock = [], threading.Lock()
+_origin = time.perf_counter()
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024    # ru_maxrss: bytes on macOS, KiB on Linux
+_STANDARD = ("cpu_s", "child_cpu_s", "io_read_mb", "io_write_mb", "io_read_blocks", "io_write_blocks", "peak_rss_mb")
+
+
+def _io():
+    """(unit, read, written) by this process so far: "mb" counts bytes, "blocks" block operations."""
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return "mb", int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        ru = resource.getrusage(resource.RUSAGE_SELF)
+        return "blocks", ru.ru_inblock, ru.ru_oublock
+
+
+def _cpu(who):
+    ru = resource.getrusage(who)
+    return ru.ru_utime + ru.ru_stime
+
+
+@contextlib.contextmanager
+def span(name, cat="phase", **args):
+    """Time the block as one span; yields its args dict for the caller to fill in."""
+    io0, cpu0, child0 = _io(), _cpu(resource.RUSAGE_SELF), _cpu(resource.RUSAGE_CHILDREN)
+    t0 = time.perf_counter()
+    try:
+        yield args
+    finally:
+        t1, io1 = time.perf_counter(), _io()
+        args["cpu_s"] = round(_cpu(resource.RUSAGE_SELF) - cpu0, 4)
+        # children are counted when reaped, so overlapping commands share their totals
+        args["child_cpu_s"] = round(_cpu(resource.RUSAGE_CHILDREN) - child0, 4)
+        if io0[0] == io1[0] == "mb":
+            args["io_read_mb"], args["io_write_mb"] = round((io1[1] - io0[1]) / 1e6, 3), round((io1[2] - io0[2]) / 1e6, 3)
+        elif io0[0] == io1[0]:
+            args["io_read_blocks"], args["io_write_blocks"] = io1[1] - io0[1], io1[2] - io0[2]
+        args["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT / (1 << 20), 1)
+        event = {"name": name, "cat": cat, "ph": "X", "ts": round((t0 - _origin) * 1e6), "dur": round((t1 - t0) * 1e6),
+                 "pid": os.getpid(), "tid": threading.get_native_id(), "args": args}
+        with _lock: _events.append(event)
+
+
+def events(cats=None):
+    """Finished spans (optionally only those in ``cats``), in start order."""
+    with _lock: out = list(_events)
+    return sorted((e for e in out if cats is None or e["cat"] in cats), key=lambda e: e["ts"])
+
+
+def write_trace(path):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"traceEvents": events(), "displayTimeUnit": "ms"}, f)
+    os.replace(tmp, path)
+
+
+def _io_cell(a, what):
+    if f"io_{what}_mb" in a: return a[f"io_{what}_mb"]
+    return f"{a[f'io_{what}_blocks']} blk" if f"io_{what}_blocks" in a else ""
+
+
+def table(cats=None, title="Timing"):
+    """Markdown lines: one row per span, the standard measurements plus its own args."""
+    rows = events(cats)
+    if not rows: return []
+    out = [f"## {title}", "| span | wall s | CPU s | child CPU s | read MB | written MB | peak RSS MB | details |",
+           "|---|---:|---:|---:|---:|---:|---:|---|"]
+    for e in rows:
+        a = e["args"]
+        details = ", ".join(f"{k}={v}" for k, v in a.items() if k not in _STANDARD)
+        name = e["name"].replace("|", "\\|")
+        out.append(f"| {name} | {e['dur'] / 1e6:.3f} | {a['cpu_s']:.3f} | {a['child_cpu_s']:.3f} | "
+                   f"{_io_cell(a, 'read')} | {_io_cell(a, 'write')} | {a['peak_rss_mb']} | {details.replace('|', '/')} |")
+    return out
+
+
+def publish(path, cats=None, title="Timing"):
+    """Write the trace to ``path``; with $TRACE_STEP_SUMMARY, add table() to the job summary too."""
+    write_trace(path)
+    summary = os.environ.get("GITHUB_STEP_SUMMARY")
+    if summary and os.environ.get("TRACE_STEP_SUMMARY"):
+        with open(summary, "a") as f:
+            f.write("\n".join(table(cats, title)) + "\n\n")
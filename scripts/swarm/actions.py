@@ -0,0 +1,89 @@
+"""Deduplicating, concurrent remediation scheduler for agent_hub.
+
+Agents name the remediation steps they need as keys into a table of Actions
+instead of running shell commands themselves. The scheduler runs every
+requested key once, even when several agents ask for it, pulls in ``deps``,
+honours ``after`` ordering between steps that are both planned, and runs
+everything else in parallel.
+"""
+import collections, time, traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from spans import span
+
+class Action:
+    """One remediation step.
+
+    ``fn`` returns truthy when it changed the tree. ``deps`` are always run
+    first; ``after`` only orders this action behind others that are planned
+    anyway (e.g. regenerate the project after sources were renamed).
+    """
+    def __init__(self, fn, deps=(), after=()):
+        self.fn, self.deps, self.after = fn, tuple(deps), tuple(after)
+
+Result = collections.namedtuple("Result", "key ok changed seconds")
+
+class Report:
+    def __init__(self, results, requested, wall):
+        self.results, self.requested, self.wall = results, requested, wall
+
+    @property
+    def changed(self): return any(r.changed for r in self.results.values())
+
+    @property
+    def serial_seconds(self):
+        """What the old one-agent-after-another flow would have spent."""
+        return sum(r.seconds * max(1, self.requested[k]) for k, r in self.results.items())
+
+    def lines(self):
+        dup = sum(n - 1 for n in self.requested.values())
+        out = [f"- actions: {len(self.results)} run, {dup} duplicate request(s) merged, "
+               f"wall {self.wall:.1f}s, ~{max(0.0, self.serial_seconds - self.wall):.1f}s saved vs serial"]
+        for r in self.results.values():
+            out.append(f"  - {r.key}: {'ok' if r.ok else 'FAILED'}{', changed' if r.changed else ''} ({r.seconds:.1f}s)")
+        return out
+
+class Scheduler:
+    def __init__(self, actions, max_workers=4):
+        self.actions, self.max_workers = actions, max_workers
+
+    def plan(self, keys):
+        """Requested keys plus their deps; returns (planned set, request counts)."""
+        requested = collections.Counter(keys)
+        planned, stack = set(), list(requested)
+        while stack:
+            k = stack.pop()
+            if k in planned: continue
+            planned.add(k); stack += self.actions[k].deps
+        return planned, requested
+
+    def run(self, keys):
+        planned, requested = self.plan(keys)
+        waits = {k: {d for d in self.actions[k].deps + self.actions[k].after if d in planned} for k in planned}
+        results, running, t0 = {}, {}, time.perf_counter()
+        with ThreadPoolExecutor(self.max_workers) as ex:
+            while len(results) < len(planned):
+                for k in sorted(planned - set(results) - set(running.values())):
+                    if not waits[k] <= set(results): continue
+                    if any(not results[d].ok for d in self.actions[k].deps):
+                        results[k] = Result(k, False, False, 0.0)    # a dependency failed
+                        continue
+                    running[ex.submit(self._run_one, k)] = k
+                if not running:
+                    if len(results) < len(planned) and not any(waits[k] <= set(results) for k in planned - set(results)):
+                        raise ValueError(f"action cycle among {sorted(planned - set(results))}")
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for f in done:
+                    results[running.pop(f)] = f.result()
+        return Report(results, requested, time.perf_counter() - t0)
+
+    def _run_one(self, key):
+        t = time.perf_counter()
+        with span(key, cat="action") as s:
+            try:
+                changed, ok = bool(self.actions[key].fn()), True
+            except BaseException:
+                # sh(check=True) raises SystemExit; keep the rest of the plan going
+                traceback.print_exc(); changed, ok = False, False
+            s.update(ok=ok, changed=changed)
+        return Result(key, ok, changed, time.perf_counter() - t)
@@ -1,5 +1,16 @@
 #!/usr/bin/env python3
-import os, re, subprocess, sys, pathlib, shutil
+import argparse, collections, itertools, json, os, re, signal, subprocess, sys, pathlib, threading, time, zipfile
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))   # shared scripts/ modules
+from spans import publish, span
+from logscan import LogStream, LogTail, excerpts, signatures, source_mtime, source_name, zip_members
+from rewrite import RuleSet
+import cmake_cache
+from triage_cache import TriageCache, fingerprint
+from registry import Registry, from_class
+from sigindex import SigIndex, report as sig_report
+from actions import Action, Scheduler
+from follow import Watcher
 
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 SRC  = ROOT / "app" / "Sources"
@@ -7,47 +18,125 @@ PLUGIN = ROOT / "plugin"
 LOGS_DL = ROOT / "failed_artifacts"   # downloaded artifacts
 LOGS_CI = ROOT / "ci_logs"            # inline logs from build job
 SUMMARY = ROOT / "swarm_summary.md"
+TRACE   = ROOT / "swarm_trace.json"      # Chrome trace of the phases, actions and commands
+CACHE   = pathlib.Path(os.environ.get("SWARM_CACHE_DIR", ROOT / ".swarm_cache"))
+AGENTS_D = pathlib.Path(__file__).resolve().parent / "agents.d"   # drop-in agents; more via $SWARM_AGENTS
+# read at most this much of the end of each log (decisive errors come last); unset reads whole logs
+TAIL    = int(float(os.environ["SWARM_TAIL_MB"]) * (1 << 20)) if os.environ.get("SWARM_TAIL_MB") else None
+# read each source tail-first and stop once all of its agents fired: decisions no longer wait on the
+# whole log, but excerpts are partial and nothing is indexed. SWARM_FULL_SCAN=1 reads (and indexes) every byte.
+# A source with an agent that does not fire is still read to the start; only SWARM_TAIL_MB bounds that, and
+# with it the latency on huge logs
+EARLY_STOP = not os.environ.get("SWARM_FULL_SCAN")
+
+_out = threading.Lock()   # actions run on worker threads; keep their lines whole
+def say(msg):
+    with _out: print(msg, flush=True)
 
 def sh(cmd, check=True):
-    print(f"$ {cmd}")
-    p = subprocess.run(cmd, shell=True, text=True)
+    say(f"$ {cmd}")
+    with span(cmd, cat="sh") as s:
+        p = subprocess.run(cmd, shell=True, text=True)
+        s["returncode"] = p.returncode
     if check and p.returncode != 0:
         raise SystemExit(p.returncode)
     return p.returncode
 
-def write(p: pathlib.Path, s: str) -> bool:
+# paths the agents wrote or removed; staging and change detection look only at these
+TOUCHED, STAGED = set(), set()
+STAGE_ERRORS = []   # failed `git add` calls, reported in the summary
+
+def track(*paths):
+    with _out: TOUCHED.update(pathlib.Path(p).resolve() for p in paths)
+
+def write(p: pathlib.Path, s: str, tracked=True) -> bool:
     p.parent.mkdir(parents=True, exist_ok=True)
     old = p.read_text(errors="ignore") if p.exists() else ""
     if old == s: return False
     p.write_text(s)
-    print(f"wrote {p}")
+    if tracked: track(p)
+    say(f"wrote {p}")
     return True
 
-def stage_all(): sh("git add -A", check=False)
-def has_changes() -> bool: return subprocess.run("git diff --quiet", shell=True).returncode != 0
+def unlink(p: pathlib.Path):
+    p.unlink(); track(p)
+    say(f"removed {p}")
+
+def stage():
+    """Stage exactly the touched paths (additions, edits and deletions) in one git call.
+
+    A path that is gone and was never tracked is left out: git would reject
+    the whole call for it. A failed call is kept in STAGE_ERRORS.
+    """
+    paths = sorted(str(p.relative_to(ROOT)) for p in TOUCHED - STAGED if ROOT in p.parents)
+    gone = [q for q in paths if not (ROOT / q).exists()]
+    if gone:
+        listed = subprocess.run(["git", "ls-files", "-z", "--", *gone], cwd=ROOT, text=True,
+                                capture_output=True).stdout.split("\0")
+        known = {q for q in gone for f in listed if f == q or f.startswith(q + "/")}
+        paths = [q for q in paths if q in known or q not in gone]
+    if not paths: return
+    say(f"$ git add -A --pathspec-from-file=- ({len(paths)} path(s))")
+    with span("git add", cat="sh", paths=len(paths)) as s:
+        p = subprocess.run(["git", "add", "-A", "--pathspec-from-file=-"], cwd=ROOT, text=True,
+                           input="\n".join(paths) + "\n", stderr=subprocess.PIPE)
+        s["returncode"] = p.returncode
+    if p.returncode == 0:
+        STAGED.update(ROOT / q for q in paths)
+    else:
+        say(p.stderr.rstrip())
+        STAGE_ERRORS.append(f"git add failed (exit {p.returncode}) for {len(paths)} path(s): "
+                            f"{(p.stderr.strip().splitlines() or ['no output'])[0]}")
+
+def has_changes() -> bool:
+    """Did staging change anything? Asked of git only for the paths we staged."""
+    if not STAGED: return False
+    rel = sorted(str(p.relative_to(ROOT)) for p in STAGED)
+    with span("git diff --cached", cat="sh", paths=len(rel)):
+        return subprocess.run(["git", "diff", "--cached", "--quiet", "--", *rel], cwd=ROOT).returncode != 0
+
+ARTIFACT_ZIPS = []   # extra artifact zips (--zip), e.g. from download_artifacts.py
 
-def read_globs(*globs):
-    buf = ""
+def artifact_zips():
+    return sorted(LOGS_DL.glob("*.zip")) + [pathlib.Path(z) for z in ARTIFACT_ZIPS]
+
+def read_globs(*globs, root=None, dl=None, zips=None):
+    """Streamed view over every file matching ``globs`` (see logscan.LogStream).
+
+    A ``failed_artifacts/<name>/...`` glob also matches members of a
+    ``<name>.zip`` artifact, which are read in place without extracting.
+    ``root``, ``dl`` and ``zips`` default to the checkout, its
+    failed_artifacts/ and artifact_zips(); batch mode points them at a past run.
+    """
+    root, dl = root or ROOT, dl or LOGS_DL
+    zips = artifact_zips() if zips is None else zips
+    paths = []
     for g in globs:
-        for p in ROOT.glob(g):
-            try: buf += p.read_text(errors="ignore")
-            except: pass
-    return buf
+        head, _, rest = g.partition("/")
+        base, pattern = (dl, rest) if head == LOGS_DL.name else (root, g)
+        if base.is_dir(): paths += [p for p in base.glob(pattern) if p.is_file()]
+        artifact, _, inner = rest.partition("/")
+        if base is dl and inner:
+            for z in zips:
+                if z.stem == artifact: paths += zip_members(z, inner)
+    return LogStream(paths, tail=TAIL)
 
-def first_match_excerpt(text:str, pattern:str, lines=20):
-    try:
-        m = re.search(pattern, text, flags=re.IGNORECASE|re.MULTILINE)
-        if not m: return ""
-        start = max(0, text.rfind("\n", 0, m.start() - 1))
-        end   = text.find("\n", m.end())
-        start = 0 if start < 0 else start
-        end   = len(text) if end < 0 else end
-        # expand to N lines around
-        before = text[:m.start()].splitlines()[-lines:]
-        after  = text[m.end():].splitlines()[:lines]
-        return "\n".join(before + [text[m.start():m.end()]] + after)
-    except Exception:
-        return ""
+# inline logs from the build job, then the same files inside the downloaded artifacts
+APP_GLOBS = ("ci_logs/xcodebuild_app_stdout.log",
+             "ci_logs/app_preflight.txt",
+             "failed_artifacts/app-build-logs/**/xcodebuild_app_stdout.log",
+             "failed_artifacts/app-build-logs/**/app_preflight.txt",
+             "failed_artifacts/app-build-logs/**/*.log")
+PLUGIN_GLOBS = ("ci_logs/cmake_configure.log",
+                "ci_logs/cmake_build.log",
+                "failed_artifacts/plugin-build-logs/**/cmake_configure.log",
+                "failed_artifacts/plugin-build-logs/**/cmake_build.log",
+                "failed_artifacts/plugin-build-logs/**/CMake*.log")
+SOURCES = {"app": APP_GLOBS, "plugin": PLUGIN_GLOBS}    # log sources agents can name
+
+def read_sources(root=None, dl=None, zips=None):
+    """{source: LogStream} for every log source some registered agent reads (see read_globs)."""
+    return {source: read_globs(*REGISTRY.sources[source], root=root, dl=dl, zips=zips) for source, _ in REGISTRY.groups()}
 
 # ------------------------ Agents ------------------------
 
@@ -58,16 +147,7 @@ class ProjectAgent:
         "Unable to read project",
         "cannot be opened because it is in a future Xcode project file format",
     ]
-    @staticmethod
-    def wants(app_logs:str)->bool:
-        return any(pat in app_logs for pat in ProjectAgent.PATTERNS)
-    @staticmethod
-    def run():
-        print("ProjectAgent: XcodeGen regeneration (if app/project.yml exists)")
-        sh("which xcodegen || (brew update || true; brew install xcodegen)", check=False)
-        projy = ROOT/"app"/"project.yml"
-        if projy.exists():
-            sh(f"(cd {ROOT/'app'} && xcodegen generate)", check=False)
+    ACTIONS = ["xcodegen.install", "xcodegen.generate"]
 
 class SchemeAgent:
     """Fix missing/unshared scheme by regenerating the project with XcodeGen."""
@@ -76,17 +156,8 @@ class SchemeAgent:
         r"No shared schemes found",
         r"xcodebuild: error:",
     ]
-    @staticmethod
-    def wants(app_logs:str)->bool:
-        return any(re.search(p, app_logs, flags=re.IGNORECASE) for p in SchemeAgent.PATTERNS)
-    @staticmethod
-    def run():
-        print("SchemeAgent: ensuring shared scheme via XcodeGen (if project.yml exists)")
-        sh("which xcodegen || (brew update || true; brew install xcodegen)", check=False)
-        projy = ROOT/"app"/"project.yml"
-        if projy.exists():
-            sh(f"(cd {ROOT/'app'} && xcodegen generate)", check=False)
-        # no-op if project.yml absent (workflow step already chooses first available scheme)
+    REGEX, FLAGS = True, re.IGNORECASE
+    ACTIONS = ["xcodegen.install", "xcodegen.generate"]
 
 class SwiftAgent:
     """Unify SharedTypes / fix wheel cases / macOS 11 style / EQ bands."""
@@ -119,25 +190,26 @@ public struct MojoEQMatch: Codable, Equatable { public var bands: [MojoEQBand] }
 """
     EXT   = "import Foundation\nextension ProcessorParams { public var outputNormalized: Float { (output + 12) / 24 } }\n"
     PMX   = "struct PMXProminent: ButtonStyle { func makeBody(configuration: Configuration) -> some View { configuration.label.padding(.horizontal, 12).padding(.vertical, 6).background(LinearGradient(colors: [.pink, .purple, .orange], startPoint: .leading, endPoint: .trailing)).foregroundColor(.white).clipShape(Capsule()).opacity(configuration.isPressed ? 0.8 : 1.0) } }\n"
+    # nested refs & wheel enums; applied in one pass per file, see rewrite.RuleSet
+    RULES = RuleSet([
+        (r'ProcessorParams\.InterpMode', 'InterpMode'),
+        (r'\.app\b', '.appDecides'),
+        (r'\.steal\b', '.stealMacro'),
+    ])
+    ACTIONS = ["swift.normalize"]
     @staticmethod
-    def wants(app_logs:str)->bool: return any(k in app_logs for k in SwiftAgent.KEYS)
-    @staticmethod
-    def run():
+    def fix() -> bool:
         changed = False
         changed |= write(SRC/"SharedTypes.swift", SwiftAgent.SHARED)
         # quarantine duplicates
         pp = SRC/"ProcessorParams.swift"
         if pp.exists() and re.search(r'\b(struct|enum)\s+(ProcessorParams|InterpMode)\b', pp.read_text(errors="ignore")):
-            (SRC/"ProcessorParams_DEPRECATED.swift").write_text("// DEPRECATED\n"+pp.read_text(errors="ignore"))
-            pp.unlink(); changed = True
+            write(SRC/"ProcessorParams_DEPRECATED.swift", "// DEPRECATED\n"+pp.read_text(errors="ignore"))
+            unlink(pp); changed = True
         changed |= write(SRC/"ProcessorParams+Ext.swift", SwiftAgent.EXT)
         # normalize nested refs & wheel enums
-        for f in SRC.glob("*.swift"):
-            t = f.read_text(errors="ignore"); t2 = t
-            t2 = re.sub(r'ProcessorParams\.InterpMode', 'InterpMode', t2)
-            t2 = re.sub(r'\.app\b', '.appDecides', t2)
-            t2 = re.sub(r'\.steal\b', '.stealMacro', t2)
-            if t2 != t: f.write_text(t2); changed = True
+        rewritten = SwiftAgent.RULES.apply(sorted(SRC.glob("*.swift")), CACHE/"rewrite_manifest.json")
+        if rewritten: track(*rewritten); changed = True
         # EQ bands
         sms = SRC/"StealMojoSwift.swift"
         if sms.exists():
@@ -145,7 +217,7 @@ public struct MojoEQMatch: Codable, Equatable { public var bands: [MojoEQBand] }
             t2 = t2.replace("bands.append(.init(", "bands.append(MojoEQBand(")
             if "bands.append(MojoEQBand(" in t2 and "var bands: [MojoEQBand]" not in t2:
                 t2 = re.sub(r'(bands\.append\(MojoEQBand\()', r'var bands: [MojoEQBand] = []\n\1', t2, count=1)
-            if t2 != t: sms.write_text(t2); changed=True
+            if t2 != t: write(sms, t2); changed=True
         # macOS 11 style
         panel = SRC/"StealMojoPanel_SwiftOnly.swift"
         if panel.exists():
@@ -153,15 +225,18 @@ public struct MojoEQMatch: Codable, Equatable { public var bands: [MojoEQBand] }
             t2 = t2.replace(".buttonStyle(.borderedProminent)", ".buttonStyle(PMXProminent())")
             if ".buttonStyle(PMXProminent())" in t2 and "struct PMXProminent" not in t2:
                 t2 = t2.replace("import AVFoundation", "import AVFoundation\n\n"+SwiftAgent.PMX)
-            if t2 != t: panel.write_text(t2); changed=True
-        if changed: stage_all()
+            if t2 != t: write(panel, t2); changed=True
+        return changed
 
 class CMakeAgent:
+    """Rewrite plugin/CMakeLists.txt to the plain COPY_PLUGIN_AFTER_BUILD layout."""
+    PATTERNS = [
+        "TARGET_BUNDLE_DIR is allowed only for Bundle targets",
+        "$<TARGET_BUNDLE_DIR:MoreMojoPlugin>",
+    ]
+    ACTIONS = ["cmake.rewrite"]
     @staticmethod
-    def wants(plugin_logs:str)->bool:
-        return "TARGET_BUNDLE_DIR is allowed only for Bundle targets" in plugin_logs or "$<TARGET_BUNDLE_DIR:MoreMojoPlugin>" in plugin_logs
-    @staticmethod
-    def run():
+    def fix() -> bool:
         cmk = PLUGIN/"CMakeLists.txt"
         cmake_text = """cmake_minimum_required(VERSION 3.15 FATAL_ERROR)
 project(MoreMojoPlugin VERSION 0.1.0 LANGUAGES C CXX)
@@ -190,51 +265,349 @@ target_link_libraries(MoreMojoPlugin PRIVATE
     juce::juce_audio_utils
     juce::juce_dsp)
 """
+        old = cmk.read_text(errors="ignore") if cmk.exists() else ""
         changed = write(cmk, cmake_text)
         if changed:
-            shutil.rmtree(PLUGIN/"build", ignore_errors=True)
-            stage_all()
+            # invalidate only what the diff needs; objects and the JUCE module build are kept
+            steps = cmake_cache.plan(old, cmake_text)
+            for line in cmake_cache.apply(PLUGIN/"build", PLUGIN, steps, cmake_cache.parse(cmake_text)["target"]):
+                say(f"cmake: {line}")
+        return changed
+
+# ------------------------ Actions ------------------------
+
+def xcodegen_install():
+    sh("which xcodegen || (brew update || true; brew install xcodegen)", check=False)
+
+def xcodegen_generate():
+    # no-op if project.yml absent (workflow step already chooses first available scheme)
+    if (ROOT/"app"/"project.yml").exists():
+        sh(f"(cd {ROOT/'app'} && xcodegen generate)", check=False)
+        track(*(ROOT/"app").glob("*.xcodeproj"))
+
+# every remediation step, keyed; agents list the keys they need in ACTIONS
+ACTIONS = {
+    "xcodegen.install":  Action(xcodegen_install),
+    # generate after a source rewrite so the project sees renamed/quarantined files
+    "xcodegen.generate": Action(xcodegen_generate, deps=["xcodegen.install"], after=["swift.normalize"]),
+    "swift.normalize":   Action(lambda: SwiftAgent.fix()),
+    "cmake.rewrite":     Action(lambda: CMakeAgent.fix()),
+}
+SCHEDULER = Scheduler(ACTIONS)
+
+def run_actions(keys):
+    """Run each unique action once, independent ones concurrently; stage once at the end."""
+    with span("actions", requested=len(keys)):
+        report = SCHEDULER.run(keys)
+        stage()
+    return report
+
+# set by load_agents(): importing this module reads no drop-ins and writes no cache
+REGISTRY = MATCHER = TRIAGE_VERSION = None
+
+def load_agents(cache_dir=None):
+    """Register the built-in agents, then the drop-ins (agents.d/*.json|yaml and $SWARM_AGENTS; see registry.py).
+
+    Builds the one Matcher every log is scanned with (its plan cached under
+    ``cache_dir``, default CACHE). Only the first call does anything.
+    """
+    global REGISTRY, MATCHER, TRIAGE_VERSION
+    if REGISTRY is not None: return REGISTRY
+    reg = Registry(SOURCES, ACTIONS)
+    for cls, source in ((ProjectAgent, "app"), (SchemeAgent, "app"), (SwiftAgent, "app"), (CMakeAgent, "plugin")):
+        reg.add(from_class(cls, source))
+    reg.load(AGENTS_D, *filter(None, os.environ.get("SWARM_AGENTS", "").split(os.pathsep)),
+             warn=lambda msg: say(f"agents: {msg}"))
+    MATCHER = reg.matcher(cache_dir or CACHE)
+    # bump when triage output changes shape; patterns and sources are folded in automatically
+    TRIAGE_VERSION = f"5:{TAIL}:" + repr([MATCHER.specs, [(s, reg.sources[s], names) for s, names in reg.groups()]])
+    REGISTRY = reg
+    return reg
+
+def triage(logs:dict, settle=False) -> dict:
+    """Decisions, hint lines, excerpt lines and signature rows for one {source: LogStream} set (JSON-serializable).
+
+    With ``settle`` each source is read tail-first only until all of its agents
+    have fired: the decisions are the same, but hit counts, signatures and
+    excerpts then cover only what was read and the result lists the source
+    under "partial" (such runs are not indexed).
+    """
+    # one pass per source for all of its agents; agents whose logs were not found at all are not run
+    hits, partial = {}, []
+    for source, names in REGISTRY.groups():
+        stream = logs[source]
+        if not stream:
+            hits.update((n, []) for n in names); continue
+        with span(f"match {source} logs", files=len(stream.paths), bytes=len(stream)) as s:
+            hits.update(MATCHER.scan(stream, names, settle=settle))
+            s.update(bytes_read=stream.read, read_s=round(stream.read_seconds, 4), partial=stream.partial)
+        if stream.partial: partial.append(source)
+    hints = [f"- {source} log bytes: {len(logs[source])} ({logs[source].read} read)" if logs[source] else
+             f"- {source} logs: none found, skipped {', '.join(names)}" for source, names in REGISTRY.groups()]
+    hints += [f"- {source} logs: reading stopped once every agent had decided, {len(logs[source]) - logs[source].read} "
+              f"byte(s) unread; counts, signatures and excerpts cover only what was read" for source in partial]
+    for source, names in REGISTRY.groups():
+        more = "+" if source in partial else ""    # at least this many
+        hints += [f"- {k}: {len(hits[k])}{more} hit(s), first `{hits[k][0].pattern}` at "
+                  f"{source_name(hits[k][0].path)}+{hits[k][0].offset}" for k in names if hits[k]]
+    # one excerpt per distinct error signature to aid debugging; every signature goes to the index
+    exc_lines, sig_rows = [], []
+    with span("excerpts"):
+        for source, names in REGISTRY.groups():
+            stream, found = logs[source], [h for n in names for h in hits[n]]
+            sigs = signatures(stream, found) if found else {}
+            for sig, (who, n, text) in excerpts(stream, found, sigs=sigs).items():
+                exc_lines += ["", f"### {', '.join(sorted(who))} ({n}x): `{sig}`", "```", text, "```"]
+            sig_rows += [[a, sig, n, line] for sig, (who, _, line) in sigs.items() for a, n in who.items()]
+    return {"decisions": {n: bool(hits[n]) for n in REGISTRY.agents}, "hints": hints, "excerpts": exc_lines,
+            "signatures": sig_rows, "partial": partial}
+
+def run_time(*streams):
+    """When a run happened, as far as its logs tell: the newest log's mtime."""
+    return max((source_mtime(p) for s in streams for p in s.paths), default=time.time())
+
+def run_key(logs, memo=None):
+    """Index id of a run found only by its logs: a digest of their names and bytes, so the same
+    logs get the same id from any path, working directory or number of re-triages. ``memo``
+    (a TriageCache's) reuses the file digests already taken for its key."""
+    return "logs:" + fingerprint("run", *logs.values(), memo=memo)[:16]
+
+def sig_index():
+    """The signature index under CACHE, or None when SWARM_NO_INDEX is set."""
+    return None if os.environ.get("SWARM_NO_INDEX") else SigIndex(CACHE / "signatures.db")
+
+# ------------------------ Follow (live) triage ------------------------
+
+def follow(abort_cmd=None, abort_on=None, interval=0.5):
+    """Triage the ci_logs/ files while the build is still writing them.
+
+    Only bytes appended since the last look are matched. An agent's YES is
+    printed (and written to ci_logs/swarm_live.json) the moment it fires; its
+    NO only once the build is over, i.e. when this process gets SIGTERM or
+    SIGINT. When an agent in ``abort_on`` (default: any) fires, ``abort_cmd``
+    is run once so the build can stop early and autofix start sooner.
+    Returns once every agent has fired or after the final read.
+    """
+    routes = {}    # glob under ci_logs/ -> agents reading it
+    for source, names in REGISTRY.groups():
+        for g in REGISTRY.sources[source]:
+            head, _, pattern = g.partition("/")
+            if head == LOGS_CI.name: routes.setdefault(pattern, []).extend(names)
+    agents = [n for n in REGISTRY.agents if any(n in r for r in routes.values())]
+    tails = {}     # name under ci_logs/ -> (LogTail, agents reading it)
+
+    def discover():
+        # globs are expanded on every look: the build creates logs as it goes
+        for pattern, names in routes.items():
+            for p in LOGS_CI.glob(pattern):
+                if not p.is_file() or p.name.startswith("swarm_"): continue    # our own output
+                tail, want = tails.setdefault(p.relative_to(LOGS_CI).as_posix(), (LogTail(p), []))
+                want.extend(n for n in names if n not in want)
+
+    LOGS_CI.mkdir(parents=True, exist_ok=True)
+    watcher, stop, t0 = Watcher(LOGS_CI, interval), threading.Event(), time.perf_counter()
+    for sig in (signal.SIGTERM, signal.SIGINT): signal.signal(sig, lambda *_: stop.set())
+    say(f"[live] following {LOGS_CI} ({watcher.mode})")
+    fired, aborted = {}, False
+    try:
+        while True:
+            final, new = stop.is_set(), False
+            discover()
+            for name, (tail, names) in tails.items():
+                want = [a for a in names if a not in fired]
+                for base, b in tail.read(final) if want else ():
+                    for h in MATCHER.match_block(name, base, b, want):
+                        if h.agent in fired: continue
+                        fired[h.agent] = {"pattern": h.pattern, "at": f"{name}+{h.offset}",
+                                          "seconds": round(time.perf_counter() - t0, 1)}
+                        say(f"[live +{fired[h.agent]['seconds']}s] {h.agent}: YES (`{h.pattern}` at {name}+{h.offset})")
+                        new = True
+            if abort_cmd and not aborted and any(a in fired for a in (abort_on or agents)):
+                say("[live] aborting the build"); sh(abort_cmd, check=False); aborted = True
+            done = final or len(fired) == len(agents)
+            if new or done:
+                state = {"final": done, "aborted": aborted,
+                         "decisions": {a: dict(fired[a], fired=True) if a in fired else {"fired": False} for a in agents}}
+                tmp = LOGS_CI/"swarm_live.json.tmp"    # readers never see a half-written file
+                tmp.write_text(json.dumps(state, indent=1)); os.replace(tmp, LOGS_CI/"swarm_live.json")
+            if done: break
+            watcher.wait()
+    finally:
+        watcher.close()
+    for a in agents:
+        if a not in fired: say(f"[live] {a}: no")
+    return fired
+
+# ------------------------ Batch (historical) triage ------------------------
+
+def run_logs(run):
+    """{source: LogStream} of one past run.
+
+    ``run`` is a directory laid out like the checkout (ci_logs/,
+    failed_artifacts/), a directory of downloaded artifacts (as left by
+    download_artifacts.py), or a single artifact zip.
+    """
+    run = pathlib.Path(run)
+    if not run.exists(): raise FileNotFoundError(f"no such run: {run}")
+    if run.is_file():
+        if not zipfile.is_zipfile(run): raise zipfile.BadZipFile(f"not an artifact zip: {run}")
+        root = dl = run; zips = [run]
+    elif (run/LOGS_CI.name).is_dir() or (run/LOGS_DL.name).is_dir():
+        root, dl = run, run/LOGS_DL.name; zips = sorted(dl.glob("*.zip"))
+    else:
+        root = dl = run; zips = sorted(run.glob("*.zip"))
+    return read_sources(root=root, dl=dl, zips=zips)
+
+def triage_run(run):
+    """Batch worker: dry-run triage of one past run. Reads logs only; no agent fixes, no git."""
+    t = time.perf_counter()
+    try:
+        logs = run_logs(run)
+        result = triage(logs)
+        at = run_time(*logs.values())
+    except (OSError, zipfile.BadZipFile) as e:
+        return {"run": str(run), "error": str(e)}
+    fired = [a for n, a in REGISTRY.agents.items() if result["decisions"][n]]
+    return {"run": str(run), "key": run_key(logs),
+            "bytes": sum(map(len, logs.values())), "read": sum(s.read for s in logs.values()),
+            "seconds": time.perf_counter() - t,
+            "fired": [a.name for a in fired],
+            "actions": sorted(SCHEDULER.plan([k for a in fired for k in a.actions])[0]),
+            "at": at, "signatures": result["signatures"]}
+
+def batch_report(results, wall):
+    """Markdown: per-agent fire rate, co-occurrence, would-run actions and per-run cost."""
+    ok = [r for r in results if "error" not in r]
+    agents = list(REGISTRY.agents)
+    fires = collections.Counter(a for r in ok for a in r["fired"])
+    pairs = collections.Counter(p for r in ok for p in itertools.combinations(sorted(r["fired"]), 2))
+    total = sum(r["bytes"] for r in ok)
+    out = ["# Swarm batch triage",
+           f"- runs: {len(results)} ({len(results) - len(ok)} unreadable), none fired: {sum(not r['fired'] for r in ok)}",
+           f"- log bytes: {total} ({sum(r['read'] for r in ok)} read), wall {wall:.1f}s ({total / 1e6 / wall if wall else 0:.1f} MB/s), "
+           f"{sum(r['seconds'] for r in ok):.1f}s summed over runs",
+           "", "## Agents", "| agent | runs | share |", "|---|---:|---:|"]
+    out += [f"| {a} | {fires[a]} | {fires[a] / len(ok):.0%} |" if ok else f"| {a} | 0 | - |" for a in agents]
+    out += ["", "## Co-occurrence (runs where both fired)", "| | " + " | ".join(agents) + " |",
+            "|---|" + "---:|" * len(agents)]
+    for a in agents:
+        out.append(f"| {a} | " + " | ".join(str(fires[a] if a == b else pairs[tuple(sorted((a, b)))]) for b in agents) + " |")
+    acts = collections.Counter(k for r in ok for k in r["actions"])
+    out += ["", "## Actions that would run"] + [f"- {k}: {n} run(s)" for k, n in acts.most_common()]
+    out += ["", "## Runs", "| run | bytes | read | seconds | fired |", "|---|---:|---:|---:|---|"]
+    for r in results:
+        out.append(f"| {r['run']} | error: {r['error']} | | | |" if "error" in r else
+                   f"| {r['run']} | {r['bytes']} | {r['read']} | {r['seconds']:.2f} | {', '.join(r['fired']) or '-'} |")
+    return out
+
+def batch(runs, jobs=None, out=None):
+    """Triage ``runs`` across a process pool and print (and optionally write) the aggregate report."""
+    t = time.perf_counter()
+    with ProcessPoolExecutor(jobs, initializer=load_agents) as ex:
+        results = list(ex.map(triage_run, map(str, runs)))
+    index = sig_index()
+    if index:
+        # backfill: each past run's signatures are recorded under its logs' digest, not the path it was given as
+        new = sum(index.record(r["key"], r["at"], r["signatures"]) for r in results if "error" not in r)
+        print(f"signature index: {new} new signature(s), {index.runs()} run(s) indexed"); index.close()
+    report = "\n".join(batch_report(results, time.perf_counter() - t))
+    if out: pathlib.Path(out).write_text(report + "\n")
+    print(report)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Triage CI logs and run the matching fix agents.")
+    ap.add_argument("--zip", action="append", default=[], metavar="ARTIFACT.zip",
+                    help="read logs straight out of an artifact zip named after its artifact "
+                         "(app-build-logs.zip, plugin-build-logs.zip); failed_artifacts/*.zip is always searched")
+    ap.add_argument("--batch", nargs="+", metavar="RUN",
+                    help="dry-run triage of past runs (run directories or artifact zips) in parallel "
+                         "and report how often each agent fires; nothing in the checkout is written or staged, "
+                         "their signatures are added to the index")
+    ap.add_argument("-j", "--jobs", type=int, help="worker processes for --batch (default: CPU count)")
+    ap.add_argument("--out", metavar="REPORT.md", help="also write the --batch report here")
+    ap.add_argument("--query", nargs="?", const="", metavar="TEXT",
+                    help="look up failure signatures (full-text match; all if TEXT is omitted) in the index: "
+                         "when each first appeared and how many runs hit it")
+    ap.add_argument("--limit", type=int, default=20, help="rows for --query")
+    ap.add_argument("--follow", action="store_true",
+                    help="triage ci_logs/ live while the build runs; stop it with SIGTERM when the build ends")
+    ap.add_argument("--abort-cmd", default=os.environ.get("SWARM_ABORT_CMD") or None,
+                    help="with --follow: shell command that stops the build, run once an --abort-on agent fires "
+                         "(default: $SWARM_ABORT_CMD)")
+    ap.add_argument("--abort-on", action="append", metavar="AGENT", help="agents that abort the build (default: any)")
+    ap.add_argument("--list-agents", action="store_true",
+                    help="show the registered agents (built-in and drop-in), their log sources and actions")
+    ap.add_argument("--run-id", default=None,
+                    help="id to record this run's signatures under (default: $GITHUB_RUN_ID.$GITHUB_RUN_ATTEMPT, "
+                         "else a digest of the logs, so re-triaging the same logs locally counts once)")
+    args = ap.parse_args(argv)
+    ARTIFACT_ZIPS[:] = args.zip
+    load_agents()
+    if args.list_agents:
+        for a in REGISTRY.agents.values():
+            print(f"{a.name}: {a.doc or '(no description)'}\n"
+                  f"  source: {a.source}; {len(a.patterns)} pattern(s); actions: {', '.join(a.actions) or 'none (report only)'}")
+        sys.exit(0)
+    if args.query is not None:
+        index = SigIndex(CACHE / "signatures.db")
+        print("\n".join(sig_report(index.query(args.query, args.limit), index.runs())))
+        sys.exit(0)
+    if args.batch:
+        batch(args.batch, args.jobs, args.out)
+        sys.exit(0)
+    if args.follow:
+        follow(args.abort_cmd, args.abort_on)
+        sys.exit(0)
 
-def main():
     # read logs from artifacts and inline
-    app_log = read_globs("ci_logs/xcodebuild_app_stdout.log",
-                         "ci_logs/app_preflight.txt",
-                         "failed_artifacts/app-build-logs/**/xcodebuild_app_stdout.log",
-                         "failed_artifacts/app-build-logs/**/app_preflight.txt",
-                         "failed_artifacts/app-build-logs/**/*.log")
-    plugin_log = read_globs("ci_logs/cmake_configure.log",
-                            "ci_logs/cmake_build.log",
-                            "failed_artifacts/plugin-build-logs/**/cmake_configure.log",
-                            "failed_artifacts/plugin-build-logs/**/cmake_build.log",
-                            "failed_artifacts/plugin-build-logs/**/CMake*.log")
-
-    # decisions
-    decisions = {
-        "ProjectAgent": ProjectAgent.wants(app_log),
-        "SchemeAgent":  SchemeAgent.wants(app_log),
-        "SwiftAgent":   SwiftAgent.wants(app_log),
-        "CMakeAgent":   CMakeAgent.wants(plugin_log),
-    }
+    with span("glob logs") as s:
+        logs = read_sources()
+        s["files"] = sum(len(stream.paths) for stream in logs.values())
+
+    # decisions: served from the triage cache when this exact log set was seen before
+    cache = None if os.environ.get("SWARM_NO_CACHE") else TriageCache(CACHE, int(os.environ.get("SWARM_CACHE_MAX_MB", "64")) << 20)
+    with span("triage cache lookup") as s:
+        key = cache.fingerprint(f"{TRIAGE_VERSION}:{EARLY_STOP}", *logs.values()) if cache else None
+        result = cache.get(key) if cache else None
+        s["result"] = "off" if not cache else "hit" if result is not None else "miss"
+    if result is None:
+        result = triage(logs, settle=EARLY_STOP)
+        if cache: cache.put(key, result)
+        cached = "miss" if cache else "off"
+    else:
+        cached = "hit"
+    decisions = result["decisions"]
     summary = ["# Swarm decisions"]
     for k,v in decisions.items(): summary.append(f"- {k}: {'YES' if v else 'no'}")
-    summary += ["", "## Hints",
-                f"- app log bytes: {len(app_log)}",
-                f"- plugin log bytes: {len(plugin_log)}", ""]
-
-    acted = False
-    if decisions["ProjectAgent"]: ProjectAgent.run(); summary.append("- Ran ProjectAgent"); acted=True
-    if decisions["SchemeAgent"]:  SchemeAgent.run();  summary.append("- Ran SchemeAgent");  acted=True
-    if decisions["SwiftAgent"]:   SwiftAgent.run();   summary.append("- Ran SwiftAgent");   acted=True
-    if decisions["CMakeAgent"]:   CMakeAgent.run();   summary.append("- Ran CMakeAgent");   acted=True
-
-    # small excerpt to aid debugging
-    if decisions["ProjectAgent"] or decisions["SchemeAgent"]:
-        exc = first_match_excerpt(app_log, r"(future Xcode project file format|Scheme .+ not currently configured|No shared schemes found|xcodebuild: error:)")
-        if exc:
-            summary += ["", "## Excerpt", "```", exc, "```"]
+    summary += ["", "## Hints"] + result["hints"] + [f"- triage cache: {cached}" + (f" ({key[:12]})" if key else "")]
+    index = None if result["partial"] else sig_index()
+    if result["partial"]:
+        summary.append("- signatures: not indexed (logs read only until every agent decided; "
+                       "SWARM_FULL_SCAN=1 or --batch indexes them)")
+    if index:
+        run_id = args.run_id or (f"{os.environ['GITHUB_RUN_ID']}.{os.environ.get('GITHUB_RUN_ATTEMPT', '1')}"
+                                 if os.environ.get("GITHUB_RUN_ID") else run_key(logs, cache and cache.memo))
+        with span("signature index", rows=len(result["signatures"])):
+            new = index.record(run_id, run_time(*logs.values()), result["signatures"])
+        summary.append(f"- signatures: {len({r[1] for r in result['signatures']})} ({new} never seen before), "
+                       f"{index.runs()} run(s) indexed")
+        index.close()
+    summary.append("")
+
+    # dispatch: every agent that fired, through the actions it declared (report-only agents have none)
+    fired = [a for n, a in REGISTRY.agents.items() if decisions.get(n)]
+    for a in fired:
+        say(f"{a.name}: {a.doc}"); summary.append(f"- Ran {a.name}")
+    acted = bool(fired)
+    keys = [k for a in fired for k in a.actions]
+    if keys: summary += run_actions(keys).lines()
+    summary += [f"- {e}" for e in STAGE_ERRORS]
+
+    if result["excerpts"]: summary += ["", "## Excerpts"] + result["excerpts"]
 
     summary.append(f"\nchanges_staged = {'YES' if has_changes() else 'no'}; actions_ran = {'YES' if acted else 'no'}")
-    write(SUMMARY, "\n".join(summary))
+    write(SUMMARY, "\n".join(summary), tracked=False)
+    publish(TRACE, title="Swarm timing")
     print("\n".join(summary))
     sys.exit(0)
 
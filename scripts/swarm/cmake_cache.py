@@ -0,0 +1,126 @@
+"""Targeted invalidation of a CMake build tree after CMakeLists.txt changes.
+
+CMake already re-runs configure when CMakeLists.txt is newer than the build
+system, and the generator rebuilds only objects whose flags or inputs
+changed. What it cannot see by itself is a stale cache entry (a ``set(...
+CACHE)`` default that changed but is not FORCEd), a changed toolchain-level
+setup (project languages, cmake_minimum_required, find_package), or build
+products of formats and sources that no longer exist. plan() diffs the old
+and new CMakeLists for exactly those cases and apply() fixes them in place,
+so compiled objects and the JUCE module build survive a rewrite.
+
+The parser understands the flat command style of plugin/CMakeLists.txt
+(no nested parentheses inside arguments), which is all CMakeAgent writes.
+"""
+import pathlib, re, shutil
+
+CMD = re.compile(r"^\s*(\w+)\s*\(([^)]*)\)", re.M)
+ARG = re.compile(r'"(?:[^"\\]|\\.)*"|[^\s"]+')
+CONFIGURE = ("cmake_minimum_required", "project", "find_package")   # changes here need a fresh configure
+KEYWORDS = ("FORMATS", "VERSION", "DESCRIPTION")    # juce_add_plugin keywords without an underscore
+COMPILED = (".c", ".cc", ".cpp", ".cxx", ".m", ".mm")   # sources that have an object file; headers do not
+
+def _args(s):
+    return [a[1:-1] if a.startswith('"') else a for a in ARG.findall(re.sub(r"#[^\n]*", "", s))]
+
+def _keywords(args):
+    """juce_add_plugin-style ``KEY value...`` arguments as {KEY: [values]}."""
+    out, key = {}, None
+    for a in args:
+        if a in KEYWORDS or re.fullmatch(r"[A-Z][A-Z0-9]*_[A-Z0-9_]+", a): key = a; out[key] = []
+        elif key: out[key].append(a)
+    return out
+
+def parse(text):
+    """The facets of a CMakeLists.txt that decide what a change invalidates."""
+    f = {"configure": [], "cache": {}, "target": None, "plugin": {}, "formats": set(),
+         "sources": set(), "definitions": set(), "links": set(), "other": []}
+    for m in CMD.finditer(text):
+        name, args = m.group(1).lower(), _args(m.group(2))
+        if name in CONFIGURE:
+            f["configure"].append((name, args))
+        elif name == "set" and "CACHE" in args:
+            f["cache"][args[0]] = (args[1:args.index("CACHE")], "FORCE" in args)
+        elif name == "juce_add_plugin":
+            f["target"], f["plugin"] = args[0], _keywords(args[1:])
+        elif name == "target_sources":
+            f["sources"].update(a for a in args[1:] if a not in ("PRIVATE", "PUBLIC", "INTERFACE"))
+        elif name == "target_compile_definitions":
+            f["definitions"].update(a for a in args[1:] if a not in ("PRIVATE", "PUBLIC", "INTERFACE"))
+        elif name == "target_link_libraries":
+            f["links"].update(a for a in args[1:] if a not in ("PRIVATE", "PUBLIC", "INTERFACE"))
+        else:
+            f["other"].append((name, args))
+    # FORMATS is usually ${MOJO_FORMATS}; resolve it against the cache defaults
+    for v in f["plugin"].get("FORMATS", []):
+        var = re.fullmatch(r"\$\{(\w+)\}", v)
+        vals = f["cache"].get(var.group(1), ([],))[0] if var else [v]
+        f["formats"].update(x for val in vals for x in val.split(";") if x)
+    return f
+
+def plan(old_text, new_text):
+    """[(step, detail)] needed to reuse a build tree configured from ``old_text``.
+
+    Steps: "reconfigure" (drop the cache and compiler checks, keep objects),
+    "uncache" (drop one cache entry), "drop-format" (remove a format target's
+    products), "drop-source" (remove a deleted source's objects) and "note"
+    (changes the next configure/build handles by itself).
+    """
+    old, new = parse(old_text), parse(new_text)
+    steps = []
+    if old["configure"] != new["configure"] or old["target"] != new["target"]:
+        steps.append(("reconfigure", "project/toolchain setup changed"))
+    for var in sorted(set(old["cache"]) | set(new["cache"])):
+        if old["cache"].get(var) != new["cache"].get(var):
+            steps.append(("uncache", var))
+    steps += [("drop-format", fmt) for fmt in sorted(old["formats"] - new["formats"])]
+    steps += [("drop-source", src) for src in sorted(old["sources"] - new["sources"])]
+    for facet in ("plugin", "definitions", "links", "other"):
+        if old[facet] != new[facet]: steps.append(("note", f"{facet} changed; rebuilt where needed"))
+    if new["sources"] - old["sources"]:
+        steps.append(("note", f"{len(new['sources'] - old['sources'])} source(s) added"))
+    return steps
+
+def cached_home(build):
+    """CMAKE_HOME_DIRECTORY recorded in ``build``/CMakeCache.txt, or None."""
+    try: m = re.search(r"^CMAKE_HOME_DIRECTORY:INTERNAL=(.*)$", (build/"CMakeCache.txt").read_text(errors="ignore"), re.M)
+    except OSError: return None
+    return m.group(1).strip() if m else None
+
+def apply(build, source, steps, target=None):
+    """Carry out plan() ``steps`` on the build tree ``build``; returns report lines.
+
+    A tree that was configured from another source directory cannot be
+    reused and is removed whole.
+    """
+    build, source = pathlib.Path(build), pathlib.Path(source)
+    if not build.exists(): return []
+    home = cached_home(build)
+    if home is None or pathlib.Path(home).resolve() != source.resolve():
+        shutil.rmtree(build, ignore_errors=True)
+        return [f"removed {build} (not configured from {source})"]
+    out = []
+    cache = build/"CMakeCache.txt"
+    for step, detail in steps:
+        if step == "reconfigure":
+            cache.unlink()
+            for d in (build/"CMakeFiles").glob("[0-9]*"): shutil.rmtree(d, ignore_errors=True)    # compiler checks
+            out.append(f"reconfigure: {detail}; dropped CMakeCache.txt and compiler checks, kept objects")
+        elif step == "uncache" and cache.exists():
+            lines = cache.read_text(errors="ignore").splitlines(keepends=True)
+            keep = [l for l in lines if not re.match(rf"{re.escape(detail)}(?:-ADVANCED)?:", l)]
+            if len(keep) != len(lines):
+                cache.write_text("".join(keep)); out.append(f"uncached {detail}")
+        elif step == "drop-format" and target:
+            for p in [*build.rglob(f"{target}_{detail}.dir"), *build.rglob(f"{target}_{detail}.build")]:
+                shutil.rmtree(p, ignore_errors=True); out.append(f"dropped {p.relative_to(build)}")
+        elif step == "drop-source" and target and pathlib.PurePosixPath(detail).suffix in COMPILED:
+            # only the target's own object dirs: <target>.dir (Make/Ninja: Foo.cpp.o), <target>.build (Xcode: Foo.o)
+            name = pathlib.PurePosixPath(detail)
+            objs = {o for d in [*build.rglob(f"{target}.dir"), *build.rglob(f"{target}.build")]
+                    for o in [*d.rglob(f"{name.name}.o"), *d.rglob(f"{name.stem}.o")]}
+            for p in sorted(objs):
+                p.unlink(missing_ok=True); out.append(f"dropped {p.relative_to(build)}")
+        elif step == "note":
+            out.append(detail)
+    return out
@@ -0,0 +1,43 @@
+"""Wake up when files in a directory change.
+
+Uses inotify through ctypes on Linux; everywhere else (macOS runners, or
+SWARM_FOLLOW_POLL set) it falls back to sleeping for the poll interval, and
+the caller simply re-checks its files.
+"""
+import ctypes, ctypes.util, os, select, struct, sys, time
+
+IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE = 0x2, 0x8, 0x80, 0x100
+IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+
+class Watcher:
+    def __init__(self, directory, interval=0.5):
+        self.interval, self.fd = interval, None
+        if sys.platform.startswith("linux") and not os.environ.get("SWARM_FOLLOW_POLL"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+                fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+                if fd >= 0 and libc.inotify_add_watch(fd, os.fsencode(str(directory)),
+                                                      IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) >= 0:
+                    self.fd = fd
+                elif fd >= 0:
+                    os.close(fd)
+            except (OSError, AttributeError):
+                pass
+
+    @property
+    def mode(self): return "inotify" if self.fd is not None else "polling"
+
+    def wait(self, timeout=None):
+        """Block until something in the directory changed or ``timeout`` (default: the poll interval) passed."""
+        timeout = self.interval if timeout is None else timeout
+        if self.fd is None:
+            time.sleep(timeout)
+            return
+        if select.select([self.fd], [], [], timeout)[0]:
+            try:
+                while os.read(self.fd, 64 * struct.calcsize("iIII")): pass    # drain; only "something changed" matters
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        if self.fd is not None: os.close(self.fd); self.fd = None
@@ -0,0 +1,575 @@
+"""Streaming log ingestion and pattern matching for agent_hub.
+
+Logs are never loaded whole: each file is read in CHUNK-sized blocks that are
+cut on newline boundaries, so any single-line pattern is seen intact by the
+matchers and peak memory stays at a couple of blocks regardless of log size.
+
+Build tools print the decisive errors last, so plain files can also be read
+tail-first (iter_blocks_reverse), letting Matcher.scan(settle=True) stop as
+soon as every agent has fired without touching the head of a huge log.
+"""
+import bisect, collections, contextlib, datetime, functools, itertools, os, posixpath, re, time, zipfile
+from array import array
+from globs import glob_rx       # scripts/globs.py, shared with artifact_store
+
+CHUNK   = 1 << 20      # bytes per block handed to the matchers
+OVERLAP = 4096         # carried over when a single line exceeds CHUNK
+MAX_HITS = 1000        # per pattern; keeps a log full of one error from growing memory
+MAX_EXCERPTS = 12      # distinct signatures quoted in the summary
+CONTEXT = 20           # lines either side of a hit in its excerpt
+PREFILTER_MIN = 72     # from this many patterns on, one token pass per block beats a pass per pattern
+                       # (bench.py --patterns: crossover at 64-72 on the 10 MB corpus)
+CONFIRM_LINES = 64     # with the prefilter, a key word on more lines than this is confirmed block-wide
+                       # (flat from 8 to 128, per-line confirmation costs 1.3-2.7x at no limit)
+
+def _enc(s): return s.encode("utf-8") if isinstance(s, str) else s
+
+def iter_blocks(fh, chunk=CHUNK, pos=0):
+    """Yield (offset, block) line-aligned byte blocks from a binary file object at ``pos``."""
+    tail, fresh = b"", False    # fresh: tail holds bytes not yielded yet
+    while True:
+        data = fh.read(chunk)
+        if not data: break
+        buf = tail + data if tail else data
+        cut = buf.rfind(b"\n") + 1
+        if cut == 0:
+            # one huge line: hand it over anyway, keep an overlap for matches across the cut
+            yield pos, buf
+            tail, fresh = buf[-OVERLAP:], False; pos += len(buf) - len(tail)
+            continue
+        yield pos, buf[:cut]
+        tail, fresh = buf[cut:], True; pos += cut
+    if fresh and tail: yield pos, tail
+
+def iter_blocks_reverse(fh, size, chunk=CHUNK, stop=0):
+    """Yield (offset, block) line-aligned blocks of a seekable file, last block first.
+
+    Reading stops at byte ``stop`` (rounded up to the next line start), so a
+    tail budget never yields a partial first line.
+    """
+    end, head = size, b""    # head: start of the line cut off the block after this one
+    while end > stop:
+        start = max(stop, end - chunk)
+        fh.seek(start)
+        data = fh.read(end - start) + head
+        if start == 0:
+            yield 0, data
+            return
+        cut = data.find(b"\n") + 1
+        if cut == 0:
+            # one huge line: hand it over anyway, keep an overlap for matches across the cut
+            yield start, data
+            head, end = data[:OVERLAP], start
+            continue
+        if data[cut:]: yield start + cut, data[cut:]
+        head, end = data[:cut], start
+
+def _lines_before(data, end, n):
+    """(start, count): where the last ``n`` complete lines before ``end`` begin, and how
+    many there are; start is 0 when there are fewer (a partial line there is kept)."""
+    pos, found = end, 0
+    while True:
+        nl = data.rfind(b"\n", 0, pos)
+        if nl < 0: return 0, found
+        if found == n: return nl + 1, found
+        pos, found = nl, found + 1
+
+def _lines_after(data, start, n):
+    """(end, count): where ``n`` complete lines from ``start`` end, and how many there
+    are; end is the end of ``data`` when there are fewer (a partial line there is kept)."""
+    pos, found = start, 0
+    while found < n:
+        nl = data.find(b"\n", pos)
+        if nl < 0: return len(data), found
+        pos, found = nl + 1, found + 1
+    return pos, found
+
+class LogTail:
+    """Incremental reader for a log that is still being written."""
+    def __init__(self, path):
+        self.path, self.pos, self.id = path, 0, None
+
+    def read(self, final=False):
+        """Yield (offset, block) for the complete lines appended since the last call.
+
+        A trailing unfinished line is held back until it is complete (or
+        ``final``); a log that was truncated or replaced is read again from
+        the start.
+        """
+        try: st = os.stat(self.path)
+        except OSError: return
+        if (st.st_dev, st.st_ino) != self.id or st.st_size < self.pos:
+            self.id, self.pos = (st.st_dev, st.st_ino), 0
+        if st.st_size == self.pos: return
+        with open(self.path, "rb") as fh:
+            fh.seek(self.pos)
+            blocks = iter_blocks(fh, pos=self.pos)
+            cur = next(blocks, None)
+            for nxt in itertools.chain(blocks, [None]):
+                off, b = cur
+                if nxt is None and not b.endswith(b"\n") and not final: return
+                self.pos = nxt[0] if nxt else off + len(b)
+                yield off, b
+                cur = nxt
+
+# ------------------------ Sources ------------------------
+
+class ZipMember(collections.namedtuple("ZipMember", "zip member")):
+    """A log inside an artifact zip, streamed in place instead of extracted."""
+    @property
+    def name(self): return posixpath.basename(self.member)
+    def __str__(self): return f"{self.zip}!{self.member}"
+
+def open_source(src):
+    if isinstance(src, ZipMember):
+        # the member keeps the archive's file handle alive after the ZipFile is closed
+        with zipfile.ZipFile(src.zip) as zf: return zf.open(src.member)
+    return open(src, "rb")
+
+def zip_info(src):
+    """The ``zipfile.ZipInfo`` of a ZipMember (size, CRC32) without opening the member."""
+    return _zip_infos(src.zip)[src.member]
+
+def source_size(src):
+    if isinstance(src, ZipMember): return zip_info(src).file_size
+    return os.path.getsize(src)
+
+def unique_sources(paths):
+    """``paths`` without repeats of the same underlying file (by device and inode)."""
+    seen = set()
+    for p in paths:
+        try:
+            st = os.stat(p.zip if isinstance(p, ZipMember) else p)
+            key = (st.st_dev, st.st_ino, p.member if isinstance(p, ZipMember) else None)
+        except OSError:
+            key = p
+        if key not in seen:
+            seen.add(key)
+            yield p
+
+def source_name(src):
+    return src.name if isinstance(src, ZipMember) else os.path.basename(src)
+
+def source_mtime(src):
+    """When the log was last written; for a zip member, the time recorded in the archive."""
+    if isinstance(src, ZipMember):
+        return datetime.datetime(*zip_info(src).date_time).timestamp()
+    return os.path.getmtime(src)
+
+@functools.lru_cache(maxsize=None)
+def _zip_infos(path):
+    with zipfile.ZipFile(path) as zf:
+        return {i.filename: i for i in zf.infolist() if not i.is_dir()}
+
+def zip_members(zip_path, pattern):
+    """Members of ``zip_path`` matching a pathlib-style glob (``**/`` spans directories)."""
+    try: infos = _zip_infos(str(zip_path))
+    except (OSError, zipfile.BadZipFile): return []
+    rx = glob_rx(pattern)
+    return [ZipMember(str(zip_path), n) for n in sorted(infos) if rx.match(n)]
+
+class LineIndex:
+    """Byte offsets of every newline in one file, kept in a compact array('Q').
+
+    ``lo`` is the first byte the index covers (0 once the file was read from
+    the start) and ``hi`` the end of coverage (None: EOF), so lookups never
+    assume lines that were not seen. A tail-first or stopped scan covers only
+    part of a file; line numbers are then relative to ``lo``.
+
+    Blocks are appended to the one array as they are read, so a file's index
+    costs 8 bytes per line and nothing more is copied.
+    """
+    def __init__(self):
+        self.nl, self.lo, self.hi = array("Q"), 0, None
+
+    def add(self, base, block, descending=False):
+        """Append the newlines of ``block``, read at byte ``base``.
+
+        A tail-first read adds each block ``descending``; close() then puts the
+        whole index back in file order.
+        """
+        n = len(self.nl)
+        # cumulative line lengths, computed in C: base-1, nl0, nl1, ...
+        parts = block.split(b"\n")
+        it = itertools.accumulate(map((1).__add__, map(len, parts[:-1])), initial=base - 1)
+        next(it); self.nl.extend(it)
+        if descending: self.nl[n:] = self.nl[n:][::-1]    # one block's worth
+
+    def close(self, lo, hi=None, descending=False):
+        """Mark the index as covering [lo, hi); reversed in place after a tail-first read."""
+        if descending: self.nl.reverse()
+        self.lo, self.hi = lo, hi
+
+    def line_of(self, offset):
+        """0-based number of the line containing ``offset``."""
+        return bisect.bisect_left(self.nl, offset)
+
+    def span(self, first, last):
+        """Byte range [start, end) of lines ``first``..``last``; end is None for EOF."""
+        start = self.nl[first - 1] + 1 if first > 0 else self.lo
+        end = self.nl[last] if last < len(self.nl) else self.hi
+        return start, end
+
+class LogStream:
+    """Lazy, read-only view over a set of log files.
+
+    Matcher.scan reads it block by block; ``len(logs)`` is the total size in
+    bytes without reading anything. An indexed pass (``chunks(index=True)``,
+    done by Matcher.scan) also records a LineIndex per file, and Matcher.scan
+    hands its hits to capture() while their block is in memory, so lines and
+    excerpts come without reading the log (or inflating a zip member) again.
+
+    The same file reached through several paths (overlapping globs, links) is
+    read once. ``tail`` caps how many bytes are read from the end of each file
+    (None: all); ``read`` counts the bytes actually read and ``read_seconds``
+    the time spent reading (and, for zip members, inflating) them. ``partial``
+    is true when the last pass was stopped before the end.
+    """
+    def __init__(self, paths=(), tail=None):
+        self.paths = list(unique_sources(paths))
+        self.tail, self.read, self.read_seconds = tail, 0, 0.0
+        self.index, self.partial = {}, False
+        self.lines, self.contexts, self._seen = {}, {}, set()    # (path, offset) -> text; signatures excerpted
+        self._carry, self._pending, self._forward = b"", [], True
+
+    def __len__(self):
+        n = 0
+        for p in self.paths:
+            try: n += source_size(p)
+            except (OSError, KeyError): pass
+        return n
+
+    def __bool__(self): return bool(self.paths)
+
+    def chunks(self, index=False, reverse=False):
+        """Yield (path, offset, block) for every block of every file.
+
+        With ``reverse``, plain files are read from the end backwards (zip
+        members cannot seek backwards cheaply and are read forwards). A
+        consumer may stop early; the index then covers what was read.
+        """
+        self.partial = True
+        for p in self.paths:
+            try:
+                size = source_size(p); fh = open_source(p)
+            except (OSError, KeyError, zipfile.BadZipFile): continue
+            stop = max(0, size - self.tail) if self.tail is not None else 0
+            backwards = reverse and not isinstance(p, ZipMember)
+            idx, lo, hi, end = LineIndex() if index else None, None, None, 0
+            self._carry, self._pending, self._forward = b"", [], not backwards
+            with fh:
+                if backwards:
+                    blocks = iter_blocks_reverse(fh, size, stop=stop)
+                elif stop:
+                    fh.seek(stop)
+                    stop += len(fh.readline())    # start at a line boundary
+                    blocks = iter_blocks(fh, pos=stop)
+                else:
+                    blocks = iter_blocks(fh)
+                try:
+                    while True:
+                        t = time.perf_counter()
+                        nxt = next(blocks, None)
+                        self.read_seconds += time.perf_counter() - t
+                        if nxt is None: break
+                        pos, b = nxt
+                        self.read += len(b)
+                        if index:
+                            idx.add(pos, b, descending=backwards)
+                            lo = pos if lo is None or pos < lo else lo
+                            hi = None if backwards else pos + len(b)
+                        if self._forward:
+                            over = max(0, end - pos)    # blocks of a huge line overlap
+                            if over: self._carry = self._carry[:max(0, len(self._carry) - over)]
+                            if self._pending: self._complete(b[over:])
+                        yield p, pos, b
+                        if self._forward:
+                            data = self._carry + b
+                            self._carry = data[_lines_before(data, len(data), CONTEXT)[0]:][-2 * CHUNK:]
+                            end = pos + len(b)
+                    hi = None
+                finally:
+                    if index and lo is not None:
+                        idx.close(lo, hi, descending=backwards); self.index[p] = idx
+                    for key, text, _ in self._pending: self.contexts[key] = text.decode("utf-8", errors="ignore").rstrip("\n")
+                    self._pending = []
+        self.partial = False
+
+    def capture(self, path, base, block, offsets):
+        """Keep the lines holding the hits at ``offsets`` of ``block`` (read from ``path``
+        at ``base``), and on forward reads the excerpts of the first hits of the first
+        MAX_EXCERPTS signatures: what signatures() and excerpts() will ask for.
+        """
+        for off in sorted(offsets):
+            at = off - base
+            ls, le = block.rfind(b"\n", 0, at) + 1, block.find(b"\n", at)
+            if le < 0: le = len(block)
+            line = block[ls:le].decode("utf-8", errors="ignore").rstrip("\r")
+            self.lines[(path, off)] = line
+            sig = signature(line)
+            if not self._forward or sig in self._seen or len(self._seen) >= MAX_EXCERPTS: continue
+            self._seen.add(sig)
+            start, found = _lines_before(block, ls, CONTEXT)
+            head = self._carry[_lines_before(self._carry, len(self._carry), CONTEXT - found)[0]:] if found < CONTEXT else b""
+            if le < len(block):
+                end, got = _lines_after(block, le + 1, CONTEXT); need = CONTEXT - got
+            else:
+                end, need = le, CONTEXT + 1    # the hit's own line goes on in the next block
+            self._pending.append([(path, off), head + block[start:end], need])
+        self._complete(b"")
+
+    def _complete(self, block):
+        """Extend pending excerpts with the first lines of ``block``; store the finished ones."""
+        for item in self._pending:
+            if item[2]:
+                end, got = _lines_after(block, 0, item[2])
+                item[1] += block[:end]; item[2] -= got
+        for key, text, _ in (i for i in self._pending if not i[2]):
+            self.contexts[key] = text.decode("utf-8", errors="ignore").rstrip("\n")
+        self._pending = [i for i in self._pending if i[2]]
+
+    def _read(self, path, first, last):
+        # only for what capture() did not keep; a zip member is inflated again up to ``start``
+        start, end = self.index[path].span(first, last)
+        with open_source(path) as fh:
+            fh.seek(start)
+            data = fh.read() if end is None else fh.read(end - start)
+        return data.decode("utf-8", errors="ignore")
+
+    def line_at(self, hit):
+        """(1-based line number or None if not known, text) of the line holding ``hit``."""
+        idx = self.index[hit.path]
+        n = idx.line_of(hit.offset)
+        text = self.lines.get((hit.path, hit.offset))
+        return (n + 1 if idx.lo == 0 else None), self._read(hit.path, n, n).rstrip("\r\n") if text is None else text
+
+    def excerpt_at(self, hit, lines=CONTEXT):
+        """``lines`` of context either side of ``hit``; reads only those lines, if any."""
+        text = self.contexts.get((hit.path, hit.offset)) if lines == CONTEXT else None
+        if text is not None: return text
+        n = self.index[hit.path].line_of(hit.offset)
+        return self._read(hit.path, max(0, n - lines), n + lines).rstrip("\n")
+
+# paths, line:col suffixes, hashes/addresses and bare numbers vary between runs
+_SIG_SUBS = [
+    (re.compile(r"(?:[A-Za-z]:)?(?:[\w.\-~]*/)+[\w.\-+@]+"), "<path>"),
+    (re.compile(r"(?::\d+)+(?=:|\b)"), ":<n>"),
+    (re.compile(r"\b(?:0x)?[0-9a-fA-F]{7,}\b"), "<hash>"),
+    (re.compile(r"\b\d+\b"), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+
+def signature(line):
+    """Normalized form of an error line, stable across runs and checkouts."""
+    for rx, sub in _SIG_SUBS: line = rx.sub(sub, line)
+    return line.strip()
+
+def signatures(logs, hits):
+    """Group ``hits`` by the signature of their line, in log order.
+
+    Returns {signature: (Counter of hits per agent, first hit, its line)}.
+    """
+    order = {p: n for n, p in enumerate(logs.paths)}
+    out = {}
+    for h in sorted(hits, key=lambda h: (order[h.path], h.offset)):
+        line = logs.line_at(h)[1]
+        sig = signature(line)
+        if sig not in out: out[sig] = (collections.Counter(), h, line)
+        out[sig][0][h.agent] += 1
+    return out
+
+def excerpts(logs, hits, lines=CONTEXT, limit=MAX_EXCERPTS, sigs=None):
+    """One excerpt per distinct error signature among ``hits`` (in log order).
+
+    Returns {signature: (agents, hit count, excerpt)} with at most ``limit``
+    entries; excerpts kept by the scan cost nothing, others O(lines) thanks to the line index. Pass
+    ``sigs`` when signatures(logs, hits) was already computed.
+    """
+    sigs = signatures(logs, hits) if sigs is None else sigs
+    return {sig: (set(agents), sum(agents.values()), logs.excerpt_at(h, lines))
+            for sig, (agents, h, _) in itertools.islice(sigs.items(), limit)}
+
+# ------------------------ Matching ------------------------
+
+Hit = collections.namedtuple("Hit", "agent pattern path offset")
+
+def _parse(pattern, flags=0):
+    try: from re import _parser as sre_parse    # Python 3.11+
+    except ImportError: import sre_parse
+    return sre_parse.parse(pattern, flags)
+
+def required_literal(pattern, flags=0):
+    """Longest literal run every match of the bytes regex ``pattern`` must contain, or None.
+
+    Only top-level literals count (not ones inside groups, branches or
+    repeats), so the run is a safe prefilter: a block without it cannot match.
+    Returned lower-cased when the pattern ignores case.
+    """
+    parsed = _parse(pattern, flags)
+    state = getattr(parsed, "state", None) or parsed.pattern    # renamed in Python 3.11
+    best, run = b"", []
+    for op, arg in list(parsed) + [(None, None)]:
+        if getattr(op, "name", None) == "LITERAL":
+            run.append(arg); continue
+        if len(run) > len(best): best = bytes(run)
+        run = []
+    if len(best) < 3: return None
+    return best.lower() if (flags | state.flags) & re.IGNORECASE else best
+
+# bytes.translate table for the prefilter: ASCII letters lower-cased, digits and _ kept, every other byte a space
+_FOLD = bytes(c + 32 if 65 <= c <= 90 else c if 48 <= c <= 57 or 97 <= c <= 122 or c == 95 else 32 for c in range(256))
+
+def anchor_words(anchor):
+    """(whole words, key, probe) of a literal every match contains, for the token prefilter.
+
+    Whole words are the word runs of ``anchor`` with a non-word byte on both
+    sides inside it, so each shows up as a token of any line the pattern
+    matches. The key is the longest whole word (None without one); an edge
+    run may be glued to word bytes in the log and is never a key. The probe
+    is the longest run, whole or not: it is part of some token, so a block
+    whose tokens do not contain it is skipped. All are case-folded like _FOLD.
+    """
+    folded = anchor.translate(_FOLD)
+    runs = [(m.group(), 0 < m.start() and m.end() < len(folded)) for m in re.finditer(rb"[^ ]+", folded)]
+    words = frozenset(w for w, inner in runs if inner)
+    return words, max(words, key=len, default=None), max((w for w, _ in runs), key=len, default=None)
+
+class Matcher:
+    """Every agent's patterns compiled once into a block scanner.
+
+    ``specs`` are (agent, pattern, is_regex, flags) tuples. Each regex
+    (case-insensitive literals included) is compiled on its own; a merged
+    alternation of all patterns would lose CPython's literal-prefix scan and
+    cost several times more. A required literal (see required_literal) is
+    derived for it as its anchor; ``anchors`` (from a previous Matcher's
+    ``.anchors``) skips re-deriving them.
+
+    Below PREFILTER_MIN patterns every block gets one bytes.find pass per
+    literal, and each regex runs on the blocks holding its anchor. From
+    PREFILTER_MIN on, a block is instead folded and split into a set of
+    word tokens once; a pattern is confirmed only on the lines holding its
+    key word, and only in blocks holding all of its whole words and whose
+    tokens contain its probe (see anchor_words), so the cost no longer grows
+    with the number of patterns. Patterns without a whole word are looked
+    for by their probe in the blocks whose tokens contain it, and regexes
+    without any anchor still run on every block. With the
+    prefilter a regex is matched within one line, as agent patterns are.
+    """
+    def __init__(self, specs, anchors=None):
+        self.specs = [(a, p, bool(rx), fl) for a, p, rx, fl in specs]
+        self.agents = list(dict.fromkeys(a for a, *_ in self.specs))
+        self.literals, self.regexes = [], []
+        derive = anchors is None
+        if derive: anchors = [None] * len(self.specs)
+        for i, (_, pat, is_rx, flags) in enumerate(self.specs):
+            if not is_rx and not flags:
+                if _enc(pat): self.literals.append((i, _enc(pat)))
+                continue
+            body = _enc(pat) if is_rx else re.escape(_enc(pat))
+            if derive:
+                lit = required_literal(body, flags)
+                anchors[i] = lit.decode("latin-1") if lit else None    # JSON-friendly
+            rx = re.compile(body, flags)
+            anchor = anchors[i].encode("latin-1") if anchors[i] else None
+            self.regexes.append((i, rx, anchor, bool(rx.flags & re.IGNORECASE)))
+        self.anchors = anchors
+        self.prefilter = len(self.literals) + len(self.regexes) >= PREFILTER_MIN
+        if self.prefilter: self._plan()
+
+    def _plan(self):
+        # key word -> [(spec, whole words, probe, literal or regex)]; patterns without whole words are
+        # kept under their probe in ``loose`` and found by substring
+        self.keyed, self.loose, self.bare = {}, {}, []
+        for i, needle in self.literals:
+            self._route(i, needle, needle)
+        for i, rx, anchor, _ in self.regexes:
+            self._route(i, anchor, rx, multiline=b"\n" in rx.pattern or b"\\n" in rx.pattern)
+        self.keys = frozenset(self.keyed)
+
+    def _route(self, i, anchor, test, multiline=False):
+        # a pattern that spells out a newline cannot be confirmed line by line
+        words, key, probe = anchor_words(anchor) if anchor and not multiline and b"\n" not in anchor else ((), None, None)
+        if probe is None: self.bare.append((i, test))
+        elif key is None: self.loose.setdefault(probe, []).append((i, words, None, test))
+        else: self.keyed.setdefault(key, []).append((i, words, None if probe in words else probe, test))
+
+    def _direct(self, b):
+        for i, needle in self.literals:
+            at = b.find(needle)
+            while at >= 0:
+                yield i, at
+                at = b.find(needle, at + 1)
+        low = None
+        for i, rx, anchor, folded in self.regexes:
+            if anchor is not None:
+                if folded and low is None: low = b.lower()    # ASCII only, like re.IGNORECASE on bytes
+                if anchor not in (low if folded else b): continue
+            for m in rx.finditer(b):
+                yield i, m.start()
+
+    def _scan_block(self, b):
+        if not self.prefilter:
+            yield from self._direct(b)
+            return
+        for i, test in self.bare:
+            yield from _confirm(i, test, b, 0, len(b))
+        folded = b.translate(_FOLD)
+        tokens = set(folded.split())
+        vocab = b" ".join(tokens)    # a probe is in some token iff it is in here; far shorter than the block
+        todo = [(key, [e for e in self.keyed[key] if e[1] <= tokens and (e[2] is None or e[2] in vocab)])
+                for key in tokens & self.keys]
+        loose = ((probe, entries) for probe, entries in self.loose.items() if probe in vocab)
+        for key, entries in itertools.chain(todo, loose):
+            end, lines = 0, 0    # each line holding the key is confirmed once
+            at = folded.find(key) if entries else -1
+            while at >= 0:
+                if at >= end:
+                    start, lines = b.rfind(b"\n", 0, at) + 1, lines + 1
+                    if lines > CONFIRM_LINES:
+                        # a common word: one pass per pattern over the rest of the block is cheaper
+                        for i, _, _, test in entries: yield from _confirm(i, test, b, start, len(b))
+                        break
+                    end = b.find(b"\n", at)
+                    if end < 0: end = len(b)
+                    for i, _, _, test in entries: yield from _confirm(i, test, b, start, end)
+                at = folded.find(key, at + 1)
+
+    def scan(self, logs, agents=None, settle=False):
+        """One pass over ``logs``; returns {agent: [Hit, ...]} for ``agents`` (default all).
+
+        With ``settle``, files are read tail-first and reading stops after the
+        block in which the last of ``agents`` fired: the verdicts are final,
+        the hit lists then hold only what was read (``logs.partial``). Use it
+        for decisions only, not for counts, signatures or excerpts.
+        """
+        want = set(self.agents if agents is None else agents)
+        hits = {a: [] for a in self.agents if a in want}
+        counts = collections.Counter()
+        with contextlib.closing(logs.chunks(index=True, reverse=settle)) as chunks:
+            for path, base, b in chunks:
+                new = []
+                for i, off in self._scan_block(b):
+                    agent, pat = self.specs[i][0], self.specs[i][1]
+                    if agent not in want or counts[i] >= MAX_HITS: continue
+                    counts[i] += 1
+                    hits[agent].append(Hit(agent, pat, path, base + off)); new.append(base + off)
+                if new: logs.capture(path, base, b, set(new))
+                if settle and all(hits.values()): break
+        order = {p: n for n, p in enumerate(logs.paths)}
+        return {a: sorted(set(h), key=lambda h: (order[h.path], h.offset)) for a, h in hits.items()}
+
+    def match_block(self, path, base, block, agents=None):
+        """Hits in one block of ``path`` starting at byte ``base`` (for logs read incrementally)."""
+        want = set(self.agents if agents is None else agents)
+        return [Hit(self.specs[i][0], self.specs[i][1], path, base + off)
+                for i, off in sorted(self._scan_block(block), key=lambda x: x[1]) if self.specs[i][0] in want]
+
+def _confirm(i, test, b, start, end):
+    """(i, offset) of every match of literal or regex ``test`` in ``b[start:end]``."""
+    if isinstance(test, bytes):
+        at = b.find(test, start, end)
+        while at >= 0:
+            yield i, at
+            at = b.find(test, at + 1, end)
+    else:
+        for m in test.finditer(b, start, end): yield i, m.start()
@@ -0,0 +1,141 @@
+"""Registry of triage agents: what each looks for, in which logs, and what fixes it.
+
+The built-in agents are classes in agent_hub. More can be declared in drop-in
+files, so recognizing a new failure signature needs no Python:
+
+    # scripts/swarm/agents.d/codesign.yaml (or .json; YAML needs PyYAML)
+    name: CodesignAgent
+    doc: Report keychain/codesign failures.
+    source: app                     # a named log source, or a list of globs
+    patterns:
+      - errSecInternalComponent     # plain text
+      - {regex: 'Code ?Sign(ing)? error', ignorecase: true}
+    actions: []                     # keys of agent_hub.ACTIONS; none: report only
+
+A file holds one agent, a list of them or {"agents": [...]}. Every pattern
+of every agent is compiled into one logscan.Matcher per process; the
+prefilters it derives are kept in matcher.json under the cache directory,
+keyed by the patterns, so later processes skip that analysis.
+"""
+import collections, hashlib, json, os, pathlib, re
+from logscan import Matcher
+
+try: import yaml          # optional: pip install pyyaml
+except ImportError: yaml = None
+
+SUFFIXES = (".json", ".yaml", ".yml")
+PLAN_VERSION = 1    # bump when Matcher's derived anchors change meaning
+
+Agent = collections.namedtuple("Agent", "name doc source patterns actions")
+
+def from_class(cls, source):
+    """An Agent from a built-in agent class (PATTERNS or KEYS, REGEX, FLAGS, ACTIONS)."""
+    rx, flags = getattr(cls, "REGEX", False), getattr(cls, "FLAGS", 0)
+    patterns = tuple((p, rx, flags) for p in getattr(cls, "PATTERNS", None) or cls.KEYS)
+    return Agent(cls.__name__, (cls.__doc__ or "").strip(), source, patterns, tuple(cls.ACTIONS))
+
+def _pattern(p):
+    if isinstance(p, str): return (p, False, 0)
+    if isinstance(p, dict) and ("regex" in p) != ("literal" in p):
+        flags = re.IGNORECASE if p.get("ignorecase") else 0
+        return (p["regex"], True, flags) if "regex" in p else (p["literal"], False, flags)
+    raise ValueError(f"bad pattern {p!r}: expected text, {{regex: ...}} or {{literal: ...}}")
+
+def from_dict(d):
+    """An Agent from one declarative entry (see the module docstring)."""
+    if not isinstance(d, dict) or not isinstance(d.get("name"), str):
+        raise ValueError(f"agent entry without a name: {d!r}")
+    source = d.get("source")
+    if isinstance(source, list): source = tuple(source)
+    patterns = tuple(_pattern(p) for p in d.get("patterns") or ())
+    if not patterns: raise ValueError(f"agent {d['name']}: no patterns")
+    return Agent(d["name"], d.get("doc", ""), source, patterns, tuple(d.get("actions") or ()))
+
+def read_file(path):
+    """The agent entries (dicts, see from_dict) declared in one JSON or YAML file."""
+    text = pathlib.Path(path).read_text()
+    if str(path).endswith((".yaml", ".yml")):
+        if yaml is None: raise ValueError("PyYAML is not installed")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, dict) and "agents" in data: data = data["agents"]
+    return data if isinstance(data, list) else [data]
+
+LOAD_ERRORS = (OSError, ValueError) + ((yaml.YAMLError,) if yaml else ())
+
+class Registry:
+    """Agents by name, in registration order.
+
+    ``sources`` maps log source names to their globs; ``actions`` are the
+    remediation keys agents may ask for. Agents are validated when added.
+    """
+    def __init__(self, sources, actions=()):
+        self.sources, self.actions = dict(sources), set(actions)
+        self.agents, self._matcher = {}, None
+
+    def add(self, agent):
+        if agent.name in self.agents: raise ValueError(f"agent {agent.name} is already registered")
+        if isinstance(agent.source, tuple):
+            # ad-hoc globs become a source of their own, shared by agents naming the same ones
+            agent = agent._replace(source=",".join(agent.source))
+            self.sources.setdefault(agent.source, tuple(agent.source.split(",")))
+        elif agent.source not in self.sources:
+            raise ValueError(f"agent {agent.name}: unknown log source {agent.source!r} (known: {', '.join(self.sources)})")
+        unknown = [k for k in agent.actions if k not in self.actions]
+        if unknown: raise ValueError(f"agent {agent.name}: unknown action(s) {', '.join(unknown)}")
+        for p, rx, flags in agent.patterns:
+            if not rx: continue
+            try: re.compile(p, flags)
+            except re.error as e: raise ValueError(f"agent {agent.name}: bad regex {p!r}: {e}") from None
+        self.agents[agent.name] = agent
+        self._matcher = None
+        return agent
+
+    def load(self, *paths, warn=print):
+        """Add the agents of drop-in files (or directories of them); returns the names added.
+
+        A file that cannot be read or an agent that does not validate is
+        reported through ``warn`` and skipped; the rest still load.
+        """
+        added = []
+        for path in map(pathlib.Path, paths):
+            files = sorted(p for p in path.iterdir() if p.suffix in SUFFIXES) if path.is_dir() else [path] if path.is_file() else []
+            for f in files:
+                try: entries = read_file(f)
+                except LOAD_ERRORS as e:
+                    warn(f"skipping {f}: {e}"); continue
+                for d in entries:
+                    try: added.append(self.add(from_dict(d)).name)
+                    except ValueError as e: warn(f"skipping {f}: {e}")
+        return added
+
+    def groups(self):
+        """[(source, [agent names])]: each source's logs are read once, for all of its agents."""
+        out = {}
+        for a in self.agents.values(): out.setdefault(a.source, []).append(a.name)
+        return list(out.items())
+
+    def specs(self):
+        return [(a.name, p, rx, flags) for a in self.agents.values() for p, rx, flags in a.patterns]
+
+    def matcher(self, cache_dir=None):
+        """The Matcher for every registered pattern; built once, its prefilters cached on disk."""
+        if self._matcher is not None: return self._matcher
+        specs = self.specs()
+        key = hashlib.sha256(json.dumps([PLAN_VERSION, specs]).encode()).hexdigest()
+        path = pathlib.Path(cache_dir) / "matcher.json" if cache_dir else None
+        anchors = None
+        if path:
+            try:
+                saved = json.loads(path.read_text())
+                if saved.get("key") == key: anchors = saved["anchors"]
+            except (OSError, ValueError, KeyError):
+                pass
+        self._matcher = Matcher(specs, anchors)
+        if path and anchors is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}")
+            tmp.write_text(json.dumps({"key": key, "anchors": self._matcher.anchors}))
+            os.replace(tmp, path)
+        return self._matcher
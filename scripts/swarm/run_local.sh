@@ -13,5 +13,5 @@ python3 "$ROOT/scripts/swarm/agent_hub.py"
 
 echo "== Diff =="
 git -C "$ROOT" status --porcelain=v1 || true
-git -C "$ROOT" diff --stat || true
-echo "If changes look good: git add -A && git commit -m 'Swarm: fixes' && git push -u origin <branch>"
+git -C "$ROOT" diff --cached --stat || true
+echo "AgentHub staged its fixes; if they look good: git commit -m 'Swarm: fixes' && git push -u origin <branch>"
@@ -0,0 +1,87 @@
+"""Persistent index of failure signatures across CI runs.
+
+Every triage records, per run, which agents matched which normalized error
+lines (logscan.signature) in a small SQLite database next to the triage
+cache. The database outlives the run (.swarm_cache is restored by
+actions/cache), so "when did this first appear / how many runs hit it" is an
+indexed query instead of a re-grep of archived logs. Signatures are
+full-text indexed with FTS5 where the sqlite3 build has it, else matched
+with LIKE.
+"""
+import sqlite3, time
+
+MAX_EXAMPLE = 500    # chars of the first matching line kept per signature
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, run TEXT UNIQUE NOT NULL, at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS sigs (id INTEGER PRIMARY KEY, sig TEXT UNIQUE NOT NULL, example TEXT);
+CREATE TABLE IF NOT EXISTS hits (sig INTEGER NOT NULL, agent TEXT NOT NULL, run INTEGER NOT NULL, count INTEGER NOT NULL,
+                                 PRIMARY KEY (sig, agent, run)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hits_run ON hits (run);
+"""
+
+class SigIndex:
+    def __init__(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30)
+        self.db.executescript(SCHEMA)
+        try:
+            self.db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS sigs_fts USING fts5(sig, content='sigs', content_rowid='id')")
+            self.fts = True
+        except sqlite3.OperationalError:    # sqlite3 built without FTS5
+            self.fts = False
+
+    def close(self): self.db.close()
+
+    def record(self, run, at, rows):
+        """Replace what is known about ``run`` with ``rows`` of (agent, signature, count, line).
+
+        Re-recording a run (a re-triage, a batch backfill) is idempotent.
+        Returns the number of signatures never seen before.
+        """
+        new = 0
+        with self.db:
+            self.db.execute("INSERT INTO runs (run, at) VALUES (?, ?) ON CONFLICT (run) DO UPDATE SET at = excluded.at",
+                            (run, at))
+            rid = self.db.execute("SELECT id FROM runs WHERE run = ?", (run,)).fetchone()[0]
+            self.db.execute("DELETE FROM hits WHERE run = ?", (rid,))
+            for agent, sig, count, line in rows:
+                cur = self.db.execute("INSERT OR IGNORE INTO sigs (sig, example) VALUES (?, ?)", (sig, line[:MAX_EXAMPLE]))
+                if cur.rowcount:
+                    new += 1
+                    if self.fts: self.db.execute("INSERT INTO sigs_fts (rowid, sig) VALUES (?, ?)", (cur.lastrowid, sig))
+                sid = self.db.execute("SELECT id FROM sigs WHERE sig = ?", (sig,)).fetchone()[0]
+                self.db.execute("INSERT INTO hits VALUES (?, ?, ?, ?) ON CONFLICT (sig, agent, run) DO UPDATE SET count = count + excluded.count",
+                                (sid, agent, rid, count))
+        return new
+
+    def query(self, text="", limit=20):
+        """Signatures matching ``text`` (all if empty), most widespread first.
+
+        Rows: (signature, agents, runs, hits, first seen, first run, last seen, example).
+        """
+        if text and self.fts:
+            # one quoted phrase, so punctuation in error text is not read as query syntax
+            where, args = "WHERE s.id IN (SELECT rowid FROM sigs_fts WHERE sigs_fts MATCH ?)", ['"' + text.replace('"', '""') + '"']
+        elif text:
+            where, args = "WHERE s.sig LIKE ?", [f"%{text}%"]
+        else:
+            where, args = "", []
+        return self.db.execute(f"""
+            SELECT s.sig, group_concat(DISTINCT h.agent), count(DISTINCT h.run), sum(h.count), min(r.at),
+                   (SELECT r2.run FROM hits h2 JOIN runs r2 ON r2.id = h2.run WHERE h2.sig = s.id ORDER BY r2.at LIMIT 1),
+                   max(r.at), s.example
+            FROM sigs s JOIN hits h ON h.sig = s.id JOIN runs r ON r.id = h.run
+            {where} GROUP BY s.id ORDER BY count(DISTINCT h.run) DESC, min(r.at) LIMIT ?""", args + [limit]).fetchall()
+
+    def runs(self):
+        return self.db.execute("SELECT count(*) FROM runs").fetchone()[0]
+
+def report(rows, runs):
+    """Markdown table for query() rows."""
+    day = lambda t: time.strftime("%Y-%m-%d %H:%M", time.gmtime(t))
+    out = [f"# Failure signatures ({runs} run(s) indexed)", "",
+           "| signature | agents | runs | hits | first seen | first run | last seen |", "|---|---|---:|---:|---|---|---|"]
+    for sig, agents, n, hits, first, first_run, last, _ in rows:
+        out.append(f"| `{sig}` | {agents} | {n} | {hits} | {day(first)} | {first_run} | {day(last)} |")
+    return out
@@ -0,0 +1,107 @@
+"""Content-addressed cache of agent_hub triage results.
+
+A triage result (decisions, hints, excerpts) depends only on the bytes of the
+input logs and on the agents' patterns, so it is stored under a digest of
+both. Re-runs on artifacts that were already analyzed (workflow re-runs,
+repeated /autofix triggers) load the result instead of rescanning.
+
+Logs are large and new ones arrive with every CI run, so a log is keyed on
+its size plus the first and last HASH_SAMPLE bytes rather than on all of
+them: a build log only grows at the end and its decisive errors are there.
+A fresh 360 MB log then costs two small reads instead of a full pass
+before triage even starts. Zip members are keyed on the CRC the archive
+already holds.
+
+Entries are small JSON files; the directory is kept under ``max_bytes`` by
+evicting the least recently used ones (a hit refreshes the entry's mtime).
+"""
+import hashlib, json, os, pathlib
+from logscan import ZipMember, source_name, zip_info
+
+HASH_SAMPLE = 1 << 20    # bytes hashed from each end of a log; smaller logs are hashed whole
+
+class TriageCache:
+    def __init__(self, root, max_bytes=64 << 20):
+        self.root = pathlib.Path(root) / "triage"
+        self.max_bytes = max_bytes
+        self.memo_path = self.root / "stat_memo.json"
+        self.memo = None    # path -> [stamp, digest], loaded on first use; pass it on to fingerprint() to reuse
+
+    # ---- fingerprint ----
+
+    def fingerprint(self, version, *streams):
+        """fingerprint() with the file digests memoized under the cache directory."""
+        if self.memo is None: self.memo = _load(self.memo_path) or {}
+        key = fingerprint(version, *streams, memo=self.memo)
+        _store(self.memo_path, {k: v for k, v in self.memo.items() if os.path.exists(k)})
+        return key
+
+    # ---- entries ----
+
+    def get(self, key):
+        p = self.root / f"{key}.json"
+        v = _load(p)
+        if v is not None: os.utime(p)
+        return v
+
+    def put(self, key, value):
+        _store(self.root / f"{key}.json", value)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for p in self.root.glob("*.json"):
+            if p == self.memo_path: continue
+            try: st = p.stat()
+            except OSError: continue
+            entries.append((st.st_mtime, st.st_size, p))
+        total = sum(e[1] for e in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes: break
+            try: p.unlink(); total -= size
+            except OSError: pass
+
+def fingerprint(version, *streams, memo=None):
+    """Digest of ``version`` plus the name and content of every file in ``streams``.
+
+    Where the files live does not matter, only their names and bytes.
+    ``memo`` maps paths to digests keyed on (size, mtime, inode) and is updated.
+    """
+    memo = {} if memo is None else memo
+    h = hashlib.sha256(version.encode())
+    for n, s in enumerate(streams):
+        for p in s.paths:
+            try: d = _file_digest(p, memo)
+            except (OSError, KeyError): continue
+            h.update(f"{n}\0{source_name(p)}\0{d}\n".encode())
+    return h.hexdigest()
+
+def _file_digest(path, memo):
+    """Size and sha256 of a file's head and tail; memoized on (size, mtime, inode) so unchanged files are not re-read."""
+    if isinstance(path, ZipMember):
+        # the archive already carries a checksum per member; no need to inflate it
+        i = zip_info(path)
+        return f"crc32:{i.CRC:08x}:{i.file_size}"
+    st = os.stat(path)
+    stamp = [st.st_size, st.st_mtime_ns, st.st_ino]
+    e = memo.get(str(path))
+    if e and e[0] == stamp: return e[1]
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        if st.st_size <= 2 * HASH_SAMPLE:
+            h.update(fh.read())
+        else:
+            h.update(fh.read(HASH_SAMPLE)); fh.seek(-HASH_SAMPLE, os.SEEK_END); h.update(fh.read(HASH_SAMPLE))
+    memo[str(path)] = [stamp, f"{st.st_size}:{h.hexdigest()}"]
+    return memo[str(path)][1]
+
+def _load(p):
+    try: return json.loads(pathlib.Path(p).read_text())
+    except (OSError, ValueError): return None
+
+def _store(p, value):
+    p = pathlib.Path(p)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(p.name + f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(value))
+    os.replace(tmp, p)
@@ -0,0 +1,25 @@
+import pathlib, sys
+
+import pytest
+
+SCRIPTS = pathlib.Path(__file__).resolve().parents[1] / "scripts"
+sys.path[:0] = [str(SCRIPTS / "swarm"), str(SCRIPTS), str(SCRIPTS / "bench")]
+
+@pytest.fixture(scope="session")
+def agents(tmp_path_factory):
+    """agent_hub's registry, loaded once with its matcher plan cached outside the checkout."""
+    import agent_hub
+    return agent_hub.load_agents(tmp_path_factory.mktemp("swarm-cache"))
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """Start bench/fake_github.py and point the GitHub client at it; yields serve(zips) -> base URL."""
+    import fake_github, github_client
+    servers = []
+    def serve(zips=(), delay=0.0):
+        server, url = fake_github.serve(zips, delay)
+        servers.append(server)
+        monkeypatch.setattr(github_client, "API", url)
+        return url
+    yield serve
+    for s in servers: s.shutdown(); s.server_close()
@@ -0,0 +1,61 @@
+import threading, time
+
+import pytest
+
+from actions import Action, Scheduler
+
+class Log:
+    def __init__(self): self.calls, self.lock = [], threading.Lock()
+    def step(self, key, changed=False, fail=False, sleep=0.0):
+        def fn():
+            time.sleep(sleep)
+            with self.lock: self.calls.append(key)
+            if fail: raise SystemExit(1)    # what sh(check=True) does
+            return changed
+        return fn
+
+def test_each_key_runs_once_with_its_deps():
+    log = Log()
+    actions = {"install": Action(log.step("install")), "generate": Action(log.step("generate", True), deps=["install"])}
+    report = Scheduler(actions).run(["generate", "install", "generate", "generate"])
+    assert sorted(log.calls) == ["generate", "install"]
+    assert log.calls.index("install") < log.calls.index("generate")
+    assert report.changed and all(r.ok for r in report.results.values())
+    assert "2 run, 2 duplicate request(s) merged" in report.lines()[0]
+
+def test_deps_are_pulled_in():
+    log = Log()
+    actions = {"a": Action(log.step("a")), "b": Action(log.step("b"), deps=["a"]), "c": Action(log.step("c"), deps=["b"])}
+    report = Scheduler(actions).run(["c"])
+    assert log.calls == ["a", "b", "c"]
+    assert dict(report.requested) == {"c": 1}
+
+def test_after_orders_only_planned_actions():
+    log = Log()
+    actions = {"rename": Action(log.step("rename", sleep=0.05)), "generate": Action(log.step("generate"), after=["rename"])}
+    Scheduler(actions).run(["generate", "rename"])
+    assert log.calls == ["rename", "generate"]
+    log.calls.clear()
+    Scheduler(actions).run(["generate"])
+    assert log.calls == ["generate"]
+
+def test_independent_actions_overlap():
+    log = Log()
+    actions = {k: Action(log.step(k, sleep=0.2)) for k in "abcd"}
+    report = Scheduler(actions, max_workers=4).run(list("abcd"))
+    assert report.wall < 0.6 and report.serial_seconds >= 0.8
+
+def test_failed_dep_skips_dependents_not_the_rest():
+    log = Log()
+    actions = {"install": Action(log.step("install", fail=True)), "generate": Action(log.step("generate"), deps=["install"]),
+               "rewrite": Action(log.step("rewrite", True))}
+    report = Scheduler(actions).run(["generate", "rewrite"])
+    assert sorted(log.calls) == ["install", "rewrite"]
+    assert not report.results["install"].ok and not report.results["generate"].ok
+    assert report.results["rewrite"].ok and report.changed
+    assert "  - generate: FAILED (0.0s)" in report.lines()
+
+def test_cycle_is_an_error():
+    actions = {"a": Action(lambda: None, after=["b"]), "b": Action(lambda: None, after=["a"])}
+    with pytest.raises(ValueError, match="cycle"):
+        Scheduler(actions).run(["a", "b"])
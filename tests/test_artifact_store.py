@@ -0,0 +1,113 @@
+import hashlib, os, stat, threading, time, zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import artifact_store
+from artifact_store import ArtifactStore, extract, fetch_artifact, member_matches
+from globs import glob_rx
+
+def test_concurrent_fetch_downloads_once(tmp_path, monkeypatch):
+    calls = []
+    def fetch_to_file(client, url, path, transfer=None, expected_sha256=None):
+        calls.append(url); time.sleep(0.1)
+        path.write_bytes(b"zip bytes")
+        return hashlib.sha256(b"zip bytes").hexdigest()
+    monkeypatch.setattr(artifact_store, "fetch_to_file", fetch_to_file)
+    store, out = ArtifactStore(tmp_path / "store"), []
+    def fetch(n): out.append(fetch_artifact(None, "https://x/zip", "run/1/logs", tmp_path / f"d{n}.zip", store=store))
+    threads = [threading.Thread(target=fetch, args=(n,)) for n in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(calls) == 1
+    assert sorted(cached for _, cached in out) == [False, True, True, True]
+    assert all((tmp_path / f"d{n}.zip").read_bytes() == b"zip bytes" for n in range(4))
+
+def test_stored_artifact_is_linked_not_fetched(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "fetch_to_file", lambda *a, **k: 1 / 0)
+    store = ArtifactStore(tmp_path / "store")
+    src = store.incoming_path("k"); src.write_bytes(b"zip bytes")
+    digest = store.add("k", src, hashlib.sha256(b"zip bytes").hexdigest())
+    assert fetch_artifact(None, "https://x/zip", "k", tmp_path / "a.zip", store=store) == (digest, True)
+    assert os.path.samefile(tmp_path / "a.zip", store.object_path(digest))
+    # another key with the same content digest is found too
+    assert fetch_artifact(None, "https://x/zip", "other", tmp_path / "b.zip", digest=f"sha256:{digest}", store=store)[1]
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    store = ArtifactStore(tmp_path / "store", max_bytes=250)
+    digests = []
+    for n in range(3):
+        p = store.incoming_path(f"k{n}"); p.write_bytes(bytes([n]) * 100)
+        digests.append(store.add(f"k{n}", p, f"{n:064x}"))
+        if n == 1: assert store.lookup("k0")    # k0 used again: k1 is now the oldest
+    assert [store.lookup(f"k{n}") for n in range(3)] == [digests[0], None, digests[2]]
+    assert not store.object_path(digests[1]).exists()
+
+@pytest.mark.parametrize("pattern, path, hit", [
+    ("*.log", "a.log", True), ("*.log", "logs/a.log", False), ("**/*.log", "a.log", True),
+    ("**/*.log", "x/y/a.log", True), ("logs/**", "logs/x/a.log", True), ("a?.txt", "ab.txt", True),
+    ("a?.txt", "a/.txt", False), ("a.log", "aXlog", False), ("[ci].log", "[ci].log", True),
+])
+def test_glob_rx(pattern, path, hit):
+    assert bool(glob_rx(pattern).match(path)) == hit
+
+def test_member_matches_parents():
+    assert member_matches("MoreMojo.app/Contents/MacOS/MoreMojo", ["*.app"])
+    assert member_matches("logs/build/xcodebuild.log", ["**/*.log"])
+    assert not member_matches("MoreMojo.app.dSYM/Contents/Info.plist", ["*.app"])
+    assert not member_matches("logs/a.txt", ["**/*.log", "*.json"])
+
+def _link(z, name, target):
+    info = zipfile.ZipInfo(name)
+    info.external_attr = (stat.S_IFLNK | 0o777) << 16
+    z.writestr(info, target)
+
+def _exe(z, name, data):
+    info = zipfile.ZipInfo(name)
+    info.external_attr = (stat.S_IFREG | 0o755) << 16
+    z.writestr(info, data)
+
+def test_extract_keeps_bundle_links_and_modes(tmp_path):
+    zp = tmp_path / "a.zip"
+    with zipfile.ZipFile(zp, "w") as z:
+        _link(z, "Mojo.framework/Versions/Current", "A")
+        _link(z, "Mojo.framework/Mojo", "Versions/Current/Mojo")
+        _exe(z, "Mojo.framework/Versions/A/Mojo", b"binary")
+        z.writestr("logs/a.log", "hello\n")
+    dest = tmp_path / "out"
+    assert extract(zp, dest, include=["*.framework"]) == (3, len(b"binary") + len("A") + len("Versions/Current/Mojo"))
+    assert (dest / "Mojo.framework/Mojo").read_bytes() == b"binary"
+    assert os.readlink(dest / "Mojo.framework/Versions/Current") == "A"
+    assert os.access(dest / "Mojo.framework/Versions/A/Mojo", os.X_OK)
+    assert not (dest / "logs").exists()
+    extract(zp, dest)    # again, over the existing links
+    assert os.readlink(dest / "Mojo.framework/Mojo") == "Versions/Current/Mojo"
+
+@pytest.mark.parametrize("members", [
+    [("evil", "../../outside")],
+    [("a/evil", "/etc")],
+    [("escape", ".."), ("escape/x.txt", None)],
+])
+def test_extract_rejects_links_out_of_dest(tmp_path, members):
+    zp = tmp_path / "a.zip"
+    with zipfile.ZipFile(zp, "w") as z:
+        for name, target in members:
+            if target is None: z.writestr(name, "pwned")
+            else: _link(z, name, target)
+    dest = tmp_path / "out"
+    with pytest.raises(ValueError, match="leaves"):
+        extract(zp, dest)
+    assert not (tmp_path / "x.txt").exists()
+    assert not any(os.path.islink(p) for p in dest.rglob("*"))
+
+def test_extract_in_workers_shares_new_directories(tmp_path, monkeypatch):
+    zp = tmp_path / "a.zip"
+    with zipfile.ZipFile(zp, "w") as z:
+        z.writestr("Mojo.app/Contents/", "")
+        for n in range(16): z.writestr(f"Mojo.app/Contents/Resources/deep/{n % 4}/f{n}.bin", b"x" * n)
+    monkeypatch.setattr(artifact_store, "LARGE_MEMBER", 0)    # every member goes to a worker
+    with ProcessPoolExecutor(4) as pool:
+        for n in range(5):
+            dest = tmp_path / f"out{n}"
+            assert extract(zp, dest, pool=pool) == (17, sum(range(16)))
+            assert len(list(dest.rglob("*.bin"))) == 16
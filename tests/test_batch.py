@@ -0,0 +1,52 @@
+import zipfile
+
+import pytest
+
+import agent_hub
+
+@pytest.fixture
+def runs(tmp_path, agents):
+    d = tmp_path / "run1"
+    (d / "ci_logs").mkdir(parents=True)
+    (d / "ci_logs/xcodebuild_app_stdout.log").write_text("ok\nfuture Xcode project file format\n")
+    z = tmp_path / "run2" / "app-build-logs.zip"; z.parent.mkdir()
+    with zipfile.ZipFile(z, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("logs/xcodebuild_app_stdout.log", "xcodebuild: error: boom\nfuture Xcode project file format\n")
+    return d, z, tmp_path / "missing"
+
+def test_triage_run_reads_dirs_and_zips(runs):
+    d, z, missing = runs
+    a, b = agent_hub.triage_run(d), agent_hub.triage_run(z)
+    assert a["fired"] == ["ProjectAgent"] and a["actions"] == ["xcodegen.generate", "xcodegen.install"]
+    assert b["fired"] == ["ProjectAgent", "SchemeAgent"]
+    assert a["read"] == a["bytes"] > 0
+    assert "no such run" in agent_hub.triage_run(missing)["error"]
+
+def test_batch_report(runs, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("SWARM_NO_INDEX", "1")
+    agent_hub.batch(runs, jobs=2, out=tmp_path / "report.md")
+    report = (tmp_path / "report.md").read_text()
+    assert "- runs: 3 (1 unreadable), none fired: 0" in report
+    assert "| ProjectAgent | 2 | 100% |" in report and "| SchemeAgent | 1 | 50% |" in report
+    assert "- xcodegen.generate: 2 run(s)" in report
+    assert report in capsys.readouterr().out
+
+def test_settled_triage_reports_unread_bytes(tmp_path, agents):
+    d = tmp_path / "run"; (d / "ci_logs").mkdir(parents=True)
+    (d / "ci_logs/xcodebuild_app_stdout.log").write_text("CompileSwift normal arm64 /x/Foo.swift\n" * 100000 +
+        "future Xcode project file format\nxcodebuild: error: boom\ncannot find type 'ProcessorParams' in scope\n")
+    (d / "ci_logs/cmake_build.log").write_text("[100%] Built target MoreMojoPlugin\n")
+    logs = agent_hub.run_logs(d)
+    result = agent_hub.triage(logs, settle=agent_hub.EARLY_STOP)     # the default: tail-first
+    assert result["partial"] == ["app"] and result["decisions"]["SchemeAgent"]
+    unread = len(logs["app"]) - logs["app"].read
+    assert unread > 0 and any(f"{unread} byte(s) unread" in h for h in result["hints"])
+
+def test_backfill_keys_runs_on_their_logs(runs, tmp_path, monkeypatch):
+    d, z, _ = runs
+    monkeypatch.setattr(agent_hub, "CACHE", tmp_path / "cache")
+    monkeypatch.chdir(d.parent)
+    agent_hub.batch([d.name, d, z], jobs=2)                  # the same run twice, once relative
+    agent_hub.batch([d.rename(tmp_path / "moved")], jobs=1)  # and again from elsewhere
+    index = agent_hub.sig_index()
+    assert index.runs() == 2; index.close()
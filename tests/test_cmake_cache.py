@@ -0,0 +1,91 @@
+from cmake_cache import apply, parse, plan
+
+BASE = """cmake_minimum_required(VERSION 3.15 FATAL_ERROR)
+project(MoreMojoPlugin VERSION 0.1.0 LANGUAGES C CXX)
+set(CMAKE_CXX_STANDARD 17)
+set(CMAKE_OSX_DEPLOYMENT_TARGET "11.0" CACHE STRING "macOS deployment target" FORCE)
+find_package(JUCE CONFIG REQUIRED)
+set(MOJO_FORMATS "AU;VST3;Standalone" CACHE STRING "Plugin formats to build")
+juce_add_plugin(MoreMojoPlugin
+    COMPANY_NAME "Umbo Gumbo"
+    FORMATS ${MOJO_FORMATS}
+    PRODUCT_NAME "More Mojo by Umbo Gumbo")  # trailing comment
+target_sources(MoreMojoPlugin PRIVATE
+    Source/PluginProcessor.cpp
+    Source/PluginEditor.cpp
+    Source/PluginEditor.h)
+target_compile_definitions(MoreMojoPlugin PRIVATE JUCE_WEB_BROWSER=0)
+target_link_libraries(MoreMojoPlugin PRIVATE juce::juce_dsp)
+"""
+
+def test_parse():
+    f = parse(BASE)
+    assert f["target"] == "MoreMojoPlugin"
+    assert f["formats"] == {"AU", "VST3", "Standalone"}
+    assert f["sources"] == {"Source/PluginProcessor.cpp", "Source/PluginEditor.cpp", "Source/PluginEditor.h"}
+    assert f["cache"]["CMAKE_OSX_DEPLOYMENT_TARGET"] == (["11.0"], True)
+    assert f["plugin"]["PRODUCT_NAME"] == ["More Mojo by Umbo Gumbo"]
+
+def test_plan_unchanged_is_empty():
+    assert plan(BASE, BASE) == []
+
+def test_plan_reconfigure():
+    assert plan(BASE, BASE.replace("LANGUAGES C CXX", "LANGUAGES C CXX OBJCXX")) == \
+        [("reconfigure", "project/toolchain setup changed")]
+    assert ("reconfigure", "project/toolchain setup changed") in plan(BASE, BASE.replace("MoreMojoPlugin\n", "Other\n"))
+
+def test_plan_uncache_and_drop_format():
+    new = BASE.replace('"AU;VST3;Standalone" CACHE', '"AU;VST3" CACHE')
+    assert plan(BASE, new) == [("uncache", "MOJO_FORMATS"), ("drop-format", "Standalone")]
+
+def test_plan_drop_source_and_notes():
+    new = BASE.replace("    Source/PluginEditor.cpp\n    Source/PluginEditor.h", "    Source/Editor.cpp")
+    new = new.replace("JUCE_WEB_BROWSER=0", "JUCE_WEB_BROWSER=1")
+    assert plan(BASE, new) == [("drop-source", "Source/PluginEditor.cpp"), ("drop-source", "Source/PluginEditor.h"),
+                               ("note", "definitions changed; rebuilt where needed"), ("note", "1 source(s) added")]
+
+def _tree(tmp_path, home):
+    build = tmp_path / "build"
+    build.mkdir()
+    (build / "CMakeCache.txt").write_text(f"CMAKE_HOME_DIRECTORY:INTERNAL={home}\n"
+                                          "MOJO_FORMATS:STRING=AU;VST3;Standalone\nMOJO_FORMATS-ADVANCED:INTERNAL=1\n"
+                                          "CMAKE_BUILD_TYPE:STRING=Release\n")
+    return build
+
+def _touch(build, *paths):
+    for p in paths:
+        (build / p).parent.mkdir(parents=True, exist_ok=True); (build / p).write_text("")
+
+def test_apply_foreign_tree_is_removed(tmp_path):
+    build = _tree(tmp_path, tmp_path / "elsewhere")
+    assert apply(build, tmp_path, [], "MoreMojoPlugin") == [f"removed {build} (not configured from {tmp_path})"]
+    assert not build.exists()
+
+def test_apply_reconfigure_keeps_objects(tmp_path):
+    build = _tree(tmp_path, tmp_path)
+    _touch(build, "CMakeFiles/3.27.1/CMakeCCompiler.cmake", "CMakeFiles/MoreMojoPlugin.dir/Source/PluginProcessor.cpp.o")
+    apply(build, tmp_path, [("reconfigure", "project/toolchain setup changed")], "MoreMojoPlugin")
+    assert not (build / "CMakeCache.txt").exists() and not (build / "CMakeFiles/3.27.1").exists()
+    assert (build / "CMakeFiles/MoreMojoPlugin.dir/Source/PluginProcessor.cpp.o").exists()
+
+def test_apply_uncache_and_drop_format(tmp_path):
+    build = _tree(tmp_path, tmp_path)
+    _touch(build, "CMakeFiles/MoreMojoPlugin_Standalone.dir/a.o", "CMakeFiles/MoreMojoPlugin_VST3.dir/a.o")
+    out = apply(build, tmp_path, plan(BASE, BASE.replace('"AU;VST3;Standalone" CACHE', '"AU;VST3" CACHE')), "MoreMojoPlugin")
+    assert out == ["uncached MOJO_FORMATS", "dropped CMakeFiles/MoreMojoPlugin_Standalone.dir"]
+    assert (build / "CMakeCache.txt").read_text().splitlines()[1:] == ["CMAKE_BUILD_TYPE:STRING=Release"]
+    assert (build / "CMakeFiles/MoreMojoPlugin_VST3.dir/a.o").exists()
+
+def test_apply_drop_source_only_touches_the_target(tmp_path):
+    build = _tree(tmp_path, tmp_path)
+    mine = ["CMakeFiles/MoreMojoPlugin.dir/Source/PluginEditor.cpp.o",
+            "MoreMojoPlugin.build/Release/Objects-normal/arm64/PluginEditor.o"]
+    others = ["CMakeFiles/MoreMojoPlugin.dir/Source/PluginProcessor.cpp.o",
+              "CMakeFiles/juce_gui_basics.dir/PluginEditor.cpp.o", "CMakeFiles/MoreMojoPlugin.dir/PluginEditor.h.gch"]
+    _touch(build, *mine, *others)
+    out = apply(build, tmp_path, [("drop-source", "Source/PluginEditor.cpp"), ("drop-source", "Source/PluginEditor.h")],
+                "MoreMojoPlugin")
+    assert out == [f"dropped {p}" for p in sorted(mine)]
+    assert not any((build / p).exists() for p in mine) and all((build / p).exists() for p in others)
+    assert apply(build, tmp_path, [("drop-source", "Source/PluginEditor.cpp")], "MoreMojoPlugin") == []
+    assert apply(build, tmp_path, [("drop-source", "Source/PluginProcessor.cpp")], None) == []
@@ -0,0 +1,52 @@
+import os, stat, zipfile
+
+import pytest
+
+import download_artifacts, fake_github, github_client
+from github_client import GitHubClient
+
+@pytest.fixture
+def run(tmp_path, fake_api, monkeypatch):
+    zips = []
+    for n in range(3):
+        zp = tmp_path / f"art{n}.zip"
+        with zipfile.ZipFile(zp, "w") as z: z.writestr(f"logs/{n}.log", f"log {n}\n" * 1000)
+        zips.append(zp)
+    url = fake_api(zips, delay=0.2)
+    monkeypatch.setattr(download_artifacts, "API", url)
+    monkeypatch.setenv("ARTIFACT_STORE", str(tmp_path / "store"))
+    monkeypatch.chdir(tmp_path)
+    return zips
+
+def test_connection_is_kept_alive(run):
+    client = GitHubClient("t-keepalive", cache_dir=None, rate=0)
+    host = github_client.API.split("//")[1]
+    client.get_json(github_client.api_url("/repos/o/r/actions/workflows"))
+    conn = client._conn("http", host)
+    client.get_json(github_client.api_url("/repos/o/r/actions/workflows"))
+    assert client._conn("http", host) is conn and conn.sock is not None
+
+def test_artifacts_download_concurrently(run):
+    token = "t-concurrent"
+    github_client._clients[token] = GitHubClient(token, cache_dir=None, rate=0)
+    artifacts = download_artifacts.get_workflow_artifacts("o", "r", 1, token)
+    results = download_artifacts.download_artifacts("o", "r", artifacts, token, concurrency=3)
+    for n, (artifact, extract_dir, transfer) in enumerate(results):
+        assert artifact["name"] == f"art{n}"
+        assert open(os.path.join(extract_dir, f"logs/{n}.log")).read() == f"log {n}\n" * 1000
+    # three artifacts, a redirect and a blob each, 0.2s apiece: overlapped, not 1.2s in a row
+    assert max(t.end for *_, t in results) - min(t.start for *_, t in results) < 1.0
+    assert sum(p.startswith("/blob/") for p in fake_github.Handler.requests) == 3
+
+def test_unsafe_artifact_is_reported_not_raised(run, tmp_path, fake_api, monkeypatch, capsys):
+    evil = tmp_path / "evil.zip"
+    with zipfile.ZipFile(evil, "w") as z:
+        info = zipfile.ZipInfo("logs/out"); info.external_attr = (stat.S_IFLNK | 0o777) << 16
+        z.writestr(info, "../../..")
+    monkeypatch.setattr(download_artifacts, "API", fake_api([run[0], evil]))
+    token = "t-unsafe"
+    github_client._clients[token] = GitHubClient(token, cache_dir=None, rate=0)
+    artifacts = download_artifacts.get_workflow_artifacts("o", "r", 1, token)
+    results = download_artifacts.download_artifacts("o", "r", artifacts, token)
+    assert results[0][1] is not None and results[1][1] is None
+    assert "Error extracting evil: logs/out: symlink to ../../.. leaves" in capsys.readouterr().out
@@ -0,0 +1,64 @@
+import json, os, signal, threading
+
+import agent_hub
+from follow import Watcher
+from registry import Agent, Registry
+from logscan import LogTail
+
+def _read(tail, final=False):
+    return b"".join(b for _, b in tail.read(final))
+
+def test_log_tail_returns_only_new_complete_lines(tmp_path):
+    log = tmp_path / "a.log"
+    tail = LogTail(log)
+    assert _read(tail) == b""                      # not there yet
+    log.write_bytes(b"one\ntw")
+    assert _read(tail) == b"one\n"
+    with open(log, "ab") as f: f.write(b"o\nthree")
+    assert _read(tail) == b"two\n"
+    assert _read(tail, final=True) == b"three"
+    assert _read(tail, final=True) == b""
+
+def test_log_tail_restarts_on_a_new_file(tmp_path):
+    log = tmp_path / "a.log"
+    tail = LogTail(log)
+    log.write_bytes(b"first run\n" * 3); _read(tail)
+    log.write_bytes(b"again\n")                    # truncated and rewritten
+    assert _read(tail) == b"again\n"
+    (tmp_path / "b.log").write_bytes(b"new\n" * 10); os.replace(tmp_path / "b.log", log)
+    assert list(tail.read()) == [(0, b"new\n" * 10)]
+
+def test_watcher_wakes_on_writes(tmp_path):
+    w = Watcher(tmp_path, interval=5)
+    threading.Timer(0.1, (tmp_path / "a.log").write_text, ["x\n"]).start()
+    w.wait()                                       # returns on the write, well before the interval
+    w.close()
+
+def test_follow_reports_each_agent_once_and_aborts(tmp_path, monkeypatch, agents):
+    tmp_path = tmp_path / "ci_logs"; tmp_path.mkdir()
+    monkeypatch.setattr(agent_hub, "LOGS_CI", tmp_path)
+    (tmp_path / "xcodebuild_app_stdout.log").write_text(
+        "future Xcode project file format\nxcodebuild: error: x\ncannot find type 'ProcessorParams' in scope\n" * 2)
+    (tmp_path / "cmake_configure.log").write_text("TARGET_BUNDLE_DIR is allowed only for Bundle targets\n")
+    fired = agent_hub.follow(abort_cmd=f"echo >> {tmp_path / 'aborted'}", interval=0.05)
+    assert set(fired) == {"ProjectAgent", "SchemeAgent", "SwiftAgent", "CMakeAgent"}
+    assert fired["SchemeAgent"]["at"] == "xcodebuild_app_stdout.log+33"
+    assert (tmp_path / "aborted").read_text() == "\n"
+    state = json.loads((tmp_path / "swarm_live.json").read_text())
+    assert state["final"] and state["aborted"] and all(d["fired"] for d in state["decisions"].values())
+
+def test_follow_tails_files_matching_a_glob_source(tmp_path, monkeypatch):
+    logs = tmp_path / "ci_logs"; logs.mkdir()
+    monkeypatch.setattr(agent_hub, "LOGS_CI", logs)
+    reg = Registry(agent_hub.SOURCES, agent_hub.ACTIONS)
+    reg.add(Agent("Globbed", "", ("ci_logs/steps/*.log",), (("link failed", False, 0),), ()))
+    monkeypatch.setattr(agent_hub, "REGISTRY", reg); monkeypatch.setattr(agent_hub, "MATCHER", reg.matcher())
+    (logs / "steps").mkdir(); (logs / "steps/1-configure.log").write_text("ok\n")
+    (logs / "swarm_follow.txt").write_text("link failed\n")    # our own output is never triaged
+    def later():
+        (logs / "steps/2-link.log").write_text("ld: link failed\n")    # created after follow() started
+    threading.Timer(0.2, later).start()
+    guard = threading.Timer(10, os.kill, [os.getpid(), signal.SIGTERM]); guard.start()
+    try: fired = agent_hub.follow(interval=0.05)
+    finally: guard.cancel()
+    assert fired["Globbed"]["at"] == "steps/2-link.log+4"
@@ -0,0 +1,121 @@
+import email.message, hashlib, io, json, os, time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+
+import pytest
+
+import fake_github, github_client, spans
+from github_client import GitHubClient, Transfer, api_url, fetch_to_file
+
+@pytest.fixture
+def blob(tmp_path, fake_api):
+    zp = tmp_path / "a.zip"
+    zp.write_bytes(os.urandom(3 << 20))
+    url = fake_api([zp])
+    return zp, f"{url}/blob/0", f'"{zp.stat().st_mtime_ns:x}"'
+
+def _client(**kw):
+    return GitHubClient("t", cache_dir=kw.pop("cache_dir", None), rate=0, **kw)
+
+def test_fetch_is_hashed_and_renamed_into_place(tmp_path, blob):
+    zp, url, _ = blob
+    dest, t = tmp_path / "out.zip", Transfer("a")
+    assert fetch_to_file(_client(), url, dest, t) == hashlib.sha256(zp.read_bytes()).hexdigest()
+    assert dest.read_bytes() == zp.read_bytes() and t.bytes == zp.stat().st_size
+    assert not any(p.name.startswith("out.zip.") for p in tmp_path.iterdir())
+
+@pytest.mark.parametrize("same", [True, False], ids=["resumed", "changed"])
+def test_part_file_is_resumed_only_if_unchanged(tmp_path, blob, same):
+    zp, url, etag = blob
+    dest, t, have = tmp_path / "out.zip", Transfer("a"), 1 << 20
+    (tmp_path / "out.zip.part").write_bytes(zp.read_bytes()[:have] if same else b"x" * have)
+    (tmp_path / "out.zip.part.json").write_text(json.dumps({"url": url, "validator": etag if same else '"old"'}))
+    assert fetch_to_file(_client(), url, dest, t) == hashlib.sha256(zp.read_bytes()).hexdigest()
+    assert dest.read_bytes() == zp.read_bytes()
+    assert t.bytes == zp.stat().st_size - (have if same else 0)
+
+def test_digest_mismatch_discards_the_download(tmp_path, blob):
+    _, url, _ = blob
+    with pytest.raises(ValueError, match="does not match"):
+        fetch_to_file(_client(), url, tmp_path / "out.zip", expected_sha256="sha256:" + "0" * 64)
+    assert list(tmp_path.glob("out.zip*")) == []
+
+def _statuses():
+    return [e["args"]["status"] for e in spans.events(["http"])]
+
+def test_unchanged_listing_is_a_304_served_from_cache(tmp_path, fake_api):
+    fake_api()
+    client, url = _client(cache_dir=tmp_path / "api"), api_url("/repos/o/r/actions/workflows")
+    first, n = client.get_json(url), len(_statuses())
+    assert _client(cache_dir=tmp_path / "api").get_json(url) == first
+    assert _statuses()[n:] == [304]
+
+def test_runs_are_filtered_server_side(tmp_path, fake_api):
+    fake_api()
+    client = _client(cache_dir=tmp_path / "api")
+    run = client.latest_successful_run("o", "r", "Build App & Plugins (macOS) with Logs", branch="main")
+    assert run["id"] == 1000
+    assert fake_github.Handler.requests[-1] == "/repos/o/r/actions/workflows/1/runs?branch=main&status=success&per_page=1"
+    # the workflow name -> id map is kept: a second lookup does not list workflows again
+    fake_github.Handler.requests.clear()
+    client.latest_successful_run("o", "r", "Build App & Plugins (macOS) with Logs", branch="main")
+    assert not any(p.endswith("/workflows") for p in fake_github.Handler.requests)
+
+class Resp(io.BytesIO):
+    """Enough of http.client.HTTPResponse for GitHubClient._send and get()."""
+    def __init__(self, status, body=b"{}", headers=None):
+        super().__init__(body)
+        self.status, self.reason, self.headers = status, "", email.message.Message()
+        for k, v in (headers or {}).items(): self.headers[k] = v
+    def getheader(self, name, default=None): return self.headers.get(name, default)
+
+def _scripted(monkeypatch, client, *responses, delay=0.0):
+    sent, script = [], list(responses)
+    def request(u, method, hdrs):
+        time.sleep(delay); sent.append(u.path)
+        return script.pop(0) if len(script) > 1 else script[0]
+    monkeypatch.setattr(client, "_request", request)
+    monkeypatch.setattr(github_client, "_backoff", lambda attempt: 0.0)
+    return sent
+
+@pytest.mark.parametrize("status, headers, body, delay", [
+    (429, {"Retry-After": "7"}, b"", 7.0),
+    (403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0"}, b"", 1.0),
+    (403, {}, b"You have exceeded a secondary rate limit", github_client.SECONDARY_WAIT),
+    (403, {}, b"Resource not accessible by integration", None),
+    (404, {}, b"", None),
+])
+def test_retry_delay(status, headers, body, delay):
+    assert github_client._retry_delay(status, headers, body, 0) == delay
+
+def test_transient_errors_are_retried(monkeypatch):
+    client = _client()
+    sent = _scripted(monkeypatch, client, Resp(503), Resp(502), Resp(200, b'{"ok": 1}'))
+    assert client.get_json(api_url("/x")) == {"ok": 1} and len(sent) == 3
+
+def test_permission_error_is_not_retried(monkeypatch):
+    client = _client()
+    sent = _scripted(monkeypatch, client, Resp(403, b"Resource not accessible"))
+    with pytest.raises(HTTPError) as e: client.get_json(api_url("/x"))
+    assert e.value.code == 403 and len(sent) == 1
+
+def test_throttling_pauses_every_thread_on_the_token(monkeypatch):
+    client = _client()
+    sent = _scripted(monkeypatch, client, Resp(429), Resp(200))
+    monkeypatch.setattr(github_client, "SECONDARY_WAIT", 0.3)
+    t = time.monotonic()
+    client.get_json(api_url("/x"))
+    # the wait went into the shared bucket, not a private sleep
+    assert client.bucket.paused_until >= t + 0.3 and time.monotonic() - t >= 0.3 and len(sent) == 2
+
+def test_identical_gets_in_flight_are_sent_once(monkeypatch):
+    client = _client()
+    sent = _scripted(monkeypatch, client, Resp(200, b'{"n": 1}'), delay=0.2)
+    with ThreadPoolExecutor(4) as ex:
+        out = list(ex.map(client.get_json, [api_url("/x")] * 4))
+    assert out == [{"n": 1}] * 4 and sent == ["/x"]
+
+def test_token_bucket_paces():
+    bucket, t = github_client.TokenBucket(20, burst=1), time.monotonic()
+    for _ in range(5): bucket.take()
+    assert time.monotonic() - t >= 0.19
@@ -0,0 +1,133 @@
+import io, os, random, zipfile
+
+import pytest
+
+import logscan
+
+from logscan import LineIndex, LogStream, Matcher, excerpts, iter_blocks, iter_blocks_reverse, signatures
+
+SAMPLES = [b"", b"a", b"a\n", b"\n\n\n", b"one\ntwo\nthree", b"one\ntwo\nthree\n",
+           b"short\n" + b"x" * 40 + b"\nab\ncd", b"y" * 30]
+CHUNKS = [2, 3, 5, 8, 64, 1 << 20]
+
+def _covers(data, blocks):
+    out = bytearray(len(data))
+    for off, b in blocks:
+        assert data[off:off + len(b)] == b
+        out[off:off + len(b)] = b
+    assert bytes(out) == data
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+@pytest.mark.parametrize("data", SAMPLES)
+def test_iter_blocks_cuts_on_newlines(data, chunk):
+    blocks = list(iter_blocks(io.BytesIO(data), chunk))
+    _covers(data, blocks)
+    assert [o for o, _ in blocks] == sorted(o for o, _ in blocks)
+    for _, b in blocks[:-1]:
+        assert b.endswith(b"\n") or b"\n" not in b    # only a line longer than a block is cut
+    if max(map(len, data.split(b"\n"))) < chunk:
+        assert sum(len(b) for _, b in blocks) == len(data)    # no overlaps unless a line was cut
+
+@pytest.mark.parametrize("chunk", CHUNKS)
+@pytest.mark.parametrize("data", SAMPLES)
+def test_iter_blocks_reverse_mirrors_forward(data, chunk):
+    blocks = list(iter_blocks_reverse(io.BytesIO(data), len(data), chunk))
+    _covers(data, blocks)
+    assert [o for o, _ in blocks] == sorted((o for o, _ in blocks), reverse=True)
+    for off, b in blocks:
+        assert off == 0 or data[off - 1:off] == b"\n" or b"\n" not in b
+
+def test_iter_blocks_start_at_pos():
+    data = b"one\ntwo\nthree\n"
+    blocks = list(iter_blocks(io.BytesIO(data[4:]), 3, pos=4))
+    assert blocks[0][0] == 4
+    _covers(data, [(0, data[:4])] + blocks)
+
+@pytest.mark.parametrize("stop", range(0, 14))
+def test_iter_blocks_reverse_stops_at_a_line_start(stop):
+    data = b"one\ntwo\nthree\n"
+    got = b"".join(b for _, b in reversed(list(iter_blocks_reverse(io.BytesIO(data), len(data), 4, stop=stop))))
+    first = 0 if stop == 0 else data.find(b"\n", stop) + 1    # the line holding byte ``stop`` is left out
+    assert got == data[first:]
+
+def test_log_stream_reads_each_file_once(tmp_path):
+    log = tmp_path / "a.log"
+    log.write_bytes(b"one\ntwo\n" * 1000)
+    os.symlink(log, tmp_path / "b.log")
+    s = LogStream([log, tmp_path / "b.log", tmp_path / "missing.log"])
+    assert len(s) == log.stat().st_size
+    assert b"".join(b for _, _, b in s.chunks()) == log.read_bytes()
+    assert s.read == log.stat().st_size and not s.partial
+
+def test_line_index_span():
+    data = b"zero\none\n\nthree\nfour"
+    lines = data.split(b"\n")
+    idx = LineIndex()
+    idx.add(0, data[:9]); idx.add(9, data[9:])
+    for first in range(len(lines)):
+        for last in range(first, len(lines)):
+            start, end = idx.span(first, last)
+            assert data[start:end] == b"\n".join(lines[first:last + 1])
+    assert [idx.line_of(data.index(w)) for w in (b"zero", b"one", b"three", b"four")] == [0, 1, 3, 4]
+
+def test_line_index_of_a_tail():
+    data = b"zero\none\ntwo\n"
+    idx = LineIndex(); idx.add(5, data[5:]); idx.close(5, len(data))
+    assert data[slice(*idx.span(0, 0))] == b"one"
+    assert data[slice(*idx.span(0, 1))] == b"one\ntwo"
+
+def test_line_index_read_tail_first():
+    data = b"".join(b"line %d\n" % n for n in range(50))
+    forward = LineIndex(); forward.add(0, data)
+    idx = LineIndex()
+    for end in range(len(data), 0, -64): idx.add(max(0, end - 64), data[max(0, end - 64):end], descending=True)
+    idx.close(0, None, descending=True)
+    assert idx.nl == forward.nl
+
+def _log(tmp_path, name, lines, end="\n"):
+    p = tmp_path / name
+    p.write_bytes(("\n".join(lines) + end).encode())
+    return p
+
+def test_scan_settle_keeps_verdicts(tmp_path):
+    lines = [f"CompileSwift normal arm64 /x/y{i}.swift" for i in range(50000)]
+    p = _log(tmp_path, "a.log", lines[:10] + ["future Xcode project file format"] + lines + ["xcodebuild: error: boom"])
+    m = Matcher([("P", "future Xcode project file format", False, 0), ("S", "xcodebuild: error:", True, 0),
+                 ("N", "never printed", False, 0)])
+    full, early = LogStream([p]), LogStream([p])
+    a, b = m.scan(full), m.scan(early, settle=True)
+    assert {k: bool(v) for k, v in a.items()} == {k: bool(v) for k, v in b.items()}
+    assert not full.partial
+
+def test_scan_settle_stops_early(tmp_path):
+    p = _log(tmp_path, "a.log", ["filler line"] * 200000 + ["xcodebuild: error: boom"])
+    s = LogStream([p])
+    assert Matcher([("S", "xcodebuild: error:", True, 0)]).scan(s, settle=True)["S"]
+    assert s.partial and s.read < p.stat().st_size
+
+@pytest.mark.parametrize("chunk", [16, 64, 200, 1 << 20])
+def test_captured_lines_and_excerpts_match_a_reread(tmp_path, monkeypatch, chunk):
+    monkeypatch.setattr(logscan.iter_blocks, "__defaults__", (chunk, 0))
+    rnd = random.Random(chunk)
+    for trial in range(40):
+        lines = [rnd.choice([f"ok line {i}", f"ERR boom {rnd.randint(0, 20)}", "x" * rnd.randint(0, 120), ""])
+                 for i in range(rnd.randint(0, 300))]
+        p = _log(tmp_path, "a.log", lines, end=rnd.choice(["", "\n"]))
+        m = Matcher([("A", "ERR boom", False, 0)])
+        kept, reread = LogStream([p]), LogStream([p])
+        hits = m.scan(kept)["A"]
+        m.scan(reread); reread.lines.clear(); reread.contexts.clear()
+        assert [kept.line_at(h) for h in hits] == [reread.line_at(h) for h in hits]
+        assert excerpts(kept, hits) == excerpts(reread, hits)
+
+def test_zip_member_is_not_inflated_again(tmp_path, monkeypatch):
+    lines = [f"line {i}" for i in range(5000)] + ["xcodebuild: error: Scheme Foo is not configured"] + ["after"] * 30
+    log = _log(tmp_path, "a.log", lines)
+    with zipfile.ZipFile(tmp_path / "logs.zip", "w", zipfile.ZIP_DEFLATED) as z: z.write(log, "logs/a.log")
+    s = LogStream(logscan.zip_members(tmp_path / "logs.zip", "**/*.log"))
+    hits = Matcher([("S", "xcodebuild: error:", True, 0)]).scan(s)["S"]
+    monkeypatch.setattr(logscan, "open_source", lambda src: pytest.fail(f"re-opened {src}"))
+    sigs = signatures(s, hits)
+    assert [line for _, _, line in sigs.values()] == ["xcodebuild: error: Scheme Foo is not configured"]
+    text = next(iter(excerpts(s, hits, sigs=sigs).values()))[2]
+    assert text.splitlines() == lines[-51:-10]
@@ -0,0 +1,97 @@
+import random, re
+
+import pytest
+
+import corpus, logscan
+from agent_hub import CMakeAgent, ProjectAgent, SchemeAgent, SwiftAgent
+from logscan import LogStream, Matcher
+
+# the decisions agent_hub made before the shared Matcher, on the concatenated log text
+OLD_WANTS = {
+    "ProjectAgent": lambda t: any(p in t for p in ProjectAgent.PATTERNS),
+    "SchemeAgent": lambda t: any(re.search(p, t, flags=re.IGNORECASE) for p in SchemeAgent.PATTERNS),
+    "SwiftAgent": lambda t: any(k in t for k in SwiftAgent.KEYS),
+    "CMakeAgent": lambda t: any(p in t for p in CMakeAgent.PATTERNS),
+}
+FILLER = ["CompileSwift normal arm64 /x/Foo.swift", "** BUILD FAILED **", "", "warning: unused variable 'x'",
+          "Scheme MoreMojo is configured", "xcodebuild error", "TARGET_BUNDLE_DIR is allowed"]
+
+def _fragment(rnd, registry):
+    """A line that may hold an agent's pattern, a near miss or a case variant of one."""
+    p = rnd.choice(registry.specs())[1]
+    if p.startswith("Scheme "): p = "Scheme MoreMojo is not currently configured for the build action"
+    return rnd.choice([p, p.upper(), p[:-1], f"/x/A.swift:3:5: error: {p}", rnd.choice(FILLER)])
+
+@pytest.fixture(params=[1 << 30, 0], ids=["direct", "prefilter"])
+def strategy(request, monkeypatch):
+    monkeypatch.setattr(logscan, "PREFILTER_MIN", request.param)
+
+def test_verdicts_match_old_wants(tmp_path, strategy, agents):
+    rnd = random.Random(2)
+    specs = [s for s in agents.specs() if s[0] in OLD_WANTS]
+    for trial in range(200):
+        paths = []
+        for n in range(rnd.randint(1, 3)):
+            p = tmp_path / f"{trial}-{n}.log"
+            p.write_text("".join(_fragment(rnd, agents) + "\n" for _ in range(rnd.randint(0, 6))))
+            paths.append(p)
+        text = "".join(p.read_text() for p in paths)
+        want = {a: bool(f(text)) for a, f in OLD_WANTS.items()}
+        m = Matcher(specs)
+        assert {a: bool(h) for a, h in m.scan(LogStream(paths)).items()} == want
+        assert {a: bool(h) for a, h in m.scan(LogStream(paths), settle=True).items()} == want
+        assert {a: bool(m.scan(LogStream(paths), [a], settle=True)[a]) for a in OLD_WANTS} == want
+
+def _reference(specs, b):
+    out = set()
+    for i, (_, p, rx, flags) in enumerate(specs):
+        for m in re.finditer(p.encode() if rx else re.escape(p.encode()), b, flags):
+            out.add((i, m.start()))
+        if not rx and not flags and p:    # literals also count overlapping occurrences
+            at = b.find(p.encode())
+            while at >= 0: out.add((i, at)); at = b.find(p.encode(), at + 1)
+    return out
+
+def test_scan_block_finds_every_occurrence(strategy):
+    rnd = random.Random(7)
+    alpha = "abc :'$(.\nAB"
+    for trial in range(1500):
+        specs = []
+        for k in range(rnd.randint(1, 8)):
+            lit = "".join(rnd.choice(alpha) for _ in range(rnd.randint(1, 6)))
+            kind = rnd.random()
+            if kind < 0.6: specs.append((f"A{k % 3}", lit, False, 0))
+            elif kind < 0.8: specs.append((f"A{k % 3}", lit, False, re.I))
+            else: specs.append((f"A{k % 3}", re.escape(lit) + rnd.choice(["", ".", "b*", "(?:a|c)"]), True,
+                               rnd.choice([0, re.I])))
+        b = "".join(rnd.choice(alpha) for _ in range(rnd.randint(0, 300))).encode()
+        assert set(Matcher(specs)._scan_block(b)) == _reference(specs, b)
+
+def test_anchors_round_trip(agents):
+    specs = agents.specs()
+    first = Matcher(specs)
+    again = Matcher(specs, first.anchors)
+    b = b"x\nSCHEME Foo is not currently configured for the build action\nxcodebuild: error: boom\n"
+    assert set(again._scan_block(b)) == set(first._scan_block(b)) != set()
+
+def test_prefilter_agrees_with_direct_on_corpus_patterns(monkeypatch):
+    rnd = random.Random(5)
+    specs = corpus.make_patterns(200)
+    lines = corpus._xcode_lines(rnd, 300) + corpus._cmake_lines(rnd, 300) + corpus.APP_ERRORS + corpus.PLUGIN_ERRORS
+    lines += [p.replace("\\d+", "12").replace("\\w+", "x").replace("\\.", ".") for _, p, *_ in specs[::3]]
+    rnd.shuffle(lines)
+    b = ("\n".join(lines) + "\n").encode()
+    direct = set(Matcher(specs)._scan_block(b))
+    monkeypatch.setattr(logscan, "PREFILTER_MIN", 0)
+    assert set(Matcher(specs)._scan_block(b)) == direct and len({i for i, _ in direct}) > 60
+
+@pytest.mark.parametrize("pat", ["Unable to read project", "xcodebuild: error:", "cannot find type 'ProcessorParams' in scope",
+                                 "TARGET_BUNDLE_DIR is allowed"])
+def test_prefilter_finds_patterns_glued_to_word_bytes(monkeypatch, pat):
+    specs = [("F", f"filler pattern {n} here", False, 0) for n in range(70)] + [("A", pat, False, 0),
+             ("B", pat, False, re.I), ("C", re.escape(pat) + r"\w*", True, 0)]
+    for glued in (f"x{pat}y", f"_{pat}_", f"error: {pat}file.xcodeproj", f"x{pat.upper()}y"):
+        b = f"noise\n{glued}\nmore noise\n".encode()
+        monkeypatch.setattr(logscan, "PREFILTER_MIN", 1 << 30); direct = set(Matcher(specs)._scan_block(b))
+        monkeypatch.setattr(logscan, "PREFILTER_MIN", 0); prefilter = set(Matcher(specs)._scan_block(b))
+        assert prefilter == direct and {i for i, _ in direct} >= {71}
@@ -0,0 +1,29 @@
+import zipfile
+
+import agent_hub
+from logscan import ZipMember
+
+GLOB = "failed_artifacts/app-build-logs/**/xcodebuild_app_stdout.log"
+
+def _zip(path, members):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, text in members.items(): z.writestr(name, text)
+    return path
+
+def test_artifact_zip_members_are_read_in_place(tmp_path):
+    dl = tmp_path / "failed_artifacts"; dl.mkdir()
+    z = _zip(dl / "app-build-logs.zip", {"logs/xcodebuild_app_stdout.log": "error: boom\n",
+                                         "logs/other.log": "x\n"})
+    _zip(dl / "plugin-build-logs.zip", {"logs/xcodebuild_app_stdout.log": "not this artifact\n"})
+    s = agent_hub.read_globs(GLOB, root=tmp_path, dl=dl, zips=sorted(dl.glob("*.zip")))
+    assert s.paths == [ZipMember(str(z), "logs/xcodebuild_app_stdout.log")]
+    assert b"".join(b for _, _, b in s.chunks()) == b"error: boom\n"
+    assert not (dl / "app-build-logs").exists()
+
+def test_extracted_files_and_zips_are_both_read(tmp_path):
+    dl = tmp_path / "failed_artifacts"
+    (dl / "app-build-logs/logs").mkdir(parents=True)
+    (dl / "app-build-logs/logs/xcodebuild_app_stdout.log").write_text("extracted\n")
+    extra = _zip(tmp_path / "app-build-logs.zip", {"xcodebuild_app_stdout.log": "zipped\n"})
+    s = agent_hub.read_globs(GLOB, root=tmp_path, dl=dl, zips=[extra])
+    assert sorted(b"".join(b for _, _, b in s.chunks()).split()) == [b"extracted", b"zipped"]
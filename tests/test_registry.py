@@ -0,0 +1,63 @@
+import json, os, re, subprocess, sys
+
+import pytest
+
+import registry
+from registry import Agent, Registry, from_class
+
+SOURCES = {"app": ("ci_logs/app.log",), "plugin": ("ci_logs/cmake.log",)}
+
+class Built:
+    """A built-in agent."""
+    PATTERNS = [r"error: \w+"]
+    REGEX, FLAGS = True, re.IGNORECASE
+    ACTIONS = ["fix"]
+
+def _registry():
+    r = Registry(SOURCES, ["fix"])
+    r.add(from_class(Built, "app"))
+    return r
+
+def test_from_class():
+    assert from_class(Built, "app") == Agent("Built", "A built-in agent.", "app", ((r"error: \w+", True, re.I),), ("fix",))
+
+def test_load_drop_ins(tmp_path):
+    (tmp_path / "a.json").write_text(json.dumps({"agents": [
+        {"name": "Sign", "source": "app", "patterns": ["errSecInternalComponent", {"regex": "Code ?Sign", "ignorecase": True}]},
+        {"name": "Globbed", "source": ["ci_logs/other/*.log"], "patterns": [{"literal": "boom"}], "actions": ["fix"]}]}))
+    (tmp_path / "b.yaml").write_text("name: Yaml\nsource: plugin\npatterns: [CMake Error]\n")
+    (tmp_path / "notes.txt").write_text("not an agent")
+    r = _registry()
+    assert r.load(tmp_path) == ["Sign", "Globbed", "Yaml"]
+    assert r.agents["Sign"].patterns == (("errSecInternalComponent", False, 0), ("Code ?Sign", True, re.I))
+    assert r.sources["ci_logs/other/*.log"] == ("ci_logs/other/*.log",)
+    assert r.groups() == [("app", ["Built", "Sign"]), ("ci_logs/other/*.log", ["Globbed"]), ("plugin", ["Yaml"])]
+
+@pytest.mark.parametrize("entry, error", [
+    ({"name": "Built", "source": "app", "patterns": ["x"]}, "already registered"),
+    ({"name": "A", "source": "web", "patterns": ["x"]}, "unknown log source"),
+    ({"name": "A", "source": "app", "patterns": ["x"], "actions": ["nope"]}, "unknown action"),
+    ({"name": "A", "source": "app", "patterns": [{"regex": "(unclosed"}]}, "bad regex"),
+    ({"name": "A", "source": "app", "patterns": [{"regex": "x", "literal": "x"}]}, "bad pattern"),
+    ({"name": "A", "source": "app"}, "no patterns"),
+    ({"source": "app", "patterns": ["x"]}, "without a name"),
+])
+def test_bad_agents_are_skipped(tmp_path, entry, error):
+    (tmp_path / "a.json").write_text(json.dumps([entry, {"name": "Good", "source": "app", "patterns": ["ok"]}]))
+    (tmp_path / "b.json").write_text("{not json")
+    warnings, r = [], _registry()
+    assert r.load(tmp_path, tmp_path / "missing.json", warn=warnings.append) == ["Good"]
+    assert len(warnings) == 2 and error in warnings[0] and warnings[1].startswith(f"skipping {tmp_path / 'b.json'}")
+
+def test_matcher_plan_is_cached(tmp_path, monkeypatch):
+    first = _registry().matcher(tmp_path)
+    assert json.loads((tmp_path / "matcher.json").read_text())["anchors"] == first.anchors == ["error: "]
+    monkeypatch.setattr(registry, "Matcher", lambda specs, anchors: pytest.fail("derived again") if anchors is None else None)
+    _registry().matcher(tmp_path)
+    r = _registry(); r.add(Agent("New", "", "app", (("x+y", True, 0),), ()))
+    with pytest.raises(pytest.fail.Exception): r.matcher(tmp_path)    # new patterns: a new plan
+
+def test_importing_agent_hub_writes_no_cache(tmp_path):
+    env = dict(os.environ, SWARM_CACHE_DIR=str(tmp_path / "cache"), PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", "import agent_hub; assert agent_hub.REGISTRY is None"], env=env, check=True)
+    assert not (tmp_path / "cache").exists()
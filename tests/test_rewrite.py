@@ -0,0 +1,43 @@
+import os, random, re
+
+from agent_hub import SwiftAgent
+from rewrite import RuleSet
+
+WORDS = ["ProcessorParams.InterpMode", "ProcessorParams", ".InterpMode", ".app", ".apple", ".appDecides", ".steal",
+         ".stealMacro", ".stealth", "mode = .app\n", "x.app(", " ", "\n", "let", "(", "."]
+
+def _sequential(rules, text):
+    for rx, repl in rules.rules: text = re.sub(rx, lambda m: repl, text)
+    return text
+
+def test_one_pass_equals_sequential_subs():
+    rnd = random.Random(3)
+    for trial in range(2000):
+        text = "".join(rnd.choice(WORDS) for _ in range(rnd.randint(0, 30)))
+        assert SwiftAgent.RULES.sub(text) == _sequential(SwiftAgent.RULES, text)
+
+def test_replacements_are_literal():
+    rules = RuleSet([(r"a(b)", r"\1\n")])
+    assert rules.sub("ab") == "\\1\\n"
+
+def test_apply_skips_normalized_files(tmp_path):
+    src = tmp_path / "A.swift"
+    src.write_text("let m: ProcessorParams.InterpMode = .app\n")
+    manifest = tmp_path / "manifest.json"
+    assert SwiftAgent.RULES.apply([src], manifest) == [str(src)]
+    assert src.read_text() == "let m: InterpMode = .appDecides\n"
+    assert SwiftAgent.RULES.apply([src], manifest) == []
+    # touched (fresh checkout) but still normalized: the hash says so, nothing is rewritten
+    os.utime(src, ns=(0, 0))
+    assert SwiftAgent.RULES.apply([src], manifest) == []
+    src.write_text("x = .steal\n")
+    assert SwiftAgent.RULES.apply([src], manifest) == [str(src)]
+    assert src.read_text() == "x = .stealMacro\n"
+
+def test_apply_in_a_pool(tmp_path):
+    paths = []
+    for i in range(40):
+        p = tmp_path / f"F{i}.swift"; p.write_text(f"let a{i} = .app\n" if i % 2 else "let b = 1\n"); paths.append(p)
+    changed = SwiftAgent.RULES.apply(paths, tmp_path / "manifest.json")
+    assert sorted(changed) == sorted(str(p) for p in paths[1::2])
+    assert all(p.read_text().endswith(".appDecides\n") for p in paths[1::2])
@@ -0,0 +1,66 @@
+import pytest
+
+import agent_hub, triage_cache
+from sigindex import SigIndex, report
+
+ROWS = [["SwiftAgent", "error: cannot find type '<path>' in scope", 3, "error: cannot find type 'Foo' in scope"],
+        ["CMakeAgent", "CMake Error at <path>:<n> (juce_add_plugin)", 1, "CMake Error at x.txt:3 (juce_add_plugin)"]]
+
+def test_record_and_query(tmp_path):
+    index = SigIndex(tmp_path / "sigs.db")
+    assert index.record("run-1", 100.0, ROWS) == 2
+    assert index.record("run-2", 200.0, ROWS[:1]) == 0
+    top = index.query()
+    assert [(r[0], r[2], r[3]) for r in top] == [(ROWS[0][1], 2, 6), (ROWS[1][1], 1, 1)]
+    sig, agents, runs, hits, first, first_run, last, example = top[0]
+    assert (agents, first, first_run, last, example) == ("SwiftAgent", 100.0, "run-1", 200.0, ROWS[0][3])
+    assert index.runs() == 2
+    index.close()
+
+def test_rerecording_a_run_replaces_it(tmp_path):
+    index = SigIndex(tmp_path / "sigs.db")
+    index.record("run-1", 100.0, ROWS)
+    index.record("run-1", 150.0, ROWS[:1])
+    assert [(r[0], r[2], r[3], r[4]) for r in index.query()] == [(ROWS[0][1], 1, 3, 150.0)]
+    assert index.runs() == 1
+
+def test_full_text_query_takes_punctuation_literally(tmp_path):
+    index = SigIndex(tmp_path / "sigs.db")
+    index.record("run-1", 100.0, ROWS)
+    assert [r[0] for r in index.query("juce_add_plugin)")] == [ROWS[1][1]]
+    assert index.query("no such error") == []
+
+def test_report():
+    lines = report([(ROWS[0][1], "SwiftAgent", 2, 6, 0.0, "run-1", 86400.0, "x")], 2)
+    assert lines[0] == "# Failure signatures (2 run(s) indexed)"
+    assert lines[-1] == f"| `{ROWS[0][1]}` | SwiftAgent | 2 | 6 | 1970-01-01 00:00 | run-1 | 1970-01-02 00:00 |"
+
+@pytest.fixture
+def checkout(tmp_path, monkeypatch, agents):
+    for name in ("ROOT", "CACHE"): monkeypatch.setattr(agent_hub, name, tmp_path)
+    monkeypatch.setattr(agent_hub, "LOGS_CI", tmp_path / "ci_logs"); monkeypatch.setattr(agent_hub, "LOGS_DL", tmp_path / "none")
+    monkeypatch.setattr(agent_hub, "SUMMARY", tmp_path / "summary.md"); monkeypatch.setattr(agent_hub, "TRACE", tmp_path / "trace.json")
+    monkeypatch.delenv("GITHUB_RUN_ID", raising=False)
+    (tmp_path / "ci_logs").mkdir()
+    (tmp_path / "ci_logs/cmake_build.log").write_text("CMake Error at x.txt:3 (juce_add_plugin)\n")
+    return tmp_path
+
+def test_local_retriage_counts_once(checkout, monkeypatch):
+    tmp_path = checkout
+    monkeypatch.setenv("SWARM_NO_CACHE", "1")
+    for _ in range(2):
+        with pytest.raises(SystemExit): agent_hub.main([])
+    index = SigIndex(tmp_path / "signatures.db")
+    assert index.runs() == 1 and "1 run(s) indexed" in (tmp_path / "summary.md").read_text()
+    [(run,)] = index.db.execute("SELECT run FROM runs").fetchall()
+    assert run == agent_hub.run_key(agent_hub.read_sources())
+
+def test_local_run_key_reuses_the_cache_digests(checkout, monkeypatch):
+    opened = []
+    def counting_open(path, *a, **kw): opened.append(path); return open(path, *a, **kw)
+    monkeypatch.setattr(triage_cache, "open", counting_open, raising=False)
+    monkeypatch.delenv("SWARM_NO_CACHE", raising=False)
+    with pytest.raises(SystemExit): agent_hub.main([])
+    assert len(opened) == 1                                  # hashed for the cache key only
+    index = SigIndex(checkout / "signatures.db")
+    assert index.runs() == 1
@@ -0,0 +1,16 @@
+import pytest
+
+import spans
+
+def _no_proc(*a, **kw): raise FileNotFoundError("/proc/self/io")
+
+@pytest.mark.parametrize("proc", [True, False], ids=["linux", "no-proc"])
+def test_span_records_io(tmp_path, monkeypatch, proc):
+    if not proc: monkeypatch.setattr(spans, "open", _no_proc, raising=False)
+    with spans.span(f"io {proc}", cat="test") as s:
+        (tmp_path / "f").write_bytes(b"x" * (1 << 20)); s["n"] = 1
+    e = spans.events(["test"])[-1]
+    keys = ("io_read_mb", "io_write_mb") if proc else ("io_read_blocks", "io_write_blocks")
+    assert all(k in e["args"] for k in keys)
+    row = spans.table(["test"])[-1]
+    assert row.startswith(f"| io {proc} |") and ("blk |" in row) != proc and row.endswith("| n=1 |")
@@ -0,0 +1,37 @@
+import subprocess
+
+import pytest
+
+import agent_hub
+
+def git(root, *args):
+    return subprocess.run(["git", *args], cwd=root, check=True, text=True, capture_output=True).stdout
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    root = tmp_path.resolve()
+    git(root, "init", "-q")
+    git(root, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "--allow-empty", "-m", "base")
+    for name in ("edited.txt", "removed.txt"): (root / name).write_text("old\n")
+    git(root, "add", "."); git(root, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "files")
+    monkeypatch.setattr(agent_hub, "ROOT", root)
+    monkeypatch.setattr(agent_hub, "TOUCHED", set()); monkeypatch.setattr(agent_hub, "STAGED", set())
+    monkeypatch.setattr(agent_hub, "STAGE_ERRORS", [])
+    return root
+
+def test_stage_adds_edits_and_deletions_skips_untracked_gone(repo):
+    agent_hub.write(repo / "edited.txt", "new\n")
+    agent_hub.write(repo / "added.txt", "new\n")
+    agent_hub.unlink(repo / "removed.txt")
+    agent_hub.write(repo / "tmp/scratch.txt", "x\n"); agent_hub.unlink(repo / "tmp/scratch.txt")
+    agent_hub.stage()
+    assert agent_hub.STAGE_ERRORS == []
+    assert git(repo, "diff", "--cached", "--name-status").split() == ["A", "added.txt", "M", "edited.txt", "D", "removed.txt"]
+    assert agent_hub.has_changes()
+
+def test_stage_failure_is_reported(repo):
+    agent_hub.write(repo / "edited.txt", "new\n")
+    (repo / ".git/index.lock").write_text("")
+    agent_hub.stage()
+    assert len(agent_hub.STAGE_ERRORS) == 1 and agent_hub.STAGE_ERRORS[0].startswith("git add failed (exit 128) for 1 path(s)")
+    assert not agent_hub.has_changes()
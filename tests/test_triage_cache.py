@@ -0,0 +1,65 @@
+import os, zipfile
+
+import logscan, triage_cache
+from logscan import LogStream, zip_members
+from triage_cache import TriageCache
+
+def _logs(tmp_path, **files):
+    paths = []
+    for name, text in files.items():
+        p = tmp_path / name; p.write_text(text); paths.append(p)
+    return LogStream(paths)
+
+def test_hit_after_put_miss_after_change(tmp_path):
+    cache = TriageCache(tmp_path / "cache")
+    logs = _logs(tmp_path, **{"a.log": "error: one\n", "b.log": "ok\n"})
+    key = cache.fingerprint("v1", logs)
+    assert cache.get(key) is None
+    cache.put(key, {"decisions": {"A": True}})
+    assert cache.get(cache.fingerprint("v1", logs)) == {"decisions": {"A": True}}
+    assert cache.fingerprint("v2", logs) != key                # new patterns or agents
+    (tmp_path / "a.log").write_text("error: two\n")
+    assert cache.fingerprint("v1", logs) != key                # new log bytes
+
+def test_streams_and_names_are_part_of_the_key(tmp_path):
+    cache = TriageCache(tmp_path / "cache")
+    a, b = _logs(tmp_path, **{"a.log": "x\n"}), _logs(tmp_path, **{"b.log": "x\n"})
+    assert cache.fingerprint("v", a, b) != cache.fingerprint("v", b, a)
+    assert cache.fingerprint("v", a) != cache.fingerprint("v", b)
+
+def test_unchanged_files_are_not_hashed_again(tmp_path, monkeypatch):
+    cache = TriageCache(tmp_path / "cache")
+    logs = _logs(tmp_path, **{"a.log": "x\n" * 1000})
+    key = cache.fingerprint("v", logs)
+    monkeypatch.setattr(triage_cache, "HASH_SAMPLE", None)     # any read would now fail
+    assert cache.fingerprint("v", logs) == key
+
+def test_large_logs_are_keyed_on_size_head_and_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(triage_cache, "HASH_SAMPLE", 1024)
+    cache, log = TriageCache(tmp_path / "cache"), tmp_path / "a.log"
+    data = bytearray(b"x" * 10000); log.write_bytes(data)
+    key = cache.fingerprint("v", LogStream([log]))
+    data[5000] = ord("y"); log.write_bytes(data)             # the middle is not read
+    assert cache.fingerprint("v", LogStream([log])) == key
+    data[-1] = ord("y"); log.write_bytes(data)
+    assert cache.fingerprint("v", LogStream([log])) != key
+    log.write_bytes(data + b"z\n")
+    assert len({key, cache.fingerprint("v", LogStream([log]))}) == 2
+
+def test_zip_members_use_the_archive_crc(tmp_path):
+    zp = tmp_path / "logs.zip"
+    with zipfile.ZipFile(zp, "w", zipfile.ZIP_DEFLATED) as z: z.writestr("logs/a.log", "error: one\n")
+    cache = TriageCache(tmp_path / "cache")
+    key = cache.fingerprint("v", LogStream(zip_members(zp, "**/*.log")))
+    with zipfile.ZipFile(zp, "w", zipfile.ZIP_DEFLATED) as z: z.writestr("logs/a.log", "error: two\n")
+    logscan._zip_infos.cache_clear()
+    assert cache.fingerprint("v", LogStream(zip_members(zp, "**/*.log"))) != key
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = TriageCache(tmp_path / "cache", max_bytes=300)
+    for n in range(3):
+        cache.put(f"k{n}", {"pad": "x" * 80})
+        os.utime(cache.root / f"k{n}.json", (n, n))
+    assert cache.get("k0") is not None                         # refreshed: now the newest
+    cache.put("k3", {"pad": "x" * 80})
+    assert {p.stem for p in cache.root.glob("k*.json")} == {"k0", "k2", "k3"}